@@ -13,9 +13,10 @@ import time
 
 from app.config import config
 from app.errors import register_error_handlers, generate_request_id
+from app.db_routing import RoutingSession
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 
 
@@ -70,7 +71,12 @@ def create_app(config_name=None):
     
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, render_as_batch=True)  # SQLite needs batch mode for ALTERs
+    
+    # WAL and tuned pragmas on SQLite file databases
+    from app import sqlite_profile
+    with app.app_context():
+        sqlite_profile.init_app(app, db.engines.values())
     
     # CORS - use configured origins
     cors_origins = app.config.get('CORS_ORIGINS', ['*'])
@@ -128,6 +134,22 @@ def create_app(config_name=None):
     app.register_blueprint(search_history_bp, url_prefix='/api/v1/search-history')
     app.register_blueprint(admin_bp, url_prefix='/api/v1/admin')
     
+    # Background writer for analytics-grade rows (search history, checks, logins)
+    from app.services.write_behind import write_behind
+    write_behind.init_app(app)
+    
+    # Per-worker cache of revoked token JTIs (checked on every authenticated request)
+    from app.services.revocation_cache import revocation_cache
+    revocation_cache.init_app(app)
+    
+    # Per-worker cache of authenticated users' auth fields
+    from app.services.principal_cache import principal_cache
+    principal_cache.init_app(app)
+    
+    # CLI maintenance commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Root endpoint
     @app.route('/')
     def home():
@@ -0,0 +1,285 @@
+"""
+CLI Commands
+Maintenance commands registered on the Flask CLI (run with: flask <group> <command>)
+"""
+
+import click
+from flask.cli import AppGroup
+
+
+off_index_cli = AppGroup('off-index', help='Local Open Food Facts product index')
+
+
+@off_index_cli.command('load')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=1000, show_default=True, help='Products per transaction')
+def load_off_index(path, batch_size):
+    """Stream an OFF JSONL/CSV export (optionally .gz) into the local index"""
+    from app.services.off_index_service import ingest_dump
+
+    def progress(stats):
+        click.echo(f"  read {stats['read']:,} / indexed {stats['indexed']:,} / skipped {stats['skipped']:,}")
+
+    click.echo(f"Loading Open Food Facts dump from {path}...")
+    stats = ingest_dump(path, batch_size=batch_size, progress=progress)
+    click.echo(f"Done: {stats['indexed']:,} products indexed, {stats['skipped']:,} skipped")
+
+
+@off_index_cli.command('stats')
+def off_index_stats():
+    """Show local index size"""
+    from app.services.off_index_service import index_stats
+
+    stats = index_stats()
+    click.echo(f"Products: {stats['products']:,}")
+    click.echo(f"Tokens:   {stats['tokens']:,}")
+    click.echo(f"Enabled:  {stats['enabled']}")
+
+
+rollups_cli = AppGroup('rollups', help='Daily nutrition rollup maintenance')
+
+
+@rollups_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user')
+def rebuild_rollups(user_id):
+    """Recompute daily nutrition rollups from food_logs"""
+    from app.models.nutrition_rollup import DailyNutritionRollup
+
+    scope = f"user {user_id}" if user_id is not None else "all users"
+    click.echo(f"Rebuilding daily nutrition rollups for {scope}...")
+    count = DailyNutritionRollup.rebuild(user_id=user_id)
+    click.echo(f"Done: {count:,} rollup rows")
+
+
+@rollups_cli.command('check')
+@click.option('--user-id', type=int, default=None, help='Only check this user')
+@click.option('--fix', is_flag=True, help='Rebuild rollups if mismatches are found')
+def check_rollups(user_id, fix):
+    """Compare daily nutrition rollups against food_logs"""
+    from app.models.nutrition_rollup import DailyNutritionRollup
+
+    mismatches = DailyNutritionRollup.find_mismatches(user_id=user_id)
+    if not mismatches:
+        click.echo("Rollups are consistent")
+        return
+
+    for m in mismatches[:50]:
+        click.echo(f"  user {m['user_id']} {m['date']} {m['field']}: "
+                   f"expected {m['expected']}, found {m['actual']}")
+    if len(mismatches) > 50:
+        click.echo(f"  ... and {len(mismatches) - 50:,} more")
+
+    if fix:
+        count = DailyNutritionRollup.rebuild(user_id=user_id)
+        click.echo(f"Rebuilt {count:,} rollup rows")
+    else:
+        raise click.ClickException(f"{len(mismatches):,} mismatches found (rerun with --fix to rebuild)")
+
+
+food_logs_cli = AppGroup('food-logs', help='Food diary maintenance')
+
+
+@food_logs_cli.command('rescreen')
+@click.option('--user-id', type=int, default=None, help='Only rescreen this user')
+def rescreen_food_logs(user_id):
+    """Store fresh interaction flags on logs screened against an older medication list"""
+    from app.services.food_log_service import rescreen
+
+    count = rescreen(user_id=user_id)
+    click.echo(f"Rescreened {count:,} food logs")
+
+
+reminders_cli = AppGroup('reminders', help='Medication reminder scheduling')
+
+
+@reminders_cli.command('dispatch')
+@click.option('--limit', default=500, show_default=True, help='Max reminders per run')
+def dispatch_reminders(limit):
+    """Deliver due reminders and schedule their next occurrence"""
+    from app.services.reminder_service import dispatch_due_reminders
+
+    dispatched = dispatch_due_reminders(limit=limit)
+    click.echo(f"Dispatched {len(dispatched):,} reminders")
+
+
+@reminders_cli.command('backfill')
+def backfill_reminders():
+    """Compute next_fire_at for reminders created before it was tracked"""
+    from app.services.reminder_service import backfill_schedules
+
+    count = backfill_schedules()
+    click.echo(f"Scheduled {count:,} reminders")
+
+
+interaction_stats_cli = AppGroup('interaction-stats', help='Interaction history counters')
+
+
+@interaction_stats_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user')
+def rebuild_interaction_stats(user_id):
+    """Recompute interaction history counters from interaction_checks"""
+    from app import db
+    from app.models.medication import InteractionCheck
+    from app.models.interaction_stats import InteractionStats
+
+    fixed = InteractionCheck.backfill_max_severity()
+    if fixed:
+        click.echo(f"Backfilled max_severity on {fixed:,} checks")
+
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        from app.models.archive import InteractionCheckMonthly
+        user_ids = sorted(
+            {uid for (uid,) in db.session.query(InteractionCheck.user_id).distinct()}
+            | {uid for (uid,) in db.session.query(InteractionCheckMonthly.user_id).distinct()}
+        )
+        InteractionStats.query.filter(InteractionStats.user_id.notin_(user_ids)).delete()
+
+    for uid in user_ids:
+        InteractionStats.rebuild(uid)
+    click.echo(f"Rebuilt interaction stats for {len(user_ids):,} users")
+
+
+exports_cli = AppGroup('exports', help='Background data export jobs')
+
+
+@exports_cli.command('purge')
+def purge_exports():
+    """Fail interrupted export jobs, then delete expired jobs and their files"""
+    from app.services.export_service import fail_stale_jobs, purge_expired_jobs
+
+    failed = fail_stale_jobs()
+    if failed:
+        click.echo(f"Marked {failed:,} interrupted export jobs failed")
+    purged = purge_expired_jobs()
+    click.echo(f"Purged {purged:,} expired export jobs")
+
+
+tokens_cli = AppGroup('tokens', help='Revoked token maintenance')
+
+
+@tokens_cli.command('purge')
+def purge_tokens():
+    """Delete expired entries from token_blacklist (schedule with cron)"""
+    from app.models.token_blacklist import TokenBlacklist
+
+    removed = TokenBlacklist.cleanup_expired()
+    click.echo(f"Purged {removed:,} expired blacklist entries")
+
+
+platform_stats_cli = AppGroup('platform-stats', help='Admin dashboard counters')
+
+
+@platform_stats_cli.command('rebuild')
+def rebuild_platform_stats():
+    """Recompute platform counters and top drug/food counts from the tables"""
+    from app.models.platform_stats import PlatformCounter
+
+    keys = PlatformCounter.rebuild()
+    click.echo(f"Rebuilt platform counters ({keys:,} drug/food counts)")
+
+
+@platform_stats_cli.command('check')
+@click.option('--fix', is_flag=True, help='Rebuild the counters if mismatches are found')
+def check_platform_stats(fix):
+    """Compare platform counters against full table counts"""
+    from app.models.platform_stats import PlatformCounter
+
+    mismatches = PlatformCounter.find_mismatches()
+    if not mismatches:
+        click.echo("Platform counters are consistent")
+        return
+
+    for m in mismatches[:50]:
+        click.echo(f"  {m['counter']}: expected {m['expected']}, found {m['actual']}")
+    if len(mismatches) > 50:
+        click.echo(f"  ... and {len(mismatches) - 50:,} more")
+
+    if fix:
+        PlatformCounter.rebuild()
+        click.echo("Rebuilt platform counters")
+    else:
+        raise click.ClickException(f"{len(mismatches):,} mismatches found (rerun with --fix to rebuild)")
+
+
+retention_cli = AppGroup('retention', help='Archive old search history and interaction checks')
+
+
+@retention_cli.command('run')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['search_history', 'interaction_checks']),
+              help='Only this table (repeatable)')
+@click.option('--dry-run', is_flag=True, help='Count rows past the retention horizon without archiving')
+def run_retention(tables, dry_run):
+    """Archive and delete rows older than each table's retention horizon (schedule with cron)"""
+    from app.services.retention_service import run_retention as apply_retention
+
+    for stats in apply_retention(list(tables) or None, dry_run=dry_run):
+        if stats["cutoff"] is None:
+            click.echo(f"{stats['table']}: retention disabled")
+            continue
+        verb = "would archive" if dry_run else "archived"
+        click.echo(f"{stats['table']}: {verb} {stats['archived']:,} rows older than {stats['cutoff']}")
+        for name in stats["partitions_dropped"]:
+            click.echo(f"  dropped partition {name}")
+
+
+@retention_cli.command('partitions')
+@click.option('--months-ahead', default=3, show_default=True, help='Future months to create partitions for')
+@click.option('--print-ddl', 'first_month', default=None, metavar='YYYY-MM',
+              help='Print SQL to convert the tables to monthly partitions starting at this month')
+def manage_partitions(months_ahead, first_month):
+    """Create upcoming monthly partitions (PostgreSQL tables partitioned by month)"""
+    from datetime import datetime
+    from app.services.retention_service import RETENTION_TABLES, ensure_partitions, partitioning_ddl, is_partitioned
+
+    for table in RETENTION_TABLES:
+        if first_month:
+            start = datetime.strptime(first_month, '%Y-%m').date()
+            click.echo(f"-- {table}")
+            for statement in partitioning_ddl(table, start, months_ahead):
+                click.echo(f"{statement};")
+        elif not is_partitioned(table):
+            click.echo(f"{table}: not partitioned (see --print-ddl)")
+        else:
+            created = ensure_partitions(table, months_ahead)
+            click.echo(f"{table}: created {len(created)} partitions")
+
+
+replicas_cli = AppGroup('replicas', help='Read replica health')
+
+
+@replicas_cli.command('status')
+def replica_status():
+    """Probe each replica in DATABASE_READ_URLS and show its lag"""
+    from app.db_routing import replica_set
+
+    replicas = replica_set()
+    if replicas is None:
+        click.echo("No read replicas configured (DATABASE_READ_URLS)")
+        return
+
+    unhealthy = 0
+    for url, status in replicas.check().items():
+        name = url.split('@')[-1]  # hide credentials
+        if status["error"]:
+            click.echo(f"  {name}: unreachable ({status['error']})")
+        else:
+            click.echo(f"  {name}: lag {status['lag']:.1f}s{'' if status['healthy'] else ' (over limit)'}")
+        unhealthy += not status["healthy"]
+    if unhealthy:
+        raise click.ClickException(f"{unhealthy} of {len(replicas.urls)} replicas are not serving reads")
+
+
+def register_commands(app):
+    """Register CLI command groups on the app"""
+    app.cli.add_command(off_index_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(food_logs_cli)
+    app.cli.add_command(reminders_cli)
+    app.cli.add_command(interaction_stats_cli)
+    app.cli.add_command(exports_cli)
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(retention_cli)
+    app.cli.add_command(platform_stats_cli)
+    app.cli.add_command(replicas_cli)
@@ -30,17 +30,117 @@ class Config:
     
     # Database
     SQLALCHEMY_DATABASE_URI = get_database_url()
+    # Read replicas (comma-separated URLs): SELECTs in @read_replica routes go to
+    # a replica unless it lags more than DATABASE_REPLICA_MAX_LAG_SECONDS or the
+    # user wrote within DATABASE_READ_YOUR_WRITES_SECONDS (app/db_routing.py)
+    DATABASE_READ_URLS = [url.strip() for url in os.getenv('DATABASE_READ_URLS', '').split(',') if url.strip()]
+    DATABASE_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DATABASE_REPLICA_MAX_LAG_SECONDS', 5))
+    DATABASE_REPLICA_CHECK_SECONDS = float(os.getenv('DATABASE_REPLICA_CHECK_SECONDS', 10))
+    DATABASE_READ_YOUR_WRITES_SECONDS = float(os.getenv('DATABASE_READ_YOUR_WRITES_SECONDS', 10))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_pre_ping": True,  # Verify connections before using
         "pool_recycle": 300,    # Recycle connections every 5 min
     }
     
+    # SQLite file databases: pragmas run on every new connection (app/sqlite_profile.py)
+    # cache_size < 0 is in KiB; mmap_size is in bytes (0 disables memory-mapped I/O)
+    SQLITE_PROFILE_ENABLED = os.getenv('SQLITE_PROFILE_ENABLED', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -65536))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_TEMP_STORE = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+    
     # External APIs
     USDA_API_KEY = os.getenv('USDA_API_KEY', '')
     OPENFDA_BASE_URL = 'https://api.fda.gov/drug'
     USDA_BASE_URL = 'https://api.nal.usda.gov/fdc/v1'
     
+    # Open Food Facts barcode cache (seconds)
+    OFF_CACHE_TTL = int(os.getenv('OFF_CACHE_TTL', 7 * 86400))
+    OFF_NEGATIVE_CACHE_TTL = int(os.getenv('OFF_NEGATIVE_CACHE_TTL', 86400))
+    
+    # Batch barcode lookups
+    OFF_BATCH_MAX_BARCODES = int(os.getenv('OFF_BATCH_MAX_BARCODES', 100))
+    OFF_BATCH_MAX_WORKERS = int(os.getenv('OFF_BATCH_MAX_WORKERS', 8))
+    
+    # Serve packaged-food search and barcode lookups from the local dump index
+    # (load it with: flask off-index load <dump.jsonl|dump.csv>)
+    OFF_LOCAL_INDEX = os.getenv('OFF_LOCAL_INDEX', 'false').lower() == 'true'
+    
+    # Unified food search: single deadline across sources (seconds) and the
+    # per-worker thread pool that fans out to them
+    UNIFIED_SEARCH_DEADLINE = float(os.getenv('UNIFIED_SEARCH_DEADLINE', 4.0))
+    UNIFIED_SEARCH_MAX_WORKERS = int(os.getenv('UNIFIED_SEARCH_MAX_WORKERS', 16))
+    UNIFIED_SEARCH_CACHE_TTL = int(os.getenv('UNIFIED_SEARCH_CACHE_TTL', 300))
+    
+    # Successful OpenFDA / USDA / Open Food Facts search responses are kept per
+    # worker for LOOKUP_CACHE_TTL seconds. Conditional GET: public lookups send
+    # Cache-Control max-age LOOKUP_MAX_AGE, interaction data INTERACTIONS_MAX_AGE,
+    # per-user responses USER_DATA_MAX_AGE (private; 0 = revalidate every time)
+    LOOKUP_CACHE_TTL = int(os.getenv('LOOKUP_CACHE_TTL', 300))
+    LOOKUP_MAX_AGE = int(os.getenv('LOOKUP_MAX_AGE', 300))
+    INTERACTIONS_MAX_AGE = int(os.getenv('INTERACTIONS_MAX_AGE', 600))
+    USER_DATA_MAX_AGE = int(os.getenv('USER_DATA_MAX_AGE', 0))
+    
+    # Data exports: rows fetched per server-side cursor batch, and background
+    # export files (defaults to <instance>/exports) kept for EXPORT_JOB_TTL seconds.
+    # Jobs still pending/running after EXPORT_JOB_STALE_SECONDS that no worker
+    # is running (e.g. lost in a restart) are marked failed.
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 500))
+    EXPORT_DIR = os.getenv('EXPORT_DIR', '')
+    EXPORT_JOB_TTL = int(os.getenv('EXPORT_JOB_TTL', 24 * 3600))
+    EXPORT_JOB_STALE_SECONDS = int(os.getenv('EXPORT_JOB_STALE_SECONDS', 3600))
+    EXPORT_JOBS_ASYNC = True
+    
+    # Write-behind queue for search history, interaction checks and last-login
+    # updates: flushed every WRITE_BEHIND_FLUSH_MS or WRITE_BEHIND_BATCH_SIZE rows;
+    # when full, writers wait up to WRITE_BEHIND_PUT_TIMEOUT_MS, then the write is dropped
+    WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND_ENABLED', 'true').lower() == 'true'
+    WRITE_BEHIND_MAX_QUEUE = int(os.getenv('WRITE_BEHIND_MAX_QUEUE', 10000))
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 200))
+    WRITE_BEHIND_FLUSH_MS = int(os.getenv('WRITE_BEHIND_FLUSH_MS', 250))
+    WRITE_BEHIND_PUT_TIMEOUT_MS = int(os.getenv('WRITE_BEHIND_PUT_TIMEOUT_MS', 10))
+    
+    # Revoked-token cache: each worker re-reads new token_blacklist rows at most
+    # every REVOCATION_REFRESH_SECONDS (revocations made by the worker apply at once)
+    REVOCATION_REFRESH_SECONDS = float(os.getenv('REVOCATION_REFRESH_SECONDS', 5))
+    REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', 100000))
+    
+    # Authenticated principal cache (auth fields per user_id); entries are dropped
+    # when the user changes in this worker, and changes made by other workers are
+    # found from users.updated_at every PRINCIPAL_CACHE_REFRESH_SECONDS
+    PRINCIPAL_CACHE_TTL = float(os.getenv('PRINCIPAL_CACHE_TTL', 30))
+    PRINCIPAL_CACHE_REFRESH_SECONDS = float(os.getenv('PRINCIPAL_CACHE_REFRESH_SECONDS', 5))
+    PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', 10000))
+    
+    # Password hashing: werkzeug method string (algorithm and cost; empty = the
+    # installed werkzeug's pbkdf2:sha256 default, 600000 iterations on 3.0.1),
+    # run on a process pool of PASSWORD_HASH_WORKERS (0 = inline) with at most
+    # PASSWORD_HASH_QUEUE extra operations waiting before requests get a 503
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', '')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    
+    # Medications per /medications/import request
+    MEDICATION_IMPORT_MAX = int(os.getenv('MEDICATION_IMPORT_MAX', 500))
+    
+    # Entries per /food-diary/import request (JSON array or CSV upload)
+    FOOD_LOG_IMPORT_MAX = int(os.getenv('FOOD_LOG_IMPORT_MAX', 5000))
+    
+    # Retention (flask retention run): rows older than these many days (0 = keep
+    # forever) move to monthly rollups plus gzipped NDJSON files in
+    # RETENTION_ARCHIVE_DIR (default: instance/archive), deleted
+    # RETENTION_CHUNK_SIZE rows per transaction
+    RETENTION_SEARCH_HISTORY_DAYS = int(os.getenv('RETENTION_SEARCH_HISTORY_DAYS', 180))
+    RETENTION_INTERACTION_CHECKS_DAYS = int(os.getenv('RETENTION_INTERACTION_CHECKS_DAYS', 365))
+    RETENTION_CHUNK_SIZE = int(os.getenv('RETENTION_CHUNK_SIZE', 1000))
+    RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR')
+    RETENTION_ARCHIVE_FILES = os.getenv('RETENTION_ARCHIVE_FILES', 'true').lower() == 'true'
+    
     # CORS - Frontend URLs allowed to access the API
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173,http://localhost:3000').split(',')
     
@@ -79,6 +179,13 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_medible.db'
     RATELIMIT_ENABLED = False
+    EXPORT_JOBS_ASYNC = False  # run export jobs inline so tests see the result
+    WRITE_BEHIND_ENABLED = False  # write synchronously so tests see rows immediately
+    REVOCATION_REFRESH_SECONDS = 0  # see token_blacklist changes on every check
+    PRINCIPAL_CACHE_TTL = 0  # user ids are reused across tests
+    LOOKUP_CACHE_TTL = 0  # upstream mocks differ per test
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # cheap hashes keep the suite fast
+    PASSWORD_HASH_WORKERS = 0
 
 
 # Config dictionary
@@ -0,0 +1,212 @@
+"""
+Read Replica Routing
+Session that sends SELECTs from read-only code (routes decorated with
+@read_replica, or code inside replica_reads()) to a read replica listed in
+DATABASE_READ_URLS, and everything else to the primary. Reads stay on the
+primary once the session has written, for a user's read-your-own-writes
+window after they commit a write, and whenever no replica is healthy:
+replicas are probed every DATABASE_REPLICA_CHECK_SECONDS and skipped while
+unreachable or lagging more than DATABASE_REPLICA_MAX_LAG_SECONDS.
+The read-your-own-writes window is per worker; a user's next request on
+another worker is only covered by the lag bound.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+
+from app.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_replica_scope: ContextVar[bool] = ContextVar('replica_scope', default=False)
+
+# user id -> time of their last committed write (per worker)
+_recent_writers = TTLCache(maxsize=10000, ttl=10)
+
+_WROTE = 'db_routing_wrote'
+
+
+def read_replica(f):
+    """Decorator: let a read-only route's SELECTs go to a replica"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with replica_reads():
+            return f(*args, **kwargs)
+    return decorated
+
+
+@contextmanager
+def replica_reads():
+    """Let SELECTs inside the block go to a replica (for functions and CLI code)"""
+    token = _replica_scope.set(True)
+    try:
+        yield
+    finally:
+        _replica_scope.reset(token)
+
+
+def _normalize_url(app, url: str) -> str:
+    """Same fix-ups as the primary URL: postgres:// scheme, relative SQLite paths in instance/"""
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    parsed = sa.engine.make_url(url)
+    if parsed.drivername.startswith('sqlite') and parsed.database not in (None, '', ':memory:') \
+            and not os.path.isabs(parsed.database):
+        parsed = parsed.set(database=os.path.join(app.instance_path, parsed.database))
+    return parsed.render_as_string(hide_password=False)
+
+
+def replica_lag(engine) -> float:
+    """
+    Seconds the replica is behind the primary
+    PostgreSQL standbys report their last replayed transaction; a standby
+    that has replayed everything it received counts as current even when the
+    primary has been idle. Other databases are only checked for being
+    reachable and report 0.
+    """
+    with engine.connect() as connection:
+        if engine.dialect.name != 'postgresql':
+            connection.exec_driver_sql("SELECT 1")
+            return 0.0
+        lag = connection.exec_driver_sql(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() "
+            "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        ).scalar()
+    return float(lag or 0)
+
+
+class ReplicaSet:
+    """A worker's replica engines with their last health check"""
+
+    def __init__(self, app, urls: tuple):
+        from app import sqlite_profile
+
+        self.urls = urls
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        self.engines = [sa.create_engine(_normalize_url(app, url), **options) for url in urls]
+        sqlite_profile.init_app(app, self.engines)
+        self.max_lag = float(app.config.get('DATABASE_REPLICA_MAX_LAG_SECONDS', 5))
+        self.check_interval = float(app.config.get('DATABASE_REPLICA_CHECK_SECONDS', 10))
+        self._healthy = list(self.engines)
+        self._status = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._next = itertools.count()
+
+    def check(self) -> dict:
+        """Probe every replica's lag; returns {url: {"healthy", "lag", "error"}}"""
+        healthy, status = [], {}
+        for url, engine in zip(self.urls, self.engines):
+            try:
+                lag = replica_lag(engine)
+                ok = lag <= self.max_lag
+                status[url] = {"healthy": ok, "lag": lag, "error": None}
+            except sa.exc.SQLAlchemyError as e:
+                ok = False
+                status[url] = {"healthy": False, "lag": None, "error": str(e.__cause__ or e)}
+            if ok:
+                healthy.append(engine)
+            else:
+                logger.warning(f"Read replica {engine.url.render_as_string()} skipped: {status[url]}")
+        self._healthy, self._status = healthy, status
+        self._checked_at = time.monotonic()
+        return status
+
+    def pick(self) -> Optional[sa.engine.Engine]:
+        """A healthy replica (round robin), or None to read from the primary"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    self.check()
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+
+def replica_set(app=None) -> Optional[ReplicaSet]:
+    """The app's replicas, created on first use (None when DATABASE_READ_URLS is empty)"""
+    app = app or current_app._get_current_object()
+    urls = tuple(app.config.get('DATABASE_READ_URLS') or ())
+    replicas = app.extensions.get('db_replicas')
+    if replicas is not None and replicas.urls != urls:
+        replicas.dispose()
+        replicas = None
+    if replicas is None and urls:
+        replicas = ReplicaSet(app, urls)
+    app.extensions['db_replicas'] = replicas
+    return replicas
+
+
+def _current_user_id() -> Optional[int]:
+    if not has_request_context():
+        return None
+    user = getattr(g, 'current_user', None)
+    return getattr(user, 'id', None) if user else None
+
+
+def record_write(user_id: Optional[int]):
+    """Start a user's read-your-own-writes window (their reads go to the primary)"""
+    if user_id is None or not has_app_context():
+        return
+    window = float(current_app.config.get('DATABASE_READ_YOUR_WRITES_SECONDS', 10))
+    if window > 0:
+        _recent_writers.set(user_id, time.time(), ttl=window)
+
+
+def has_written(session) -> bool:
+    """Whether the session's transaction holds flushed or pending writes"""
+    return bool(session.info.get(_WROTE) or session.new or session.dirty or session.deleted)
+
+
+def _is_replica_read(session, clause) -> bool:
+    if not _replica_scope.get() or session.info.get(_WROTE):
+        return False
+    if not isinstance(clause, sa.Select) or clause._for_update_arg is not None:
+        return False
+    user_id = _current_user_id()
+    return user_id is None or _recent_writers.get(user_id) is None
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that can send read-only SELECTs to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and _is_replica_read(self, clause):
+            replicas = replica_set()
+            engine = replicas.pick() if replicas else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@sa.event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info[_WROTE] = True
+
+
+@sa.event.listens_for(RoutingSession, 'after_commit')
+def _start_write_window(session):
+    if session.info.pop(_WROTE, False):
+        record_write(_current_user_id())
+
+
+@sa.event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop(_WROTE, None)
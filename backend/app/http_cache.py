@@ -0,0 +1,93 @@
+"""
+Conditional GET
+Weak ETags and Cache-Control for read-mostly endpoints. A view registers a
+validator (the interaction engine's snapshot version, when an upstream
+lookup was cached, a user's updated_at) once its parameters are parsed;
+a request whose If-None-Match already holds the ETag gets a 304 before the
+view runs the engine or calls upstream. 200 responses carry the ETag and
+a Cache-Control policy that a proxy or CDN in front can honor.
+"""
+
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import current_app, g, make_response, request
+
+
+class _NotModified(Exception):
+    def __init__(self, etag: str):
+        super().__init__(etag)
+        self.etag = etag
+
+
+def _etag(parts: tuple) -> str:
+    """Opaque tag for this URL (path and query args) plus the validator values"""
+    key = (request.path, sorted(request.args.items(multi=True)), parts)
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:32]
+
+
+def _cache_headers(response, max_age_setting: str, public: bool):
+    response.cache_control.public = public
+    response.cache_control.private = not public
+    response.cache_control.max_age = int(current_app.config.get(max_age_setting, 0))
+    if not public:
+        response.vary.add('Authorization')
+    return response
+
+
+def conditional(max_age_setting: str, public: bool = True):
+    """
+    Decorator (below @handle_exceptions): answer If-None-Match from the view's
+    validator and tag successful responses
+    max_age_setting: config key holding the Cache-Control max-age in seconds
+    public: shared caches may store it (False for per-user data)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            g.http_validator = None
+            g.http_no_store = False
+            try:
+                response = make_response(f(*args, **kwargs))
+            except _NotModified as e:
+                response = make_response('', 304)
+                response.set_etag(e.etag, weak=True)
+                return _cache_headers(response, max_age_setting, public)
+
+            if response.status_code != 200:
+                return response
+            if g.http_no_store:
+                response.cache_control.no_store = True
+                return response
+            parts = g.http_validator() if g.http_validator else None
+            if parts is not None:
+                response.set_etag(_etag(parts), weak=True)
+            return _cache_headers(response, max_age_setting, public)
+        return decorated
+    return decorator
+
+
+def validate(validator: Callable[[], Optional[tuple]]):
+    """
+    Register the view's validator and return 304 early when it matches
+    validator() returns the values the response depends on besides the URL,
+    or None when they cannot be known without doing the work. It is called
+    again after the view to tag the response.
+    """
+    g.http_validator = validator
+    parts = validator()
+    if parts is not None and request.if_none_match:
+        etag = _etag(parts)
+        if request.if_none_match.contains_weak(etag):
+            raise _NotModified(etag)
+
+
+def stamp(*values) -> Optional[tuple]:
+    """Validator values, or None (cannot validate yet) when any of them is unknown"""
+    return None if any(value is None for value in values) else values
+
+
+def no_store():
+    """Keep this response out of caches (e.g. built around a failed upstream call)"""
+    g.http_no_store = True
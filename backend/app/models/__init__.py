@@ -7,8 +7,18 @@ from app.models.user import User
 from app.models.medication import UserMedication, SearchHistory, FoodLog, InteractionCheck
 from app.models.token_blacklist import TokenBlacklist
 from app.models.favorites import FavoriteFood, MedicationReminder, InteractionReport
+from app.models.product_cache import ProductCache
+from app.models.product_index import LocalProduct, LocalProductToken
+from app.models.nutrition_rollup import DailyNutritionRollup
+from app.models.interaction_stats import InteractionStats, InteractionFoodCount
+from app.models.export_job import ExportJob
+from app.models.archive import SearchHistoryMonthly, InteractionCheckMonthly
+from app.models.platform_stats import PlatformCounter, PlatformTopCount
 
 __all__ = [
     'User', 'UserMedication', 'SearchHistory', 'FoodLog', 'InteractionCheck',
-    'TokenBlacklist', 'FavoriteFood', 'MedicationReminder', 'InteractionReport'
+    'TokenBlacklist', 'FavoriteFood', 'MedicationReminder', 'InteractionReport',
+    'ProductCache', 'LocalProduct', 'LocalProductToken', 'DailyNutritionRollup',
+    'InteractionStats', 'InteractionFoodCount', 'ExportJob',
+    'SearchHistoryMonthly', 'InteractionCheckMonthly', 'PlatformCounter', 'PlatformTopCount'
 ]
\ No newline at end of file
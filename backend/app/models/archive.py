@@ -0,0 +1,97 @@
+"""
+Archive Rollup Models
+Monthly counts kept for search_history and interaction_checks rows that the
+retention job has moved out of the live tables, so analytics and per-user
+stats still include them
+"""
+
+from datetime import date
+from sqlalchemy import update, insert
+from app import db
+
+
+def month_start(value) -> date:
+    """First day of the month a date/datetime falls in"""
+    return date(value.year, value.month, 1)
+
+
+class SearchHistoryMonthly(db.Model):
+    """Archived searches per month, type and term"""
+
+    __tablename__ = 'search_history_monthly'
+
+    month = db.Column(db.Date, primary_key=True)
+    search_type = db.Column(db.String(20), primary_key=True)
+    search_term = db.Column(db.String(255), primary_key=True)
+    search_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_search_history_monthly_type_term', 'search_type', 'search_term'),
+    )
+
+    @staticmethod
+    def key(row) -> tuple:
+        return (month_start(row.searched_at), row.search_type, (row.search_term or '')[:255])
+
+    @staticmethod
+    def apply(connection, counts: dict):
+        """Add {(month, search_type, search_term): n} on the caller's connection"""
+        _upsert_counts(connection, SearchHistoryMonthly, SearchHistoryMonthly.search_count,
+                       ('month', 'search_type', 'search_term'), counts)
+
+    @staticmethod
+    def total() -> int:
+        return db.session.query(db.func.coalesce(db.func.sum(SearchHistoryMonthly.search_count), 0)).scalar()
+
+    def __repr__(self):
+        return f'<SearchHistoryMonthly {self.month} {self.search_term} x{self.search_count}>'
+
+
+class InteractionCheckMonthly(db.Model):
+    """Archived interaction checks per user, month, severity bucket and food"""
+
+    __tablename__ = 'interaction_check_monthly'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    severity = db.Column(db.String(10), primary_key=True)  # high, medium, low, none
+    food_key = db.Column(db.String(255), primary_key=True)  # lower(food_name)
+    check_count = db.Column(db.Integer, default=0, nullable=False)
+
+    @staticmethod
+    def key(row) -> tuple:
+        from app.models.medication import InteractionCheck
+        return (
+            row.user_id,
+            month_start(row.checked_at),
+            InteractionCheck.severity_bucket(row.max_severity),
+            (row.food_name or '').lower()[:255]
+        )
+
+    @staticmethod
+    def apply(connection, counts: dict):
+        """Add {(user_id, month, severity, food_key): n} on the caller's connection"""
+        _upsert_counts(connection, InteractionCheckMonthly, InteractionCheckMonthly.check_count,
+                       ('user_id', 'month', 'severity', 'food_key'), counts)
+
+    @staticmethod
+    def total() -> int:
+        return db.session.query(db.func.coalesce(db.func.sum(InteractionCheckMonthly.check_count), 0)).scalar()
+
+    def __repr__(self):
+        return f'<InteractionCheckMonthly user={self.user_id} {self.month} {self.food_key} x{self.check_count}>'
+
+
+def _upsert_counts(connection, model, count_column, key_columns: tuple, counts: dict):
+    """Increment existing rows, insert the rest (runs inside the caller's transaction)"""
+    for key, count in counts.items():
+        if not count:
+            continue
+        condition = [getattr(model, column) == value for column, value in zip(key_columns, key)]
+        result = connection.execute(
+            update(model).where(*condition).values({count_column.key: count_column + count})
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(model).values(
+                **dict(zip(key_columns, key)), **{count_column.key: count}
+            ))
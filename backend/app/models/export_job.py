@@ -0,0 +1,78 @@
+"""
+Export Job Model
+Tracks background data exports written to compressed files for later download
+"""
+
+import uuid
+from datetime import datetime, timezone, timedelta
+from app import db
+
+
+class ExportJob(db.Model):
+    """A user's background data export"""
+
+    __tablename__ = 'export_jobs'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, complete, failed
+    format = db.Column(db.String(10), nullable=False, default='ndjson')
+    file_path = db.Column(db.String(500), nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=True)
+    record_count = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "size_bytes": self.size_bytes,
+            "record_count": self.record_count,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None
+        }
+
+    @property
+    def is_expired(self) -> bool:
+        if not self.expires_at:
+            return False
+        expires_at = self.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at <= datetime.now(timezone.utc)
+
+    @staticmethod
+    def get_for_user(job_id: str, user_id: int) -> 'ExportJob':
+        return ExportJob.query.filter_by(id=job_id, user_id=user_id).first()
+
+    @staticmethod
+    def get_expired(now: datetime = None):
+        """Completed or failed jobs past their expiry"""
+        now = now or datetime.now(timezone.utc)
+        return ExportJob.query.filter(ExportJob.expires_at <= now).all()
+
+    @staticmethod
+    def get_unfinished(created_before: datetime, job_id: str = None):
+        """Pending or running jobs created before a cutoff (optionally just one)"""
+        query = ExportJob.query.filter(
+            ExportJob.status.in_(('pending', 'running')),
+            ExportJob.created_at <= created_before
+        )
+        if job_id is not None:
+            query = query.filter(ExportJob.id == job_id)
+        return query.all()
+
+    def mark_finished(self, status: str, ttl: int, error: str = None):
+        self.status = status
+        self.error = error
+        self.completed_at = datetime.now(timezone.utc)
+        self.expires_at = self.completed_at + timedelta(seconds=ttl)
+
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.status}>'
@@ -4,9 +4,13 @@ Stores user favorites, medication reminders, and interaction reports
 """
 
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import joinedload
 from app import db
 
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
 
 class FavoriteFood(db.Model):
     """User's favorite foods for quick access"""
@@ -65,6 +69,8 @@ class MedicationReminder(db.Model):
     reminder_time = db.Column(db.String(5), nullable=False)  # HH:MM format
     days_of_week = db.Column(db.Text, nullable=False, default='["mon","tue","wed","thu","fri","sat","sun"]')
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # Next occurrence (UTC), derived from reminder_time/days_of_week; NULL when inactive
+    next_fire_at = db.Column(db.DateTime, nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
                            onupdate=lambda: datetime.now(timezone.utc), nullable=False)
@@ -72,13 +78,53 @@ class MedicationReminder(db.Model):
     # Relationships
     medication = db.relationship('UserMedication', backref=db.backref('reminders', lazy='dynamic'))
 
+    def get_days(self) -> list:
+        """Parsed days_of_week list"""
+        if not self.days_of_week:
+            return []
+        try:
+            return json.loads(self.days_of_week)
+        except (json.JSONDecodeError, TypeError):
+            return []
+
+    @staticmethod
+    def compute_next_fire_at(reminder_time: str, days: list, after: datetime = None):
+        """
+        Next occurrence of an HH:MM reminder on one of the given days, strictly after `after`
+        Times are treated as UTC; returns a naive UTC datetime, or None if no valid day/time
+        """
+        try:
+            hour, minute = (int(part) for part in reminder_time.split(':'))
+            weekdays = {WEEKDAYS.index(day) for day in days}
+        except (AttributeError, ValueError):
+            return None
+        if not weekdays or not (0 <= hour < 24 and 0 <= minute < 60):
+            return None
+
+        after = after or datetime.now(timezone.utc)
+        if after.tzinfo is not None:
+            after = after.astimezone(timezone.utc).replace(tzinfo=None)
+
+        for offset in range(8):
+            day = after.date() + timedelta(days=offset)
+            if day.weekday() not in weekdays:
+                continue
+            candidate = datetime(day.year, day.month, day.day, hour, minute)
+            if candidate > after:
+                return candidate
+        return None
+
+    def schedule_next(self, after: datetime = None):
+        """Recompute next_fire_at from the schedule"""
+        if not self.is_active:
+            self.next_fire_at = None
+        else:
+            self.next_fire_at = MedicationReminder.compute_next_fire_at(
+                self.reminder_time, self.get_days(), after
+            )
+
     def to_dict(self) -> dict:
-        days = []
-        if self.days_of_week:
-            try:
-                days = json.loads(self.days_of_week)
-            except (json.JSONDecodeError, TypeError):
-                days = []
+        days = self.get_days()
 
         return {
             "id": self.id,
@@ -87,20 +133,53 @@ class MedicationReminder(db.Model):
             "reminder_time": self.reminder_time,
             "days_of_week": days,
             "is_active": self.is_active,
+            "next_fire_at": self.next_fire_at.isoformat() if self.next_fire_at else None,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
     @staticmethod
     def get_user_reminders(user_id: int, active_only: bool = False):
-        query = MedicationReminder.query.filter_by(user_id=user_id)
+        query = MedicationReminder.query.options(
+            joinedload(MedicationReminder.medication)
+        ).filter_by(user_id=user_id)
         if active_only:
             query = query.filter_by(is_active=True)
         return query.order_by(MedicationReminder.reminder_time).all()
 
+    @staticmethod
+    def get_due(now: datetime = None, limit: int = 500):
+        """Reminders whose next occurrence is at or before now (index range scan on next_fire_at)"""
+        now = now or datetime.now(timezone.utc)
+        if now.tzinfo is not None:
+            now = now.astimezone(timezone.utc).replace(tzinfo=None)
+        return MedicationReminder.query.options(
+            joinedload(MedicationReminder.medication)
+        ).filter(
+            MedicationReminder.next_fire_at <= now
+        ).order_by(MedicationReminder.next_fire_at, MedicationReminder.id).limit(limit).all()
+
     def __repr__(self):
         return f'<MedicationReminder {self.id} @ {self.reminder_time}>'
 
 
+_SCHEDULE_FIELDS = ('reminder_time', 'days_of_week', 'is_active')
+
+
+@event.listens_for(MedicationReminder, 'before_insert')
+def _schedule_new_reminder(mapper, connection, target):
+    if target.is_active is None:
+        target.is_active = True
+    if target.next_fire_at is None:
+        target.schedule_next()
+
+
+@event.listens_for(MedicationReminder, 'before_update')
+def _reschedule_changed_reminder(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _SCHEDULE_FIELDS):
+        target.schedule_next()
+
+
 class InteractionReport(db.Model):
     """User-submitted missing interaction reports"""
 
@@ -0,0 +1,237 @@
+"""
+Interaction Stats Models
+Per-user counters for interaction check history, kept in step with
+interaction_checks so /interaction-history/stats reads a handful of rows
+regardless of how many checks a user has saved
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import event, select, update, insert, delete, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.medication import InteractionCheck
+from app.models.user import User
+from app.models.archive import InteractionCheckMonthly
+from app.models.upsert import upsert
+
+
+SEVERITY_BUCKETS = ('high', 'medium', 'low', 'none')
+
+
+class InteractionStats(db.Model):
+    """Check totals and severity distribution for one user"""
+
+    __tablename__ = 'interaction_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    total_checks = db.Column(db.Integer, default=0, nullable=False)
+    high_count = db.Column(db.Integer, default=0, nullable=False)
+    medium_count = db.Column(db.Integer, default=0, nullable=False)
+    low_count = db.Column(db.Integer, default=0, nullable=False)
+    none_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    def severity_distribution(self) -> dict:
+        return {bucket: getattr(self, f'{bucket}_count') for bucket in SEVERITY_BUCKETS}
+
+    @staticmethod
+    def get_for_user(user_id: int, top_n: int = 10) -> dict:
+        """
+        Stats for a user from the counters (read-only)
+        Users without counters yet (checks saved before they existed and not
+        rebuilt since) get the same stats from grouped SQL; their row is built
+        on their next saved check or by `flask interaction-stats rebuild`.
+        Returns: {"total_checks", "severity_distribution", "top_checked_foods"}
+        """
+        stats = db.session.get(InteractionStats, user_id)
+        if stats is None:
+            computed = InteractionCheck.compute_stats(user_id, top_n=top_n)
+            return {
+                "total_checks": computed["total_checks"],
+                "severity_distribution": computed["severity_distribution"],
+                "top_checked_foods": [{"food": food, "count": count} for food, count in computed["food_counts"]]
+            }
+
+        top_foods = InteractionFoodCount.query.filter_by(user_id=user_id).order_by(
+            InteractionFoodCount.check_count.desc(), InteractionFoodCount.food_key
+        ).limit(top_n).all()
+
+        return {
+            "total_checks": stats.total_checks,
+            "severity_distribution": stats.severity_distribution(),
+            "top_checked_foods": [{"food": f.food_key, "count": f.check_count} for f in top_foods]
+        }
+
+    @staticmethod
+    def rebuild(user_id: int):
+        """Recompute a user's counters from interaction_checks"""
+        InteractionStats._build(db.session.connection(), user_id)
+        db.session.commit()
+
+    @staticmethod
+    def _build(connection, user_id: int):
+        """Write a user's counters from grouped SQL on the caller's connection"""
+        computed = InteractionCheck.compute_stats(user_id, top_n=None, connection=connection)
+        distribution = computed["severity_distribution"]
+        upsert(connection, InteractionStats, [{
+            "user_id": user_id,
+            "total_checks": computed["total_checks"],
+            **{f'{bucket}_count': distribution[bucket] for bucket in SEVERITY_BUCKETS},
+            "updated_at": datetime.now(timezone.utc)
+        }], keys=['user_id'], update=[
+            'total_checks', *(f'{bucket}_count' for bucket in SEVERITY_BUCKETS), 'updated_at'
+        ])
+        connection.execute(delete(InteractionFoodCount).where(InteractionFoodCount.user_id == user_id))
+        if computed["food_counts"]:
+            connection.execute(insert(InteractionFoodCount), [
+                {"user_id": user_id, "food_key": food, "check_count": count}
+                for food, count in computed["food_counts"]
+            ])
+
+    @staticmethod
+    def reset(user_id: int):
+        """Drop a user's counters (e.g. after a bulk delete of their checks)"""
+        InteractionFoodCount.query.filter_by(user_id=user_id).delete()
+        InteractionStats.query.filter_by(user_id=user_id).delete()
+
+    @staticmethod
+    def apply(connection, deltas: dict):
+        """
+        Apply counter changes on the caller's connection (same transaction)
+        deltas: {(user_id, severity_bucket, food_key): +n / -n}
+        Users without a stats row get theirs built from SQL instead (which
+        already includes these changes, since they are written on this
+        connection), holding a lock on the user's row so two first writes
+        do not both build it. Food counts are upserted.
+        """
+        user_ids = {user_id for (user_id, _, _), change in deltas.items() if user_id is not None and change}
+        if not user_ids:
+            return
+        tracked = set(connection.execute(
+            select(InteractionStats.user_id).where(InteractionStats.user_id.in_(user_ids))
+        ).scalars())
+        for user_id in sorted(user_ids - tracked):
+            locked = connection.execute(select(User.id).where(User.id == user_id).with_for_update()).first()
+            if locked is None:
+                continue  # user deleted in this transaction
+            if connection.execute(select(InteractionStats.user_id).where(InteractionStats.user_id == user_id)).first():
+                tracked.add(user_id)
+            else:
+                InteractionStats._build(connection, user_id)
+
+        now = datetime.now(timezone.utc)
+        by_user = {}
+        by_food = {}
+        for (user_id, bucket, food_key), change in deltas.items():
+            if user_id not in tracked or change == 0:
+                continue
+            user_changes = by_user.setdefault(user_id, dict.fromkeys(SEVERITY_BUCKETS, 0))
+            user_changes[bucket] += change
+            by_food[(user_id, food_key)] = by_food.get((user_id, food_key), 0) + change
+
+        for user_id, changes in by_user.items():
+            values = {
+                f'{bucket}_count': getattr(InteractionStats, f'{bucket}_count') + change
+                for bucket, change in changes.items() if change
+            }
+            connection.execute(
+                update(InteractionStats).where(InteractionStats.user_id == user_id).values(
+                    total_checks=InteractionStats.total_checks + sum(changes.values()),
+                    updated_at=now,
+                    **values
+                )
+            )
+
+        added = [
+            {"user_id": user_id, "food_key": food_key, "check_count": change}
+            for (user_id, food_key), change in sorted(by_food.items()) if change > 0
+        ]
+        upsert(connection, InteractionFoodCount, added, keys=['user_id', 'food_key'],
+               update=lambda table, excluded: {"check_count": table.check_count + excluded.check_count})
+
+        for (user_id, food_key), change in sorted(by_food.items()):
+            if change >= 0:
+                continue
+            match = (InteractionFoodCount.user_id == user_id, InteractionFoodCount.food_key == food_key)
+            connection.execute(update(InteractionFoodCount).where(*match).values(
+                check_count=InteractionFoodCount.check_count + change
+            ))
+            connection.execute(delete(InteractionFoodCount).where(*match, InteractionFoodCount.check_count <= 0))
+
+    def __repr__(self):
+        return f'<InteractionStats user={self.user_id} total={self.total_checks}>'
+
+
+class InteractionFoodCount(db.Model):
+    """How many times a user has checked a food (case-insensitive)"""
+
+    __tablename__ = 'interaction_food_counts'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    food_key = db.Column(db.String(255), primary_key=True)  # lower(food_name)
+    check_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_interaction_food_counts_user_count', 'user_id', 'check_count'),
+    )
+
+    def __repr__(self):
+        return f'<InteractionFoodCount {self.food_key} x{self.check_count}>'
+
+
+_PENDING_DELTAS = 'interaction_stats_deltas'
+
+
+def _check_key(check: InteractionCheck, committed: bool = False) -> tuple:
+    """(user_id, severity bucket, food key) for a check, optionally as loaded before changes"""
+    values = []
+    for attr in ('user_id', 'max_severity', 'food_name'):
+        value = getattr(check, attr)
+        if committed:
+            history = inspect(check).attrs[attr].history
+            if history.deleted:
+                value = history.deleted[0]
+        values.append(value)
+    user_id, max_severity, food_name = values
+    return (user_id, InteractionCheck.severity_bucket(max_severity), (food_name or '').lower()[:255])
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_stats_deltas(session, flush_context, instances):
+    """Record removals for deleted or edited checks while their old values are loaded"""
+    deltas = {}
+    for obj in session.deleted:
+        if isinstance(obj, InteractionCheck):
+            key = _check_key(obj, committed=True)
+            deltas[key] = deltas.get(key, 0) - 1
+    for obj in session.dirty:
+        if isinstance(obj, InteractionCheck) and session.is_modified(obj):
+            key = _check_key(obj, committed=True)
+            deltas[key] = deltas.get(key, 0) - 1
+    session.info[_PENDING_DELTAS] = deltas
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_stats_deltas(session, flush_context):
+    """Add new and edited checks, then apply all counter changes for this flush"""
+    deltas = session.info.pop(_PENDING_DELTAS, {})
+    for obj in session.new:
+        if isinstance(obj, InteractionCheck):
+            key = _check_key(obj)
+            deltas[key] = deltas.get(key, 0) + 1
+    for obj in session.dirty:
+        if isinstance(obj, InteractionCheck) and session.is_modified(obj):
+            key = _check_key(obj)
+            deltas[key] = deltas.get(key, 0) + 1
+    if deltas:
+        InteractionStats.apply(session.connection(), deltas)
+
+    deleted_user_ids = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if deleted_user_ids:
+        connection = session.connection()
+        connection.execute(delete(InteractionFoodCount).where(
+            InteractionFoodCount.user_id.in_(deleted_user_ids)))
+        connection.execute(delete(InteractionStats).where(
+            InteractionStats.user_id.in_(deleted_user_ids)))
+        connection.execute(delete(InteractionCheckMonthly).where(
+            InteractionCheckMonthly.user_id.in_(deleted_user_ids)))
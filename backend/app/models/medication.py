@@ -3,7 +3,9 @@ User Medication Model
 Stores user's saved medications for interaction checking
 """
 
-from datetime import datetime, timezone
+import hashlib
+import json
+from datetime import datetime, timezone, timedelta
 from app import db
 
 
@@ -13,7 +15,7 @@ class UserMedication(db.Model):
     __tablename__ = 'user_medications'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     
     # Drug identification
     drug_name = db.Column(db.String(255), nullable=False)
@@ -41,6 +43,7 @@ class UserMedication(db.Model):
     # Unique constraint
     __table_args__ = (
         db.UniqueConstraint('user_id', 'drug_name', name='unique_user_medication'),
+        db.Index('ix_user_medications_user_active_name', 'user_id', 'is_active', 'drug_name'),
     )
     
     def to_dict(self) -> dict:
@@ -70,6 +73,60 @@ class UserMedication(db.Model):
             query = query.filter_by(is_active=True)
         return query.order_by(UserMedication.drug_name).all()
     
+    @staticmethod
+    def data_stamp(user_id: int) -> tuple:
+        """(count, latest updated_at) of a user's medications; changes on any add, edit or delete"""
+        count, updated_at = db.session.query(
+            db.func.count(UserMedication.id), db.func.max(UserMedication.updated_at)
+        ).filter(UserMedication.user_id == user_id).one()
+        return count, updated_at
+    
+    @staticmethod
+    def existing_drug_names(user_id: int, drug_names: list) -> set:
+        """Which of these drug names the user already has, in one IN query"""
+        if not drug_names:
+            return set()
+        rows = db.session.query(UserMedication.drug_name).filter(
+            UserMedication.user_id == user_id,
+            UserMedication.drug_name.in_(drug_names)
+        )
+        return {name for (name,) in rows}
+    
+    @staticmethod
+    def bulk_insert(rows: list) -> list:
+        """
+        Insert many medications at once, skipping any that hit
+        unique_user_medication (e.g. added concurrently)
+        Returns: drug names actually inserted (not committed)
+        """
+        from app.models.platform_stats import PlatformCounter
+
+        if not rows:
+            return []
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy import insert
+            db.session.execute(insert(UserMedication), rows)
+            inserted = [row["drug_name"] for row in rows]
+            dialect_insert = None
+    
+        if dialect_insert is not None:
+            stmt = dialect_insert(UserMedication).on_conflict_do_nothing(
+                index_elements=['user_id', 'drug_name']
+            ).returning(UserMedication.drug_name)
+            inserted = list(db.session.execute(stmt, rows).scalars())
+        # Core inserts skip the session's counter listeners
+        PlatformCounter.apply(
+            db.session.connection(),
+            {"medications": len(inserted)},
+            {('drug', name): inserted.count(name) for name in set(inserted)}
+        )
+        return inserted
+    
     @staticmethod
     def get_user_medication_names(user_id: int, active_only: bool = True) -> list:
         """Get list of medication names for interaction checking"""
@@ -86,7 +143,7 @@ class SearchHistory(db.Model):
     __tablename__ = 'search_history'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
     
     search_type = db.Column(db.String(20), nullable=False)
     search_term = db.Column(db.String(255), nullable=False)
@@ -96,6 +153,11 @@ class SearchHistory(db.Model):
     had_interaction = db.Column(db.Boolean, nullable=True)
     
     searched_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index('ix_search_history_user_searched_at', 'user_id', 'searched_at', 'id'),
+        db.Index('ix_search_history_user_type_searched_at', 'user_id', 'search_type', 'searched_at', 'id'),
+    )
     
     def to_dict(self) -> dict:
         return {
@@ -111,16 +173,28 @@ class SearchHistory(db.Model):
     @staticmethod
     def log_search(search_type: str, search_term: str, user_id: int = None,
                    results_count: int = None, secondary_term: str = None,
-                   had_interaction: bool = None):
-        """Log a search to history"""
-        history = SearchHistory(
+                   had_interaction: bool = None, deferred: bool = True):
+        """
+        Log a search to history
+        With the write-behind queue enabled (and deferred=True) the row is
+        queued instead of committed here, and None is returned
+        """
+        from app.services.write_behind import write_behind
+
+        values = dict(
             user_id=user_id,
             search_type=search_type,
             search_term=search_term,
             results_count=results_count,
             secondary_term=secondary_term,
-            had_interaction=had_interaction
+            had_interaction=had_interaction,
+            searched_at=datetime.now(timezone.utc)
         )
+        if deferred and write_behind.enabled:
+            write_behind.submit('search_history', values)
+            return None
+
+        history = SearchHistory(**values)
         db.session.add(history)
         db.session.commit()
         return history
@@ -132,7 +206,7 @@ class FoodLog(db.Model):
     __tablename__ = 'food_logs'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     
     # Food info
     food_name = db.Column(db.String(255), nullable=False)
@@ -161,9 +235,16 @@ class FoodLog(db.Model):
     logged_date = db.Column(db.Date, nullable=False, index=True)
     logged_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     
-    # Interaction check
+    # Interaction check (computed server-side against the user's active medications)
     had_interaction = db.Column(db.Boolean, nullable=True)
     interaction_count = db.Column(db.Integer, default=0, nullable=True)
+    max_severity = db.Column(db.String(20), nullable=True)  # high, medium, low
+    interactions_json = db.Column(db.Text, nullable=True)  # warnings grouped by severity
+    screened_meds_key = db.Column(db.String(40), nullable=True)  # medication set the flags were computed for
+
+    __table_args__ = (
+        db.Index('ix_food_logs_user_date_logged_at', 'user_id', 'logged_date', 'logged_at', 'id'),
+    )
     
     def to_dict(self) -> dict:
         return {
@@ -187,6 +268,32 @@ class FoodLog(db.Model):
             "logged_at": self.logged_at.isoformat() if self.logged_at else None,
             "had_interaction": self.had_interaction,
             "interaction_count": self.interaction_count,
+            "max_severity": self.max_severity,
+        }
+    
+    def get_warnings(self) -> dict:
+        """Stored interaction warnings grouped by severity"""
+        if self.interactions_json:
+            return json.loads(self.interactions_json)
+        return {"high": [], "medium": [], "low": []}
+    
+    @staticmethod
+    def medication_key(med_names: list) -> str:
+        """Fingerprint of a medication set, to tell when stored interaction flags are stale"""
+        names = sorted({name.strip().lower() for name in med_names if name and name.strip()})
+        return hashlib.sha1('\n'.join(names).encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def screening_values(result: dict, med_key: str) -> dict:
+        """Column values for a food log from a check_food_against_medications result"""
+        warnings = result.get('warnings', {})
+        max_severity = next((s for s in ('high', 'medium', 'low') if warnings.get(s)), None)
+        return {
+            "had_interaction": result.get('total_warnings', 0) > 0,
+            "interaction_count": result.get('total_warnings', 0),
+            "max_severity": max_severity,
+            "interactions_json": json.dumps(warnings) if max_severity else None,
+            "screened_meds_key": med_key
         }
     
     @staticmethod
@@ -195,31 +302,58 @@ class FoodLog(db.Model):
         return FoodLog.query.filter_by(user_id=user_id, logged_date=date).order_by(FoodLog.logged_at).all()
     
     @staticmethod
-    def get_user_logs_range(user_id: int, start_date, end_date):
-        """Get food logs for a date range"""
+    def keyset_order() -> list:
+        """Listing order as (column, descending): newest day first, entries in logged order"""
+        return [(FoodLog.logged_date, True), (FoodLog.logged_at, False), (FoodLog.id, False)]
+
+    @staticmethod
+    def range_query(user_id: int, start_date, end_date):
+        """Unordered query for a user's logs in a date range"""
         return FoodLog.query.filter(
             FoodLog.user_id == user_id,
             FoodLog.logged_date >= start_date,
             FoodLog.logged_date <= end_date
-        ).order_by(FoodLog.logged_date.desc(), FoodLog.logged_at).all()
+        )
+
+    @staticmethod
+    def get_user_logs_range(user_id: int, start_date, end_date):
+        """Get food logs for a date range"""
+        return FoodLog.range_query(user_id, start_date, end_date).order_by(
+            FoodLog.logged_date.desc(), FoodLog.logged_at, FoodLog.id
+        ).all()
     
+    NUTRIENT_FIELDS = ("calories", "protein", "carbs", "fat", "fiber", "sugar", "sodium")
+
+    @staticmethod
+    def empty_totals() -> dict:
+        """Zeroed nutrition totals for a day without logs"""
+        totals = {field: 0 for field in FoodLog.NUTRIENT_FIELDS}
+        totals["food_count"] = 0
+        return totals
+
     @staticmethod
     def get_daily_totals(user_id: int, date) -> dict:
         """Get nutrition totals for a day"""
-        logs = FoodLog.get_user_logs_by_date(user_id, date)
-        totals = {
-            "calories": 0, "protein": 0, "carbs": 0, "fat": 0,
-            "fiber": 0, "sugar": 0, "sodium": 0, "food_count": len(logs)
-        }
-        for log in logs:
-            if log.calories: totals["calories"] += log.calories
-            if log.protein: totals["protein"] += log.protein
-            if log.carbs: totals["carbs"] += log.carbs
-            if log.fat: totals["fat"] += log.fat
-            if log.fiber: totals["fiber"] += log.fiber
-            if log.sugar: totals["sugar"] += log.sugar
-            if log.sodium: totals["sodium"] += log.sodium
-        return totals
+        return FoodLog.get_daily_totals_range(user_id, date, date)[date]
+
+    @staticmethod
+    def get_daily_totals_range(user_id: int, start_date, end_date) -> dict:
+        """
+        Get nutrition totals for every day in a date range (inclusive)
+        Read from the daily rollup table (one row per logged day); days
+        without logs are zero-filled.
+        Returns: {date: totals} in ascending date order
+        """
+        from app.models.nutrition_rollup import DailyNutritionRollup
+
+        by_date = DailyNutritionRollup.get_range(user_id, start_date, end_date)
+
+        result = {}
+        for offset in range((end_date - start_date).days + 1):
+            day = start_date + timedelta(days=offset)
+            row = by_date.get(day)
+            result[day] = row.to_totals() if row is not None else FoodLog.empty_totals()
+        return result
     
     def __repr__(self):
         return f'<FoodLog {self.food_name} on {self.logged_date}>'
@@ -231,7 +365,7 @@ class InteractionCheck(db.Model):
     __tablename__ = 'interaction_checks'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     
     # What was checked
     food_name = db.Column(db.String(255), nullable=False)
@@ -245,10 +379,16 @@ class InteractionCheck(db.Model):
     interactions_json = db.Column(db.Text, nullable=True)
     
     # Highest severity found
-    max_severity = db.Column(db.String(20), nullable=True)  # high, moderate, low
+    max_severity = db.Column(db.String(20), nullable=True)  # high, medium, low
     
     # Timestamp
     checked_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+
+    __table_args__ = (
+        db.Index('ix_interaction_checks_user_checked_at', 'user_id', 'checked_at', 'id'),
+    )
+
+    SEVERITY_RANK = {'high': 3, 'medium': 2, 'moderate': 2, 'low': 1}
     
     def to_dict(self) -> dict:
         import json
@@ -271,30 +411,117 @@ class InteractionCheck(db.Model):
             .limit(limit).all()
     
     @staticmethod
-    def log_check(user_id: int, food_name: str, medications: list, interactions: list):
-        """Log an interaction check"""
+    def severity_bucket(max_severity: str) -> str:
+        """Map a stored max_severity onto the stats buckets: high, medium, low, none"""
+        if not max_severity:
+            return 'none'
+        rank = InteractionCheck.SEVERITY_RANK.get(max_severity.lower(), 1)
+        return {3: 'high', 2: 'medium', 1: 'low'}[rank]
+
+    @staticmethod
+    def get_max_severity(interactions: list):
+        """Highest severity among interactions ('moderate' counts as medium, unknown as low)"""
+        if not interactions:
+            return None
+        best = max(
+            InteractionCheck.SEVERITY_RANK.get(str(i.get('severity') or 'low').lower(), 1)
+            for i in interactions
+        )
+        return {3: 'high', 2: 'medium', 1: 'low'}[best]
+
+    @staticmethod
+    def compute_stats(user_id: int, top_n: int = 10, connection=None) -> dict:
+        """
+        Interaction check stats computed with grouped SQL, including checks
+        the retention job has archived
+        (served from InteractionStats normally; used to build it)
+        connection: run on this connection (e.g. mid-transaction) instead of the session
+        """
+        from sqlalchemy import func, select, union_all
+        from app.models.archive import InteractionCheckMonthly
+
+        execute = (connection or db.session).execute
+        severity_counts = {"high": 0, "medium": 0, "low": 0, "none": 0}
+        rows = execute(select(
+            InteractionCheck.max_severity, func.count(InteractionCheck.id)
+        ).where(InteractionCheck.user_id == user_id).group_by(InteractionCheck.max_severity)).all()
+        for max_severity, count in rows:
+            severity_counts[InteractionCheck.severity_bucket(max_severity)] += count
+        archived = execute(select(
+            InteractionCheckMonthly.severity, func.sum(InteractionCheckMonthly.check_count)
+        ).where(InteractionCheckMonthly.user_id == user_id).group_by(InteractionCheckMonthly.severity)).all()
+        for bucket, count in archived:
+            severity_counts[bucket] += count
+
+        counts = union_all(
+            select(func.lower(InteractionCheck.food_name).label('food'), func.count(InteractionCheck.id).label('n'))
+            .where(InteractionCheck.user_id == user_id).group_by(func.lower(InteractionCheck.food_name)),
+            select(InteractionCheckMonthly.food_key.label('food'), func.sum(InteractionCheckMonthly.check_count).label('n'))
+            .where(InteractionCheckMonthly.user_id == user_id).group_by(InteractionCheckMonthly.food_key)
+        ).subquery()
+        total = func.sum(counts.c.n)
+        food_rows = execute(
+            select(counts.c.food, total.label('count')).group_by(counts.c.food).order_by(
+                total.desc(), counts.c.food
+            ).limit(top_n)
+        )
+
+        return {
+            "total_checks": sum(severity_counts.values()),
+            "severity_distribution": severity_counts,
+            "food_counts": [(row.food, row.count) for row in food_rows]
+        }
+
+    @staticmethod
+    def backfill_max_severity() -> int:
+        """
+        Set max_severity on checks that have interactions but none recorded
+        (older rows only ranked 'moderate', so medium-only checks were stored as NULL)
+        Returns: number of rows fixed
+        """
+        import json
+
+        checks = InteractionCheck.query.filter(
+            InteractionCheck.had_interaction.is_(True),
+            InteractionCheck.max_severity.is_(None)
+        ).all()
+        for check in checks:
+            try:
+                interactions = json.loads(check.interactions_json) if check.interactions_json else []
+            except (json.JSONDecodeError, TypeError):
+                interactions = []
+            check.max_severity = InteractionCheck.get_max_severity(interactions) or 'low'
+        db.session.commit()
+        return len(checks)
+
+    @staticmethod
+    def log_check(user_id: int, food_name: str, medications: list, interactions: list,
+                  deferred: bool = True):
+        """
+        Log an interaction check
+        With the write-behind queue enabled (and deferred=True) the row is
+        queued instead of committed here, and None is returned
+        """
         import json
+        from app.services.write_behind import write_behind
         
-        # Determine max severity
-        max_severity = None
-        if interactions:
-            severities = {'high': 3, 'moderate': 2, 'low': 1}
-            max_sev_score = 0
-            for interaction in interactions:
-                sev = interaction.get('severity', 'low')
-                if severities.get(sev, 0) > max_sev_score:
-                    max_sev_score = severities[sev]
-                    max_severity = sev
+        max_severity = InteractionCheck.get_max_severity(interactions)
         
-        check = InteractionCheck(
+        values = dict(
             user_id=user_id,
             food_name=food_name,
             medications_checked=json.dumps(medications),
             had_interaction=len(interactions) > 0,
             interaction_count=len(interactions),
             interactions_json=json.dumps(interactions) if interactions else None,
-            max_severity=max_severity
+            max_severity=max_severity,
+            checked_at=datetime.now(timezone.utc)
         )
+        if deferred and write_behind.enabled:
+            write_behind.submit('interaction_check', values)
+            return None
+
+        check = InteractionCheck(**values)
         db.session.add(check)
         db.session.commit()
         return check
@@ -0,0 +1,320 @@
+"""
+Daily Nutrition Rollup Model
+Per-user, per-day nutrition totals kept in step with food_logs, so that
+summaries read one row per day instead of every logged entry. Each row also
+carries the logging streak ending on that day.
+"""
+
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import event, func, select, delete, insert, update, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.medication import FoodLog
+from app.models.upsert import upsert
+from app.models.user import User
+
+
+class DailyNutritionRollup(db.Model):
+    """Aggregated nutrition totals for one user on one day"""
+
+    __tablename__ = 'daily_nutrition_rollup'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    log_date = db.Column(db.Date, primary_key=True)
+
+    food_count = db.Column(db.Integer, default=0, nullable=False)
+    calories = db.Column(db.Float, default=0, nullable=False)
+    protein = db.Column(db.Float, default=0, nullable=False)
+    carbs = db.Column(db.Float, default=0, nullable=False)
+    fat = db.Column(db.Float, default=0, nullable=False)
+    fiber = db.Column(db.Float, default=0, nullable=False)
+    sugar = db.Column(db.Float, default=0, nullable=False)
+    sodium = db.Column(db.Float, default=0, nullable=False)
+
+    # Consecutive logged days ending on log_date (1 = no log the day before)
+    streak = db.Column(db.Integer, default=1, nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    def to_totals(self) -> dict:
+        """Totals in the shape returned by FoodLog.get_daily_totals"""
+        totals = {field: getattr(self, field) for field in FoodLog.NUTRIENT_FIELDS}
+        totals["food_count"] = self.food_count
+        return totals
+
+    @staticmethod
+    def get_range(user_id: int, start_date, end_date) -> dict:
+        """Get rollup rows for a date range, keyed by date (days without logs are absent)"""
+        rows = DailyNutritionRollup.query.filter(
+            DailyNutritionRollup.user_id == user_id,
+            DailyNutritionRollup.log_date >= start_date,
+            DailyNutritionRollup.log_date <= end_date
+        ).all()
+        return {row.log_date: row for row in rows}
+
+    @staticmethod
+    def get_current_streak(user_id: int, today) -> int:
+        """Current logging streak (0 if nothing is logged today), read from one row"""
+        row = db.session.get(DailyNutritionRollup, (user_id, today))
+        return row.streak if row is not None else 0
+
+    @staticmethod
+    def get_user_totals(user_id: int) -> dict:
+        """Days logged and total entries for a user"""
+        row = db.session.query(
+            func.count(DailyNutritionRollup.log_date).label('days'),
+            func.coalesce(func.sum(DailyNutritionRollup.food_count), 0).label('entries')
+        ).filter(DailyNutritionRollup.user_id == user_id).one()
+        return {"total_days_logged": row.days, "total_entries": row.entries}
+
+    @staticmethod
+    def count_entries(user_id: int, start_date, end_date) -> int:
+        """Food logs in a date range, summed from one rollup row per day"""
+        return db.session.query(
+            func.coalesce(func.sum(DailyNutritionRollup.food_count), 0)
+        ).filter(
+            DailyNutritionRollup.user_id == user_id,
+            DailyNutritionRollup.log_date >= start_date,
+            DailyNutritionRollup.log_date <= end_date
+        ).scalar()
+
+    @staticmethod
+    def _walk_streaks(rows, streak_before: int = 0, day_before=None):
+        """
+        Gaps-and-islands over (log_date, streak) rows in ascending date order
+        Yields (log_date, stored_streak, expected_streak)
+        """
+        running, previous = streak_before, day_before
+        for log_date, stored in rows:
+            running = running + 1 if previous is not None and log_date - previous == timedelta(days=1) else 1
+            previous = log_date
+            yield log_date, stored, running
+
+    @staticmethod
+    def _refresh_streaks(connection, user_id: int, start_date, end_date):
+        """
+        Recompute streaks for a user from start_date onwards after rows changed
+        Stops at the first row past end_date whose stored streak is already right,
+        since every later row depends only on its predecessor
+        """
+        table = DailyNutritionRollup
+        day_before = start_date - timedelta(days=1)
+        streak_before = connection.execute(
+            select(table.streak).where(table.user_id == user_id, table.log_date == day_before)
+        ).scalar() or 0
+
+        rows = connection.execute(
+            select(table.log_date, table.streak).where(
+                table.user_id == user_id, table.log_date >= start_date
+            ).order_by(table.log_date)
+        )
+        updates = []
+        for log_date, stored, expected in DailyNutritionRollup._walk_streaks(
+                rows, streak_before, day_before if streak_before else None):
+            if stored == expected:
+                if log_date > end_date:
+                    break
+                continue
+            updates.append((log_date, expected))
+
+        for log_date, expected in updates:
+            connection.execute(
+                update(table).where(table.user_id == user_id, table.log_date == log_date)
+                .values(streak=expected)
+            )
+
+    @staticmethod
+    def _aggregate_select():
+        """SELECT of per-(user, day) totals computed from food_logs"""
+        return select(
+            FoodLog.user_id,
+            FoodLog.logged_date.label('log_date'),
+            func.count(FoodLog.id).label('food_count'),
+            *[func.coalesce(func.sum(getattr(FoodLog, field)), 0).label(field)
+              for field in FoodLog.NUTRIENT_FIELDS]
+        ).group_by(FoodLog.user_id, FoodLog.logged_date)
+
+    @staticmethod
+    def refresh(connection, keys):
+        """
+        Recompute the rollup rows for the given (user_id, date) keys from food_logs
+        Runs on the caller's connection so it joins the surrounding transaction.
+        The user's row is locked first (FOR UPDATE; SQLite already serializes
+        writers) so concurrent refreshes of the same user's days take turns and
+        each aggregate sees the other's committed logs; rows are then upserted
+        and days left without logs deleted.
+        """
+        dates_by_user = {}
+        for user_id, log_date in keys:
+            if user_id is not None and log_date is not None:
+                dates_by_user.setdefault(user_id, set()).add(log_date)
+
+        now = datetime.now(timezone.utc)
+        for user_id in sorted(dates_by_user):
+            dates = sorted(dates_by_user[user_id])
+            connection.execute(select(User.id).where(User.id == user_id).with_for_update())
+            rows = connection.execute(
+                DailyNutritionRollup._aggregate_select().where(
+                    FoodLog.user_id == user_id,
+                    FoodLog.logged_date.in_(dates)
+                )
+            ).mappings().all()
+
+            logged = {row['log_date'] for row in rows}
+            empty = [day for day in dates if day not in logged]
+            if empty:
+                connection.execute(delete(DailyNutritionRollup).where(
+                    DailyNutritionRollup.user_id == user_id,
+                    DailyNutritionRollup.log_date.in_(empty)
+                ))
+            upsert(
+                connection, DailyNutritionRollup,
+                [{**row, "updated_at": now} for row in rows],
+                keys=['user_id', 'log_date'],
+                update=['food_count', *FoodLog.NUTRIENT_FIELDS, 'updated_at']
+            )
+
+            DailyNutritionRollup._refresh_streaks(connection, user_id, min(dates), max(dates))
+
+    @staticmethod
+    def rebuild(user_id: int = None) -> int:
+        """
+        Rebuild rollups from scratch (all users, or one)
+        Returns: number of rollup rows written
+        """
+        stmt = delete(DailyNutritionRollup)
+        source = DailyNutritionRollup._aggregate_select()
+        if user_id is not None:
+            stmt = stmt.where(DailyNutritionRollup.user_id == user_id)
+            source = source.where(FoodLog.user_id == user_id)
+
+        db.session.execute(stmt)
+        columns = ['user_id', 'log_date', 'food_count', *FoodLog.NUTRIENT_FIELDS]
+        db.session.execute(
+            insert(DailyNutritionRollup).from_select(columns, source)
+        )
+
+        user_ids = [user_id] if user_id is not None else [
+            uid for (uid,) in db.session.query(DailyNutritionRollup.user_id).distinct()
+        ]
+        for uid in user_ids:
+            first = db.session.query(func.min(DailyNutritionRollup.log_date)).filter(
+                DailyNutritionRollup.user_id == uid
+            ).scalar()
+            if first is not None:
+                DailyNutritionRollup._refresh_streaks(db.session.connection(), uid, first, first)
+        db.session.commit()
+
+        query = db.session.query(func.count()).select_from(DailyNutritionRollup)
+        if user_id is not None:
+            query = query.filter(DailyNutritionRollup.user_id == user_id)
+        return query.scalar() or 0
+
+    @staticmethod
+    def find_mismatches(user_id: int = None, tolerance: float = 1e-6) -> list:
+        """
+        Compare rollups against food_logs
+        Returns: list of {"user_id", "date", "field", "expected", "actual"}
+        """
+        source = DailyNutritionRollup._aggregate_select()
+        rollups = DailyNutritionRollup.query
+        if user_id is not None:
+            source = source.where(FoodLog.user_id == user_id)
+            rollups = rollups.filter(DailyNutritionRollup.user_id == user_id)
+
+        actual = {(row.user_id, row.log_date): row for row in rollups}
+        fields = ('food_count', *FoodLog.NUTRIENT_FIELDS)
+        mismatches = []
+
+        for expected in db.session.execute(source).mappings():
+            key = (expected['user_id'], expected['log_date'])
+            row = actual.pop(key, None)
+            for field in fields:
+                actual_value = getattr(row, field) if row is not None else None
+                if actual_value is None or abs(actual_value - expected[field]) > tolerance:
+                    mismatches.append({
+                        "user_id": key[0], "date": key[1].isoformat(), "field": field,
+                        "expected": expected[field], "actual": actual_value
+                    })
+
+        # Rollup rows for days that no longer have any logs
+        for (row_user_id, row_date), row in actual.items():
+            mismatches.append({
+                "user_id": row_user_id, "date": row_date.isoformat(), "field": "food_count",
+                "expected": 0, "actual": row.food_count
+            })
+
+        # Streaks, walking each user's rollup dates in order
+        streak_rows = db.session.query(
+            DailyNutritionRollup.user_id, DailyNutritionRollup.log_date, DailyNutritionRollup.streak
+        )
+        if user_id is not None:
+            streak_rows = streak_rows.filter(DailyNutritionRollup.user_id == user_id)
+        by_user = {}
+        for row_user_id, log_date, streak in streak_rows.order_by(
+                DailyNutritionRollup.user_id, DailyNutritionRollup.log_date):
+            by_user.setdefault(row_user_id, []).append((log_date, streak))
+        for row_user_id, rows in by_user.items():
+            for log_date, stored, expected in DailyNutritionRollup._walk_streaks(rows):
+                if stored != expected:
+                    mismatches.append({
+                        "user_id": row_user_id, "date": log_date.isoformat(), "field": "streak",
+                        "expected": expected, "actual": stored
+                    })
+
+        return mismatches
+
+    def __repr__(self):
+        return f'<DailyNutritionRollup user={self.user_id} {self.log_date}>'
+
+
+_PENDING_KEYS = 'nutrition_rollup_keys'
+
+
+def _log_key(log: FoodLog) -> tuple:
+    return (log.user_id, log.logged_date)
+
+
+def _previous_log_key(log: FoodLog) -> tuple:
+    """Key a modified FoodLog had before this flush"""
+    state = inspect(log)
+    previous = []
+    for attr in ('user_id', 'logged_date'):
+        history = state.attrs[attr].history
+        previous.append(history.deleted[0] if history.deleted else getattr(log, attr))
+    return tuple(previous)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_rollup_keys(session, flush_context, instances):
+    """Record the days touched by deleted or moved food logs while their old values are loaded"""
+    keys = set()
+    for obj in session.deleted:
+        if isinstance(obj, FoodLog):
+            keys.add(_log_key(obj))
+    for obj in session.dirty:
+        if isinstance(obj, FoodLog) and session.is_modified(obj):
+            keys.add(_previous_log_key(obj))
+    session.info[_PENDING_KEYS] = keys
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_rollups(session, flush_context):
+    """Recompute rollups for every day whose food logs changed in this flush"""
+    keys = session.info.pop(_PENDING_KEYS, set())
+    for obj in session.new:
+        if isinstance(obj, FoodLog):
+            keys.add(_log_key(obj))
+    for obj in session.dirty:
+        if isinstance(obj, FoodLog) and session.is_modified(obj):
+            keys.add(_log_key(obj))
+    if keys:
+        DailyNutritionRollup.refresh(session.connection(), keys)
+
+    # Deleted users' logs go through the relationship cascade during the flush,
+    # so drop their rollups outright rather than relying on ON DELETE CASCADE
+    deleted_user_ids = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if deleted_user_ids:
+        session.connection().execute(delete(DailyNutritionRollup).where(
+            DailyNutritionRollup.user_id.in_(deleted_user_ids)
+        ))
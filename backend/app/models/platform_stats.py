@@ -0,0 +1,299 @@
+"""
+Platform Stats Models
+Platform-wide totals and per-drug / per-food counts for /admin/stats, kept
+in step with the underlying tables by flush hooks (and by the Core write
+paths that bypass them), so the admin dashboard reads a handful of rows
+instead of counting and grouping every table on each load. Each total is
+spread over SHARDS rows that writers add to at random and reads sum, so
+concurrent writes rarely wait on the same row.
+"""
+
+import random
+from datetime import datetime, timezone
+from sqlalchemy import event, select, update, delete, func, inspect, union_all
+from sqlalchemy.orm import Session
+from app import db
+from app.models.user import User
+from app.models.medication import UserMedication, FoodLog, InteractionCheck, SearchHistory
+from app.models.favorites import InteractionReport
+from app.models.archive import SearchHistoryMonthly, InteractionCheckMonthly
+from app.models.upsert import upsert
+
+
+COUNTERS = ('users', 'active_users', 'medications', 'food_logs',
+            'interaction_checks', 'searches', 'interaction_reports')
+
+# Rows per counter; a total is the sum of its shards
+SHARDS = 8
+
+
+class PlatformCounter(db.Model):
+    """
+    One shard of a platform-wide total (interaction checks and searches
+    include archived rows)
+    """
+
+    __tablename__ = 'platform_counters'
+
+    name = db.Column(db.String(40), primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0)
+    value = db.Column(db.BigInteger, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    @staticmethod
+    def totals() -> tuple:
+        """({name: value summed over shards}, last update time or None)"""
+        rows = db.session.execute(select(
+            PlatformCounter.name, func.sum(PlatformCounter.value), func.max(PlatformCounter.updated_at)
+        ).group_by(PlatformCounter.name)).all()
+        updated_at = max((row[2] for row in rows), default=None)
+        return {name: int(value) for name, value, _ in rows}, updated_at
+
+    @staticmethod
+    def snapshot(top_n: int = 10) -> dict:
+        """
+        Totals and top drugs/foods (read only; the migration and
+        `flask platform-stats rebuild` seed the tables from SQL)
+        Returns: {"counters", "top_drugs", "top_foods", "updated_at"}
+        """
+        stored, updated_at = PlatformCounter.totals()
+        counters = dict.fromkeys(COUNTERS, 0)
+        counters.update(stored)
+        return {
+            "counters": counters,
+            "top_drugs": PlatformTopCount.top('drug', top_n),
+            "top_foods": PlatformTopCount.top('food', top_n),
+            "updated_at": updated_at.replace(tzinfo=timezone.utc).isoformat() if updated_at else None
+        }
+
+    @staticmethod
+    def compute() -> tuple:
+        """
+        Totals and per-key counts computed with full SQL counts (used to build and check)
+        Returns: (counters, {(kind, key): count})
+        """
+        live_users = User.query.filter(User.deleted_at.is_(None))
+        counters = {
+            "users": live_users.count(),
+            "active_users": live_users.filter(User.is_active.is_(True)).count(),
+            "medications": UserMedication.query.count(),
+            "food_logs": FoodLog.query.count(),
+            "interaction_checks": InteractionCheck.query.count() + InteractionCheckMonthly.total(),
+            "searches": SearchHistory.query.count() + SearchHistoryMonthly.total(),
+            "interaction_reports": InteractionReport.query.count(),
+        }
+
+        top = {}
+        drug_rows = db.session.query(
+            UserMedication.drug_name, func.count(UserMedication.id)
+        ).group_by(UserMedication.drug_name)
+        for drug_name, count in drug_rows:
+            top[('drug', drug_name)] = count
+
+        searches = union_all(
+            select(SearchHistory.search_term.label('term'), func.count(SearchHistory.id).label('n'))
+            .where(SearchHistory.search_type == 'food').group_by(SearchHistory.search_term),
+            select(SearchHistoryMonthly.search_term.label('term'), func.sum(SearchHistoryMonthly.search_count).label('n'))
+            .where(SearchHistoryMonthly.search_type == 'food').group_by(SearchHistoryMonthly.search_term)
+        ).subquery()
+        for term, count in db.session.execute(
+            select(searches.c.term, func.sum(searches.c.n)).group_by(searches.c.term)
+        ):
+            key = ('food', term[:255])
+            top[key] = top.get(key, 0) + int(count)
+        return counters, top
+
+    @staticmethod
+    def rebuild() -> int:
+        """Replace all counters and per-key counts with freshly computed values"""
+        counters, top = PlatformCounter.compute()
+        PlatformTopCount.query.delete()
+        PlatformCounter.query.delete()
+        now = datetime.now(timezone.utc)
+        db.session.add_all([
+            PlatformCounter(name=name, shard=0, value=value, updated_at=now) for name, value in counters.items()
+        ])
+        db.session.add_all([
+            PlatformTopCount(kind=kind, key=key, count=count)
+            for (kind, key), count in top.items() if count > 0
+        ])
+        db.session.commit()
+        return len(top)
+
+    @staticmethod
+    def find_mismatches() -> list:
+        """Counters and per-key counts that differ from a full SQL count"""
+        counters, top = PlatformCounter.compute()
+        stored = PlatformCounter.totals()[0]
+        mismatches = [
+            {"counter": name, "expected": value, "actual": stored.get(name, 0)}
+            for name, value in counters.items() if stored.get(name, 0) != value
+        ]
+        stored_top = {(row.kind, row.key): row.count for row in PlatformTopCount.query.all()}
+        for key in sorted(set(top) | set(stored_top)):
+            if top.get(key, 0) != stored_top.get(key, 0):
+                mismatches.append({"counter": f"{key[0]}:{key[1]}", "expected": top.get(key, 0),
+                                   "actual": stored_top.get(key, 0)})
+        return mismatches
+
+    @staticmethod
+    def apply(connection, counters: dict = None, top: dict = None):
+        """
+        Apply counter changes on the caller's connection (same transaction)
+        counters: {name: +n / -n}, top: {(kind, key): +n / -n}
+        Counter changes are added to one random shard in a single upsert, so
+        concurrent writers rarely wait on the same row; rows are written in
+        key order.
+        """
+        counters = {name: change for name, change in (counters or {}).items() if change}
+        top = {key: change for key, change in (top or {}).items() if change}
+
+        if counters:
+            now = datetime.now(timezone.utc)
+            shard = random.randrange(SHARDS)
+            upsert(connection, PlatformCounter, [
+                {"name": name, "shard": shard, "value": change, "updated_at": now}
+                for name, change in sorted(counters.items())
+            ], ['name', 'shard'], lambda table, excluded: {
+                "value": table.value + excluded.value, "updated_at": excluded.updated_at
+            })
+
+        added = [{"kind": kind, "key": key, "count": change}
+                 for (kind, key), change in sorted(top.items()) if change > 0]
+        upsert(connection, PlatformTopCount, added, ['kind', 'key'],
+               lambda table, excluded: {"count": table.count + excluded.count})
+        for (kind, key), change in sorted(top.items()):
+            if change > 0:
+                continue
+            match = (PlatformTopCount.kind == kind, PlatformTopCount.key == key)
+            connection.execute(update(PlatformTopCount).where(*match).values(count=PlatformTopCount.count + change))
+            connection.execute(delete(PlatformTopCount).where(*match, PlatformTopCount.count <= 0))
+
+    def __repr__(self):
+        return f'<PlatformCounter {self.name}[{self.shard}]={self.value}>'
+
+
+class PlatformTopCount(db.Model):
+    """How many users have added a drug ('drug') or searched a food ('food')"""
+
+    __tablename__ = 'platform_top_counts'
+
+    kind = db.Column(db.String(10), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_platform_top_counts_kind_count', 'kind', 'count'),
+    )
+
+    @staticmethod
+    def top(kind: str, limit: int = 10) -> list:
+        """[(key, count)] with the highest counts first"""
+        rows = PlatformTopCount.query.filter_by(kind=kind).order_by(
+            PlatformTopCount.count.desc(), PlatformTopCount.key
+        ).limit(limit).all()
+        return [(row.key, row.count) for row in rows]
+
+    def __repr__(self):
+        return f'<PlatformTopCount {self.kind}:{self.key} x{self.count}>'
+
+
+def search_deltas(rows) -> tuple:
+    """(counters, top) changes for inserting search_history rows (dicts)"""
+    top = {}
+    for row in rows:
+        if row.get("search_type") == 'food' and row.get("search_term"):
+            key = ('food', row["search_term"][:255])
+            top[key] = top.get(key, 0) + 1
+    return {"searches": len(rows)}, top
+
+
+# Model -> attributes whose changes move its counters
+_TRACKED = {
+    User: ('deleted_at', 'is_active'),
+    UserMedication: ('drug_name',),
+    FoodLog: (),
+    InteractionCheck: (),
+    SearchHistory: ('search_type', 'search_term'),
+    InteractionReport: (),
+}
+
+_PENDING = 'platform_counter_deltas'
+
+
+def _value(obj, attr: str, committed: bool):
+    if committed:
+        history = inspect(obj).attrs[attr].history
+        if history.deleted:
+            return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def _contribution(obj, committed: bool = False) -> tuple:
+    """(counters, top) an object adds to the totals, optionally as loaded before changes"""
+    value = lambda attr: _value(obj, attr, committed)
+    if isinstance(obj, User):
+        if value('deleted_at') is not None:
+            return {}, {}
+        return {"users": 1, "active_users": 1 if value('is_active') is not False else 0}, {}
+    if isinstance(obj, UserMedication):
+        return {"medications": 1}, {('drug', value('drug_name')): 1}
+    if isinstance(obj, SearchHistory):
+        term = value('search_term')
+        top = {('food', term[:255]): 1} if value('search_type') == 'food' and term else {}
+        return {"searches": 1}, top
+    if isinstance(obj, FoodLog):
+        return {"food_logs": 1}, {}
+    if isinstance(obj, InteractionCheck):
+        return {"interaction_checks": 1}, {}
+    return {"interaction_reports": 1}, {}
+
+
+def _add(deltas: tuple, contribution: tuple, sign: int):
+    for target, changes in zip(deltas, contribution):
+        for key, change in changes.items():
+            target[key] = target.get(key, 0) + sign * change
+
+
+def _moved(session, obj) -> bool:
+    """Whether a dirty object changed an attribute its counters depend on"""
+    attrs = _TRACKED.get(type(obj))
+    if not attrs or not session.is_modified(obj):
+        return False
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_platform_deltas(session, flush_context, instances):
+    """Subtract deleted and changed rows while their old values are loaded"""
+    deltas = ({}, {})
+    for obj in session.deleted:
+        if type(obj) in _TRACKED:
+            _add(deltas, _contribution(obj, committed=True), -1)
+    for obj in session.dirty:
+        if _moved(session, obj):
+            _add(deltas, _contribution(obj, committed=True), -1)
+
+    # A deleted user's archived checks are dropped with their stats after the flush
+    deleted_user_ids = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if deleted_user_ids:
+        archived = session.execute(
+            select(func.coalesce(func.sum(InteractionCheckMonthly.check_count), 0))
+            .where(InteractionCheckMonthly.user_id.in_(deleted_user_ids))
+        ).scalar()
+        _add(deltas, ({"interaction_checks": archived}, {}), -1)
+    session.info[_PENDING] = deltas
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_platform_deltas(session, flush_context):
+    """Add new and changed rows, then apply all counter changes for this flush"""
+    deltas = session.info.pop(_PENDING, ({}, {}))
+    for obj in session.new:
+        if type(obj) in _TRACKED:
+            _add(deltas, _contribution(obj), 1)
+    for obj in session.dirty:
+        if _moved(session, obj):
+            _add(deltas, _contribution(obj), 1)
+    PlatformCounter.apply(session.connection(), *deltas)
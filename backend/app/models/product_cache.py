@@ -0,0 +1,96 @@
+"""
+Product Cache Model
+Persists parsed Open Food Facts products keyed by normalized barcode
+"""
+
+import json
+from datetime import datetime, timezone, timedelta
+from app import db
+
+
+class ProductCache(db.Model):
+    """Cached Open Food Facts barcode lookup (positive or negative)"""
+
+    __tablename__ = 'product_cache'
+
+    id = db.Column(db.Integer, primary_key=True)
+    barcode = db.Column(db.String(14), unique=True, nullable=False, index=True)  # normalized GTIN
+    found = db.Column(db.Boolean, default=True, nullable=False)  # False = negative cache entry
+    product_json = db.Column(db.Text, nullable=True)  # output of _parse_product_detail
+    fetched_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_product(self):
+        """Return the cached parsed product, or None for a negative entry"""
+        if not self.found or not self.product_json:
+            return None
+        try:
+            return json.loads(self.product_json)
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    @staticmethod
+    def get_fresh(barcode: str) -> 'ProductCache':
+        """Get a non-expired cache entry for a normalized barcode"""
+        return ProductCache.query.filter(
+            ProductCache.barcode == barcode,
+            ProductCache.expires_at > datetime.now(timezone.utc)
+        ).first()
+
+    @staticmethod
+    def get_fresh_many(barcodes: list) -> dict:
+        """Get non-expired cache entries for many barcodes in one query"""
+        if not barcodes:
+            return {}
+        entries = ProductCache.query.filter(
+            ProductCache.barcode.in_(barcodes),
+            ProductCache.expires_at > datetime.now(timezone.utc)
+        ).all()
+        return {entry.barcode: entry for entry in entries}
+
+    @staticmethod
+    def store(barcode: str, product: dict, ttl: int):
+        """Insert or refresh the cache entry for a barcode"""
+        ProductCache.store_many({barcode: (product, ttl)})
+
+    @staticmethod
+    def store_many(items: dict):
+        """
+        Insert or refresh many cache entries without committing the caller's
+        session: in their own transaction, or in a savepoint of the caller's
+        when it has already written (it holds SQLite's write lock)
+        items: {barcode: (product or None, ttl_seconds)}
+        """
+        from app.db_routing import has_written
+        from app.models.upsert import upsert
+
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "barcode": barcode,
+                "found": product is not None,
+                "product_json": json.dumps(product) if product is not None else None,
+                "fetched_at": now,
+                "expires_at": now + timedelta(seconds=ttl),
+            }
+            for barcode, (product, ttl) in items.items()
+        ]
+        columns = ['found', 'product_json', 'fetched_at', 'expires_at']
+        if has_written(db.session):
+            with db.session.begin_nested():
+                upsert(db.session.connection(), ProductCache, rows, ['barcode'], columns)
+        else:
+            with db.engine.begin() as connection:
+                upsert(connection, ProductCache, rows, ['barcode'], columns)
+
+    @staticmethod
+    def purge_expired() -> int:
+        """Remove expired cache entries"""
+        deleted = ProductCache.query.filter(
+            ProductCache.expires_at < datetime.now(timezone.utc)
+        ).delete()
+        db.session.commit()
+        return deleted
+
+    def __repr__(self):
+        return f'<ProductCache {self.barcode} found={self.found}>'
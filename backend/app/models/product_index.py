@@ -0,0 +1,42 @@
+"""
+Local Product Index Models
+Open Food Facts products loaded from a bulk dump, indexed by barcode
+and product-name tokens for local search and lookup
+"""
+
+import json
+from datetime import datetime, timezone
+from app import db
+
+
+class LocalProduct(db.Model):
+    """Parsed Open Food Facts product from a local dump"""
+
+    __tablename__ = 'local_products'
+
+    barcode = db.Column(db.String(14), primary_key=True)  # normalized GTIN
+    product_name = db.Column(db.String(255), nullable=False)
+    product_json = db.Column(db.Text, nullable=False)  # output of _parse_product_detail
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    def to_product(self) -> dict:
+        try:
+            return json.loads(self.product_json)
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    def __repr__(self):
+        return f'<LocalProduct {self.barcode} {self.product_name}>'
+
+
+class LocalProductToken(db.Model):
+    """Inverted index entry: one row per (token, product)"""
+
+    __tablename__ = 'local_product_tokens'
+
+    token = db.Column(db.String(64), primary_key=True)
+    barcode = db.Column(db.String(14), db.ForeignKey('local_products.barcode', ondelete='CASCADE'),
+                        primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<LocalProductToken {self.token} -> {self.barcode}>'
@@ -0,0 +1,173 @@
+"""
+Row Serializers
+Read path for list endpoints: column-projected Core selects whose rows are
+turned into the same dicts as the models' to_dict by a function compiled
+once per model, so listings skip ORM hydration and the identity map.
+ORM objects remain the write path.
+"""
+
+import json
+from sqlalchemy import select
+from app import db
+from app.models.medication import UserMedication, FoodLog, InteractionCheck, SearchHistory
+from app.models.favorites import FavoriteFood
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _json(value, default):
+    """Decoded JSON text, or default() when empty or malformed"""
+    if not value:
+        return default()
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return default()
+
+
+class RowSerializer:
+    """
+    Column projection plus a precompiled row -> dict function for one model
+    fields: [(key, attribute, kind)] with kind None (as is), 'iso', or
+    ('json', default_factory) for JSON text columns
+    """
+
+    def __init__(self, model, fields: list):
+        self.model = model
+        self.columns = [getattr(model, attr).label(attr) for _, attr, _ in fields]
+        self.serialize = self._compile(model.__name__, fields)
+
+    @staticmethod
+    def _compile(name: str, fields: list):
+        namespace = {"_iso": _iso, "_json": _json}
+        items = []
+        for i, (key, _, kind) in enumerate(fields):
+            if kind is None:
+                value = f"row[{i}]"
+            elif kind == 'iso':
+                value = f"_iso(row[{i}])"
+            else:
+                namespace[f"_default{i}"] = kind[1]
+                value = f"_json(row[{i}], _default{i})"
+            items.append(f"{key!r}: {value}")
+        source = "def serialize(row):\n    return {" + ", ".join(items) + "}\n"
+        exec(compile(source, f"<{name} row serializer>", "exec"), namespace)
+        return namespace["serialize"]
+
+    def select(self):
+        """SELECT of just the serialized columns (add where/order_by as needed)"""
+        return select(*self.columns)
+
+    def __call__(self, row) -> dict:
+        return self.serialize(row)
+
+    def all(self, statement) -> list:
+        """Run a select built from self.select() and serialize every row"""
+        serialize = self.serialize
+        return [serialize(row) for row in db.session.execute(statement)]
+
+
+medication_rows = RowSerializer(UserMedication, [
+    ("id", "id", None),
+    ("drug_name", "drug_name", None),
+    ("brand_name", "brand_name", None),
+    ("generic_name", "generic_name", None),
+    ("dosage", "dosage", None),
+    ("frequency", "frequency", None),
+    ("prescriber", "prescriber", None),
+    ("pharmacy", "pharmacy", None),
+    ("notes", "notes", None),
+    ("is_active", "is_active", None),
+    ("start_date", "start_date", 'iso'),
+    ("end_date", "end_date", 'iso'),
+    ("created_at", "created_at", 'iso'),
+    ("updated_at", "updated_at", 'iso'),
+])
+
+food_log_rows = RowSerializer(FoodLog, [
+    ("id", "id", None),
+    ("food_name", "food_name", None),
+    ("fdc_id", "fdc_id", None),
+    ("brand_owner", "brand_owner", None),
+    ("servings", "servings", None),
+    ("serving_size", "serving_size", None),
+    ("serving_unit", "serving_unit", None),
+    ("calories", "calories", None),
+    ("protein", "protein", None),
+    ("carbs", "carbs", None),
+    ("fat", "fat", None),
+    ("fiber", "fiber", None),
+    ("sugar", "sugar", None),
+    ("sodium", "sodium", None),
+    ("meal_type", "meal_type", None),
+    ("notes", "notes", None),
+    ("logged_date", "logged_date", 'iso'),
+    ("logged_at", "logged_at", 'iso'),
+    ("had_interaction", "had_interaction", None),
+    ("interaction_count", "interaction_count", None),
+    ("max_severity", "max_severity", None),
+])
+
+interaction_check_rows = RowSerializer(InteractionCheck, [
+    ("id", "id", None),
+    ("food_name", "food_name", None),
+    ("medications_checked", "medications_checked", ('json', list)),
+    ("had_interaction", "had_interaction", None),
+    ("interaction_count", "interaction_count", None),
+    ("interactions", "interactions_json", ('json', list)),
+    ("max_severity", "max_severity", None),
+    ("checked_at", "checked_at", 'iso'),
+])
+
+search_history_rows = RowSerializer(SearchHistory, [
+    ("id", "id", None),
+    ("search_type", "search_type", None),
+    ("search_term", "search_term", None),
+    ("secondary_term", "secondary_term", None),
+    ("results_count", "results_count", None),
+    ("had_interaction", "had_interaction", None),
+    ("searched_at", "searched_at", 'iso'),
+])
+
+favorite_food_rows = RowSerializer(FavoriteFood, [
+    ("id", "id", None),
+    ("food_name", "food_name", None),
+    ("fdc_id", "fdc_id", None),
+    ("off_id", "off_id", None),
+    ("source", "source", None),
+    ("nutrition", "nutrition_snapshot", ('json', lambda: None)),
+    ("created_at", "created_at", 'iso'),
+])
+
+
+def list_medications(user_id: int, active_only: bool = False) -> list:
+    """Serialized medications for a user (same order as UserMedication.get_user_medications)"""
+    stmt = medication_rows.select().where(UserMedication.user_id == user_id)
+    if active_only:
+        stmt = stmt.where(UserMedication.is_active == True)  # noqa: E712 (indexable)
+    return medication_rows.all(stmt.order_by(UserMedication.drug_name))
+
+
+def list_food_logs_by_date(user_id: int, day) -> list:
+    """Serialized food logs for one day (same order as FoodLog.get_user_logs_by_date)"""
+    return food_log_rows.all(food_log_rows.select().where(
+        FoodLog.user_id == user_id, FoodLog.logged_date == day
+    ).order_by(FoodLog.logged_at))
+
+
+def food_log_range(user_id: int, start_date, end_date):
+    """Unordered select of a user's logs in a date range (see FoodLog.range_query)"""
+    return food_log_rows.select().where(
+        FoodLog.user_id == user_id,
+        FoodLog.logged_date >= start_date,
+        FoodLog.logged_date <= end_date
+    )
+
+
+def list_favorite_foods(user_id: int) -> list:
+    """Serialized favorites, newest first"""
+    return favorite_food_rows.all(favorite_food_rows.select().where(
+        FavoriteFood.user_id == user_id
+    ).order_by(FavoriteFood.created_at.desc()))
@@ -15,8 +15,8 @@ class TokenBlacklist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(255), unique=True, nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    blacklisted_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    blacklisted_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
 
     @staticmethod
     def is_blacklisted(jti: str) -> bool:
@@ -25,19 +25,23 @@ class TokenBlacklist(db.Model):
 
     @staticmethod
     def blacklist_token(jti: str, user_id: int, expires_at: datetime):
-        """Add a token to the blacklist"""
+        """Add a token to the blacklist (and to this worker's revocation cache)"""
+        from app.services.revocation_cache import revocation_cache
+
         entry = TokenBlacklist(jti=jti, user_id=user_id, expires_at=expires_at)
         db.session.add(entry)
         db.session.commit()
+        revocation_cache.add(jti, expires_at)
         return entry
 
     @staticmethod
-    def cleanup_expired():
-        """Remove expired tokens from blacklist"""
-        TokenBlacklist.query.filter(
+    def cleanup_expired() -> int:
+        """Remove expired tokens from blacklist. Returns the number removed."""
+        removed = TokenBlacklist.query.filter(
             TokenBlacklist.expires_at < datetime.now(timezone.utc)
         ).delete()
         db.session.commit()
+        return removed
 
     def __repr__(self):
         return f'<TokenBlacklist {self.jti}>'
@@ -0,0 +1,34 @@
+"""
+Dialect Upserts
+INSERT ... ON CONFLICT DO UPDATE for the databases the app runs on (SQLite
+and PostgreSQL), so concurrent writers of the same key merge in one
+statement instead of racing a read-then-write
+"""
+
+
+def dialect_insert(bind):
+    """The insert() construct with on_conflict support for bind's dialect"""
+    name = bind.dialect.name
+    if name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {name}")
+    return insert
+
+
+def upsert(connection, model, rows: list, keys: list, update):
+    """
+    Insert rows, updating the existing row when one with the same keys exists
+    update: names of columns to overwrite with the incoming values, or a
+    callable(table, excluded) -> {column: expression}, e.g. to add to a count
+    """
+    if not rows:
+        return
+    stmt = dialect_insert(connection)(model)
+    if callable(update):
+        values = update(model.__table__.c, stmt.excluded)
+    else:
+        values = {name: stmt.excluded[name] for name in update}
+    connection.execute(stmt.on_conflict_do_update(index_elements=keys, set_=values), rows)
@@ -4,8 +4,8 @@ Handles user data and authentication
 """
 
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.services import password_service
 
 
 class User(db.Model):
@@ -21,12 +21,20 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False, index=True)
     last_login_at = db.Column(db.DateTime, nullable=True)
     deleted_at = db.Column(db.DateTime, nullable=True)
     password_reset_token = db.Column(db.String(255), nullable=True)
     password_reset_expires = db.Column(db.DateTime, nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        # partial: only the few users with a pending reset are indexed
+        db.Index('ix_users_password_reset_token', 'password_reset_token', unique=True,
+                 sqlite_where=db.text('password_reset_token IS NOT NULL'),
+                 postgresql_where=db.text('password_reset_token IS NOT NULL')),
+    )
+
     # Relationships
     medications = db.relationship('UserMedication', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     search_history = db.relationship('SearchHistory', backref='user', lazy='dynamic', cascade='all, delete-orphan')
@@ -40,16 +48,37 @@ class User(db.Model):
         self.last_name = last_name
     
     def set_password(self, password: str):
-        """Hash and set password"""
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256', salt_length=16)
+        """Hash and set password (PASSWORD_HASH_METHOD, on the hashing pool)"""
+        self.password_hash = password_service.hash_password(password)
     
-    def check_password(self, password: str) -> bool:
-        """Verify password against hash"""
-        return check_password_hash(self.password_hash, password)
+    def check_password(self, password: str, rehash: bool = False) -> bool:
+        """
+        Verify password against hash
+        With rehash=True, a correct password stored with outdated hashing
+        parameters is re-hashed with the current ones and committed
+        """
+        valid = password_service.verify_password(self.password_hash, password)
+        if valid and rehash and password_service.needs_rehash(self.password_hash):
+            self.set_password(password)
+            db.session.commit()
+        return valid
     
-    def update_last_login(self):
-        """Update last login timestamp"""
-        self.last_login_at = datetime.now(timezone.utc)
+    def update_last_login(self, deferred: bool = True):
+        """
+        Update last login timestamp
+        Queued on the write-behind queue when it is enabled; the loaded
+        object still reflects the new value
+        """
+        from sqlalchemy.orm.attributes import set_committed_value
+        from app.services.write_behind import write_behind
+
+        now = datetime.now(timezone.utc)
+        if deferred and write_behind.enabled:
+            set_committed_value(self, 'last_login_at', now)
+            write_behind.submit('last_login', {"user_id": self.id, "last_login_at": now})
+            return
+
+        self.last_login_at = now
         db.session.commit()
 
     def soft_delete(self):
@@ -70,8 +99,14 @@ class User(db.Model):
             return f"{self.first_name} {self.last_name}"
         return self.first_name or self.last_name or "User"
     
-    def to_dict(self, include_email: bool = True) -> dict:
-        """Serialize user to dictionary"""
+    def to_dict(self, include_email: bool = True, medication_count: int = None) -> dict:
+        """
+        Serialize user to dictionary
+        Pass medication_count (see User.medication_counts) when serializing
+        many users to avoid one COUNT query per user
+        """
+        if medication_count is None:
+            medication_count = self.medications.count()
         data = {
             "id": self.id,
             "first_name": self.first_name,
@@ -80,12 +115,25 @@ class User(db.Model):
             "is_active": self.is_active,
             "is_admin": self.is_admin,
             "created_at": self.created_at.isoformat() if self.created_at else None,
-            "medication_count": self.medications.count()
+            "medication_count": medication_count
         }
         if include_email:
             data["email"] = self.email
         return data
     
+    @staticmethod
+    def medication_counts(user_ids: list) -> dict:
+        """Get medication counts for many users in one grouped query"""
+        if not user_ids:
+            return {}
+        from app.models.medication import UserMedication
+        rows = db.session.query(
+            UserMedication.user_id, db.func.count(UserMedication.id)
+        ).filter(UserMedication.user_id.in_(user_ids)).group_by(UserMedication.user_id).all()
+        counts = {user_id: 0 for user_id in user_ids}
+        counts.update({user_id: count for user_id, count in rows})
+        return counts
+
     @staticmethod
     def find_by_email(email: str) -> 'User':
         """Find active (non-deleted) user by email"""
@@ -0,0 +1,93 @@
+"""
+Keyset Pagination
+Opaque cursor pagination over (timestamp, id)-style orderings, so that deep
+pages cost the same as the first one (no OFFSET scans)
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_, Select
+
+from app.errors import BadRequestError
+
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    encoded = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(encoded, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """
+    Decode a cursor back into typed sort-key values for the given columns
+    Raises BadRequestError for anything that was not produced by encode_cursor
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor length mismatch")
+
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if value is None:
+                decoded.append(None)
+            elif python_type is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                decoded.append(date.fromisoformat(value))
+            else:
+                decoded.append(python_type(value))
+        return decoded
+    except (ValueError, TypeError, UnicodeError, NotImplementedError):
+        raise BadRequestError("Invalid cursor", {"field": "cursor"})
+
+
+def _after(order: list, values: list):
+    """WHERE clause selecting rows strictly after the cursor position"""
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        equal_prefix = [col == value for (col, _), value in zip(order[:i], values[:i])]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def paginate_keyset(query, order: list, limit: int, cursor: Optional[str] = None) -> tuple:
+    """
+    Fetch one page of a query ordered by a unique sort key
+    query: an ORM query (items are model objects) or a Core select (items are
+    rows, which must include the sort columns under their attribute names)
+    order: [(column, descending), ...], ending in a unique column such as id
+    Returns: (items, next_cursor); next_cursor is None on the last page
+    """
+    columns = [column for column, _ in order]
+    if cursor:
+        query = query.filter(_after(order, decode_cursor(cursor, columns)))
+
+    query = query.order_by(*[col.desc() if descending else col.asc() for col, descending in order])
+    if isinstance(query, Select):
+        from app import db
+        items = db.session.execute(query.limit(limit + 1)).all()
+    else:
+        items = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return items, next_cursor
+
+
+def cursor_meta(limit: int, next_cursor: Optional[str]) -> dict:
+    """Pagination block included in cursor-paginated responses"""
+    return {
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
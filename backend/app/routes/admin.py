@@ -5,10 +5,11 @@ Endpoints for platform administration (requires admin role)
 
 from flask import Blueprint, request, g
 from app.services.auth_service import auth_required, admin_required
+from app.db_routing import read_replica
 from app.models.user import User
-from app.models.medication import UserMedication, SearchHistory, FoodLog, InteractionCheck
-from app.models.favorites import InteractionReport
 from app import db
+from app.pagination import paginate_keyset, cursor_meta
+from app.services.write_behind import write_behind
 from app.errors import (
     api_response,
     BadRequestError,
@@ -24,16 +25,19 @@ admin_bp = Blueprint('admin', __name__)
 @auth_required
 @admin_required
 @handle_exceptions
+@read_replica
 def list_users():
     """
-    List all users (paginated)
+    List all users, newest first (cursor paginated)
 
     Query Params:
-        page (int): Page number, default 1
         per_page (int): Results per page, default 20, max 100
+        cursor (str): next_cursor from the previous page
+        page (int): Legacy page number; uses OFFSET pagination when given
         include_deleted (bool): Include soft-deleted users, default false
+        include_total (bool): Add the matching user count to cursor pages
+            (a full COUNT, so off by default)
     """
-    page = max(request.args.get('page', 1, type=int), 1)
     per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
     include_deleted = request.args.get('include_deleted', 'false').lower() == 'true'
 
@@ -42,13 +46,37 @@ def list_users():
     if not include_deleted:
         query = query.filter(User.deleted_at.is_(None))
 
-    pagination = query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    if 'page' in request.args and 'cursor' not in request.args:
+        page = max(request.args.get('page', 1, type=int), 1)
+        pagination = query.order_by(User.created_at.desc(), User.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        items = pagination.items
+        pagination_data = {
+            "page": pagination.page,
+            "per_page": pagination.per_page,
+            "total": pagination.total,
+            "pages": pagination.pages,
+            "has_next": pagination.has_next,
+            "has_prev": pagination.has_prev
+        }
+    else:
+        items, next_cursor = paginate_keyset(
+            query, [(User.created_at, True), (User.id, True)],
+            per_page, request.args.get('cursor')
+        )
+        pagination_data = {
+            **cursor_meta(per_page, next_cursor),
+            "per_page": per_page
+        }
+        if request.args.get('include_total', 'false').lower() in ('true', '1'):
+            pagination_data["total"] = query.order_by(None).count()
+
+    medication_counts = User.medication_counts([user.id for user in items])
 
     users = []
-    for user in pagination.items:
-        user_data = user.to_dict()
+    for user in items:
+        user_data = user.to_dict(medication_count=medication_counts[user.id])
         user_data['is_admin'] = user.is_admin
         user_data['is_deleted'] = user.is_deleted
         user_data['last_login_at'] = user.last_login_at.isoformat() if user.last_login_at else None
@@ -57,14 +85,7 @@ def list_users():
     return api_response(
         data={
             "users": users,
-            "pagination": {
-                "page": pagination.page,
-                "per_page": pagination.per_page,
-                "total": pagination.total,
-                "pages": pagination.pages,
-                "has_next": pagination.has_next,
-                "has_prev": pagination.has_prev
-            }
+            "pagination": pagination_data
         },
         meta={"request_id": g.request_id}
     )
@@ -182,44 +203,30 @@ def create_user():
 @auth_required
 @admin_required
 @handle_exceptions
+@read_replica
 def platform_stats():
     """
     Get platform-wide statistics
 
     Returns:
         Total users, active users, total medications, total food logs,
-        total interaction checks, top drugs, top foods
+        total interaction checks, top drugs, top foods, write-behind queue metrics
+        Counts are read from incrementally maintained counters; stats_updated_at
+        is when they last changed (flask platform-stats rebuild recomputes them)
     """
-    from sqlalchemy import func
-
-    total_users = User.query.filter(User.deleted_at.is_(None)).count()
-    active_users = User.query.filter(
-        User.deleted_at.is_(None),
-        User.is_active.is_(True)
-    ).count()
-    total_medications = UserMedication.query.count()
-    total_food_logs = FoodLog.query.count()
-    total_checks = InteractionCheck.query.count()
-    total_searches = SearchHistory.query.count()
-    total_reports = InteractionReport.query.count()
-
-    # Top 10 most-added drugs
-    top_drugs = db.session.query(
-        UserMedication.drug_name,
-        func.count(UserMedication.id).label('count')
-    ).group_by(UserMedication.drug_name).order_by(
-        func.count(UserMedication.id).desc()
-    ).limit(10).all()
-
-    # Top 10 most-searched foods
-    top_foods = db.session.query(
-        SearchHistory.search_term,
-        func.count(SearchHistory.id).label('count')
-    ).filter_by(search_type='food').group_by(
-        SearchHistory.search_term
-    ).order_by(
-        func.count(SearchHistory.id).desc()
-    ).limit(10).all()
+    from app.models.platform_stats import PlatformCounter
+
+    snapshot = PlatformCounter.snapshot(top_n=10)
+    counters = snapshot["counters"]
+    total_users = counters["users"]
+    active_users = counters["active_users"]
+    total_medications = counters["medications"]
+    total_food_logs = counters["food_logs"]
+    total_checks = counters["interaction_checks"]
+    total_searches = counters["searches"]
+    total_reports = counters["interaction_reports"]
+    top_drugs = snapshot["top_drugs"]
+    top_foods = snapshot["top_foods"]
 
     return api_response(
         data={
@@ -235,7 +242,9 @@ def platform_stats():
                 "total_interaction_reports": total_reports
             },
             "top_drugs": [{"drug_name": d[0], "count": d[1]} for d in top_drugs],
-            "top_foods": [{"food_name": f[0], "count": f[1]} for f in top_foods]
+            "top_foods": [{"food_name": f[0], "count": f[1]} for f in top_foods],
+            "write_behind": write_behind.metrics(),
+            "stats_updated_at": snapshot["updated_at"]
         },
         meta={"request_id": g.request_id}
     )
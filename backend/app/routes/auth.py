@@ -18,10 +18,13 @@ from app.services.auth_service import (
     clear_password_reset_token,
     AuthenticationError
 )
+from app.services.retention_service import purge_user_archives
 from app.errors import (
     api_response,
+    AppError,
     BadRequestError,
     ValidationError,
+    NotFoundError,
     handle_exceptions
 )
 
@@ -105,7 +108,7 @@ def login():
     # Find user
     user = User.find_by_email(email)
     
-    if not user or not user.check_password(password):
+    if not user or not user.check_password(password, rehash=True):
         raise AuthenticationError("Invalid email or password")
     
     if not user.is_active:
@@ -203,7 +206,7 @@ def update_profile():
     if not data:
         raise BadRequestError("Request body must be JSON")
     
-    user = g.current_user
+    user = g.current_user.user
     
     if 'first_name' in data:
         user.first_name = data['first_name'].strip() or None
@@ -247,7 +250,7 @@ def change_password():
     if not current_password or not new_password:
         raise BadRequestError("Current password and new password are required")
     
-    user = g.current_user
+    user = g.current_user.user
     
     if not user.check_password(current_password):
         raise AuthenticationError("Current password is incorrect")
@@ -272,14 +275,14 @@ def logout():
     """
     Logout user by blacklisting the current token
     """
-    from app.services.auth_service import get_token_from_header
+    from app.services.auth_service import get_token_from_header, token_jti
     from app.models.token_blacklist import TokenBlacklist
     from datetime import datetime, timezone
 
     token = get_token_from_header()
     payload = decode_token(token)
 
-    jti = payload.get('jti', token[:32])  # Use first 32 chars as JTI if none
+    jti = token_jti(token, payload)
     exp = payload.get('exp')
     expires_at = datetime.fromtimestamp(exp, tz=timezone.utc) if exp else datetime.now(timezone.utc)
 
@@ -300,7 +303,7 @@ def logout():
 @handle_exceptions
 def delete_account():
     """
-    Soft-delete the current user's account
+    Soft-delete the current user's account and remove their archived history
     """
     data = request.get_json() or {}
     password = data.get('password', '')
@@ -308,11 +311,12 @@ def delete_account():
     if not password:
         raise BadRequestError("Password is required to delete account")
 
-    user = g.current_user
+    user = g.current_user.user
     if not user.check_password(password):
         raise AuthenticationError("Incorrect password")
 
     user.soft_delete()
+    purge_user_archives(user.id)
 
     return api_response(
         data={"message": "Account has been deactivated"},
@@ -397,14 +401,37 @@ def reset_password():
 def export_user_data():
     """
     Export all user data (GDPR data portability)
-    Returns a JSON dump of all user-related data
+
+    Query Params:
+        format (str): 'json' (default) for a single JSON document, 'ndjson'
+            to stream one {"section", "data"} record per line, or 'csv' to
+            stream one section as CSV
+        section (str): Section to export, required for csv
     """
     from app.models.medication import UserMedication, FoodLog, InteractionCheck, SearchHistory
     from app.models.favorites import FavoriteFood, MedicationReminder
+    from app.services import export_service
 
-    user = g.current_user
+    user = g.current_user.user
     user_id = user.id
 
+    fmt = export_service.parse_format(request.args.get('format'))
+    if fmt == 'ndjson':
+        return export_service.stream_response(
+            export_service.iter_user_records(user), fmt, f'medible-export-{user_id}'
+        )
+    if fmt == 'csv':
+        section = request.args.get('section')
+        if section not in export_service.EXPORT_SECTIONS:
+            raise BadRequestError(
+                f"section must be one of: {', '.join(export_service.EXPORT_SECTIONS)}",
+                {"field": "section"}
+            )
+        return export_service.stream_response(
+            export_service.iter_dicts(export_service.section_statement(section, user_id)),
+            fmt, f'medible-{section}-{user_id}'
+        )
+
     medications = UserMedication.query.filter_by(user_id=user_id).all()
     food_logs = FoodLog.query.filter_by(user_id=user_id).order_by(FoodLog.logged_date.desc()).all()
     interaction_checks = InteractionCheck.query.filter_by(user_id=user_id).all()
@@ -428,4 +455,67 @@ def export_user_data():
     return api_response(
         data={"export": export},
         meta={"request_id": g.request_id}
-    )
\ No newline at end of file
+    )
+
+@auth_bp.route('/me/export/jobs', methods=['POST'])
+@auth_required
+@handle_exceptions
+def create_export_job():
+    """
+    Start a background export of all user data
+    The job writes gzipped NDJSON; poll the job and download it once complete
+    """
+    from app.services.export_service import start_export_job
+
+    job = start_export_job(g.current_user.id)
+
+    return api_response(
+        data={"job": job.to_dict()},
+        meta={"request_id": g.request_id},
+        status_code=202
+    )
+
+
+@auth_bp.route('/me/export/jobs/<job_id>', methods=['GET'])
+@auth_required
+@handle_exceptions
+def get_export_job(job_id):
+    """Get the status of an export job (failed if it was lost in a restart)"""
+    from app.models.export_job import ExportJob
+    from app.services.export_service import fail_stale_jobs
+
+    job = ExportJob.get_for_user(job_id, g.current_user.id)
+    if not job or job.is_expired:
+        raise NotFoundError("Export job not found", {"job_id": job_id})
+    if job.status in ('pending', 'running'):
+        fail_stale_jobs(job.id)
+
+    return api_response(
+        data={"job": job.to_dict()},
+        meta={"request_id": g.request_id}
+    )
+
+
+@auth_bp.route('/me/export/jobs/<job_id>/download', methods=['GET'])
+@auth_required
+@handle_exceptions
+def download_export_job(job_id):
+    """Download the gzipped NDJSON file of a completed export job"""
+    import os
+    from flask import send_file
+    from app.models.export_job import ExportJob
+
+    job = ExportJob.get_for_user(job_id, g.current_user.id)
+    if not job or job.is_expired:
+        raise NotFoundError("Export job not found", {"job_id": job_id})
+    if job.status != 'complete':
+        raise AppError("Export is not ready", 409, "EXPORT_NOT_READY", {"status": job.status})
+    if not job.file_path or not os.path.exists(job.file_path):
+        raise NotFoundError("Export file not found", {"job_id": job_id})
+
+    return send_file(
+        job.file_path,
+        mimetype='application/gzip',
+        as_attachment=True,
+        download_name=f'medible-export-{job.id}.ndjson.gz'
+    )
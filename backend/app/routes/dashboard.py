@@ -6,6 +6,7 @@ Aggregated stats and alerts for the authenticated user
 from datetime import datetime, date, timezone
 from flask import Blueprint, g
 from app.services.auth_service import auth_required
+from app.db_routing import read_replica
 from app.models.medication import UserMedication, FoodLog, InteractionCheck
 from app.services.openfda_service import get_drug_recalls
 from app.services.interaction_service import get_drug_interactions
@@ -17,6 +18,7 @@ dashboard_bp = Blueprint('dashboard', __name__)
 @dashboard_bp.route('/summary', methods=['GET'])
 @auth_required
 @handle_exceptions
+@read_replica
 def get_summary():
     """
     Get aggregated dashboard summary for the current user
@@ -42,19 +44,8 @@ def get_summary():
     recent_checks = InteractionCheck.get_user_history(user_id, limit=5)
 
     # Food diary streak
-    from app import db
-    from sqlalchemy import func
-    streak = 0
-    check_date = today
-    while True:
-        has_logs = FoodLog.query.filter_by(user_id=user_id).filter(
-            func.date(FoodLog.logged_date) == check_date
-        ).first()
-        if has_logs:
-            streak += 1
-            check_date = date.fromordinal(check_date.toordinal() - 1)
-        else:
-            break
+    from app.models.nutrition_rollup import DailyNutritionRollup
+    streak = DailyNutritionRollup.get_current_streak(user_id, today)
 
     return api_response(
         data={
@@ -118,39 +109,24 @@ def get_alerts():
                         "date": recall.get('recall_date')
                     })
 
-    # Check today's food logs for high-severity interactions
-    from sqlalchemy import func
-    today_foods = FoodLog.query.filter_by(user_id=user_id).filter(
-        func.date(FoodLog.logged_date) == today
-    ).all()
-
-    med_names = UserMedication.get_user_medication_names(user_id, active_only=True)
+    # Check today's food logs for high-severity interactions (stored when logged)
+    today_foods = FoodLog.get_user_logs_by_date(user_id, today)
+    med_names = [med.drug_name for med in active_meds]
 
     if today_foods and med_names:
-        from app.services.interaction_service import check_food_against_medications
-        checked_foods = set()
-        for food_log in today_foods:
-            food_name = food_log.food_name.lower()
-            if food_name in checked_foods:
-                continue
-            checked_foods.add(food_name)
-
-            try:
-                result = check_food_against_medications(food_name, med_names)
-                # 'warnings' is a dict: {"high": [...], "medium": [...], "low": [...]}
-                high_warnings = result.get('warnings', {}).get('high', [])
-                for warning in high_warnings:
-                    alerts.append({
-                        "type": "interaction",
-                        "severity": "high",
-                        "food": food_name,
-                        "medication": warning.get('drug', ''),
-                        "title": f"High-risk interaction: {food_name.capitalize()}",
-                        "message": warning.get('effect', 'Potential interaction detected'),
-                        "recommendation": warning.get('recommendation', '')
-                    })
-            except Exception:
-                pass
+        from app.services.food_log_service import screened_results
+        for food_name, stored in screened_results(today_foods, med_names).items():
+            # 'warnings' is a dict: {"high": [...], "medium": [...], "low": [...]}
+            for warning in stored["warnings"].get('high', []):
+                alerts.append({
+                    "type": "interaction",
+                    "severity": "high",
+                    "food": food_name,
+                    "medication": warning.get('drug', ''),
+                    "title": f"High-risk interaction: {food_name.capitalize()}",
+                    "message": warning.get('effect', 'Potential interaction detected'),
+                    "recommendation": warning.get('recommendation', '')
+                })
 
     return api_response(
         data={
@@ -4,7 +4,10 @@ Handles drug search, adverse events, and recall information
 """
 
 from flask import Blueprint, request, g
+from app import http_cache
 from app.services.openfda_service import search_drug, get_adverse_events, get_drug_recalls
+from app.services.auth_service import auth_optional
+from app.models.medication import SearchHistory
 from app.errors import api_response, BadRequestError, ValidationError, handle_exceptions
 
 drugs_bp = Blueprint('drugs', __name__)
@@ -27,7 +30,9 @@ def validate_query(query: str, field_name: str = "q") -> str:
 
 
 @drugs_bp.route('/search', methods=['GET'])
+@auth_optional
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def search_drugs():
     """
     Search drugs by brand or generic name
@@ -41,6 +46,7 @@ def search_drugs():
     """
     query = validate_query(request.args.get('q', ''))
     limit = validate_limit(request.args.get('limit', 5, type=int))
+    http_cache.validate(lambda: http_cache.stamp(search_drug.cached_at(query, limit)))
     
     result = search_drug(query, limit)
     
@@ -48,6 +54,9 @@ def search_drugs():
         from app.errors import ExternalAPIError
         raise ExternalAPIError(result.get('error', 'OpenFDA API error'), {"service": "openfda"})
     
+    SearchHistory.log_search('drug', query, user_id=g.current_user.id if g.current_user else None,
+                             results_count=result.get('count', 0))
+    
     return api_response(
         data={
             "query": query,
@@ -64,6 +73,7 @@ def search_drugs():
 
 @drugs_bp.route('/adverse-events', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def adverse_events():
     """
     Get adverse event reports for a drug
@@ -74,6 +84,7 @@ def adverse_events():
     """
     drug_name = validate_query(request.args.get('drug', ''), 'drug')
     limit = validate_limit(request.args.get('limit', 5, type=int))
+    http_cache.validate(lambda: http_cache.stamp(get_adverse_events.cached_at(drug_name, limit)))
     
     result = get_adverse_events(drug_name, limit)
     
@@ -97,6 +108,7 @@ def adverse_events():
 
 @drugs_bp.route('/recalls', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def recalls():
     """
     Check for drug recalls
@@ -107,6 +119,7 @@ def recalls():
     """
     drug_name = validate_query(request.args.get('drug', ''), 'drug')
     limit = validate_limit(request.args.get('limit', 5, type=int))
+    http_cache.validate(lambda: http_cache.stamp(get_drug_recalls.cached_at(drug_name, limit)))
     
     result = get_drug_recalls(drug_name, limit)
     
@@ -130,6 +143,7 @@ def recalls():
 
 @drugs_bp.route('/<string:drug_id>', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def get_drug_detail(drug_id: str):
     """
     Get full drug label information by application number or name
@@ -142,6 +156,7 @@ def get_drug_detail(drug_id: str):
         raise BadRequestError("Drug ID is required")
 
     from app.services.openfda_service import get_drug_detail as fetch_drug_detail
+    http_cache.validate(lambda: http_cache.stamp(fetch_drug_detail.cached_at(drug_id)))
     result = fetch_drug_detail(drug_id)
 
     if not result.get('success'):
@@ -165,6 +180,7 @@ def get_drug_detail(drug_id: str):
 
 @drugs_bp.route('/interactions/<string:drug_name>', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def drug_drug_interactions(drug_name: str):
     """
     Get drug-drug interaction info from the FDA label
@@ -175,6 +191,7 @@ def drug_drug_interactions(drug_name: str):
     drug_name = validate_query(drug_name, 'drug_name')
 
     from app.services.openfda_service import get_drug_drug_interactions
+    http_cache.validate(lambda: http_cache.stamp(get_drug_drug_interactions.cached_at(drug_name)))
     result = get_drug_drug_interactions(drug_name)
 
     if not result.get('success'):
@@ -197,6 +214,7 @@ def drug_drug_interactions(drug_name: str):
 
 @drugs_bp.route('/side-effects', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def side_effects():
     """
     Get side effects / adverse reactions from the FDA label
@@ -207,6 +225,7 @@ def side_effects():
     drug_name = validate_query(request.args.get('drug', ''), 'drug')
 
     from app.services.openfda_service import get_side_effects as fetch_side_effects
+    http_cache.validate(lambda: http_cache.stamp(fetch_side_effects.cached_at(drug_name)))
     result = fetch_side_effects(drug_name)
 
     if not result.get('success'):
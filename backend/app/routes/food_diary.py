@@ -4,17 +4,23 @@ Handles user food logging and daily intake tracking
 """
 
 from datetime import datetime, date, timedelta
-from flask import Blueprint, request, g
+from flask import Blueprint, request, g, current_app
 from app.services.auth_service import auth_required
+from app.db_routing import read_replica
 from app import db
 from app.models.medication import FoodLog
+from app.models.nutrition_rollup import DailyNutritionRollup
+from app.models import rows
 from app.errors import api_response, BadRequestError, NotFoundError
+from app.pagination import paginate_keyset, cursor_meta
+from app.services import export_service, food_log_service
 
 food_diary_bp = Blueprint('food_diary', __name__)
 
 
 @food_diary_bp.route('', methods=['GET'])
 @auth_required
+@read_replica
 def get_food_logs():
     """
     Get user's food logs
@@ -24,6 +30,11 @@ def get_food_logs():
         start_date (str): Start of date range
         end_date (str): End of date range
         days (int): Last N days, default 7
+        limit (int): Entries per page for ranges, default 500, max 1000
+        cursor (str): next_cursor from the previous page
+
+    Ranges are paginated: total_entries counts the whole range, page_entries
+    this page; follow pagination.next_cursor while pagination.has_more.
     """
     user_id = g.current_user.id
     
@@ -35,12 +46,12 @@ def get_food_logs():
         except ValueError:
             raise BadRequestError("Invalid date format. Use YYYY-MM-DD", {"field": "date"})
         
-        logs = FoodLog.get_user_logs_by_date(user_id, log_date)
+        logs = rows.list_food_logs_by_date(user_id, log_date)
         totals = FoodLog.get_daily_totals(user_id, log_date)
         
         return api_response({
             "date": log_date.isoformat(),
-            "logs": [log.to_dict() for log in logs],
+            "logs": logs,
             "totals": totals
         })
     
@@ -60,46 +71,51 @@ def get_food_logs():
         end_date = date.today()
         start_date = end_date - timedelta(days=days - 1)
     
-    logs = FoodLog.get_user_logs_range(user_id, start_date, end_date)
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 1000)
+    logs, next_cursor = paginate_keyset(
+        rows.food_log_range(user_id, start_date, end_date),
+        FoodLog.keyset_order(), limit, request.args.get('cursor')
+    )
     
     # Group by date
     by_date = {}
-    for log in logs:
-        date_key = log.logged_date.isoformat()
-        if date_key not in by_date:
-            by_date[date_key] = []
-        by_date[date_key].append(log.to_dict())
+    for row in logs:
+        log = rows.food_log_rows(row)
+        by_date.setdefault(log["logged_date"], []).append(log)
     
     return api_response({
         "start_date": start_date.isoformat(),
         "end_date": end_date.isoformat(),
         "logs_by_date": by_date,
-        "total_entries": len(logs)
+        "total_entries": DailyNutritionRollup.count_entries(user_id, start_date, end_date),
+        "page_entries": len(logs),
+        "pagination": cursor_meta(limit, next_cursor)
     })
 
 
 @food_diary_bp.route('/today', methods=['GET'])
 @auth_required
+@read_replica
 def get_today_logs():
     """Get today's food logs with totals"""
     user_id = g.current_user.id
     today = date.today()
     
-    logs = FoodLog.get_user_logs_by_date(user_id, today)
+    logs = rows.list_food_logs_by_date(user_id, today)
     totals = FoodLog.get_daily_totals(user_id, today)
     
     # Group by meal type
     by_meal = {"breakfast": [], "lunch": [], "dinner": [], "snack": [], "other": []}
     for log in logs:
-        meal = log.meal_type or "other"
+        meal = log["meal_type"] or "other"
         if meal in by_meal:
-            by_meal[meal].append(log.to_dict())
+            by_meal[meal].append(log)
         else:
-            by_meal["other"].append(log.to_dict())
+            by_meal["other"].append(log)
     
     return api_response({
         "date": today.isoformat(),
-        "logs": [log.to_dict() for log in logs],
+        "logs": logs,
         "by_meal": by_meal,
         "totals": totals
     })
@@ -125,41 +141,9 @@ def add_food_log():
     user_id = g.current_user.id
     data = request.get_json() or {}
     
-    food_name = data.get('food_name', '').strip()
-    if not food_name:
-        raise BadRequestError("Food name is required", {"field": "food_name"})
-    
-    # Parse date
-    date_str = data.get('logged_date')
-    if date_str:
-        try:
-            log_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            raise BadRequestError("Invalid date format. Use YYYY-MM-DD", {"field": "logged_date"})
-    else:
-        log_date = date.today()
-    
-    food_log = FoodLog(
-        user_id=user_id,
-        food_name=food_name,
-        fdc_id=data.get('fdc_id'),
-        brand_owner=data.get('brand_owner'),
-        servings=data.get('servings', 1.0),
-        serving_size=data.get('serving_size'),
-        serving_unit=data.get('serving_unit', 'g'),
-        calories=data.get('calories'),
-        protein=data.get('protein'),
-        carbs=data.get('carbs'),
-        fat=data.get('fat'),
-        fiber=data.get('fiber'),
-        sugar=data.get('sugar'),
-        sodium=data.get('sodium'),
-        meal_type=data.get('meal_type'),
-        notes=data.get('notes'),
-        logged_date=log_date,
-        had_interaction=data.get('had_interaction'),
-        interaction_count=data.get('interaction_count', 0)
-    )
+    row = food_log_service.build_row(user_id, data)
+    food_log_service.screen_rows(user_id, [row], fetch_labels=False)
+    food_log = FoodLog(**row)
     
     db.session.add(food_log)
     db.session.commit()
@@ -167,6 +151,49 @@ def add_food_log():
     return api_response({"food_log": food_log.to_dict()}, status_code=201)
 
 
+@food_diary_bp.route('/import', methods=['POST'])
+@auth_required
+def import_food_logs():
+    """
+    Bulk-add food log entries in one transaction
+    
+    Body: either JSON {"entries": [...]} (or a bare array) of objects shaped
+    like POST /food-diary, or a multipart upload with a CSV 'file' whose
+    header row names the same fields. Interaction flags are computed on the
+    server against the user's active medications.
+    
+    Returns what was imported and skipped (with row numbers), the days whose
+    totals changed, and the foods that interact with the user's medications
+    """
+    user_id = g.current_user.id
+    limit = current_app.config.get('FOOD_LOG_IMPORT_MAX', 5000)
+    
+    upload = request.files.get('file')
+    if upload is not None:
+        entries = food_log_service.iter_csv_entries(upload.stream)
+    else:
+        data = request.get_json(silent=True)
+        entries = data.get('entries') if isinstance(data, dict) else data
+        if not isinstance(entries, list) or not entries:
+            raise BadRequestError(
+                "Provide an 'entries' array or a CSV 'file' upload",
+                {"field": "entries"}
+            )
+    
+    rows, skipped = food_log_service.build_rows(user_id, entries, limit)
+    if not rows and not skipped:
+        raise BadRequestError("No entries to import", {"field": "file"})
+    result = food_log_service.ingest(user_id, rows)
+    
+    return api_response({
+        "imported_count": result["imported_count"],
+        "skipped_count": len(skipped),
+        "skipped": skipped,
+        "days_affected": result["days_affected"],
+        "interactions": result["interactions"]
+    }, status_code=201 if rows else 200)
+
+
 @food_diary_bp.route('/<int:log_id>', methods=['DELETE'])
 @auth_required
 def delete_food_log(log_id: int):
@@ -194,15 +221,21 @@ def update_food_log(log_id: int):
     if not food_log:
         raise NotFoundError("Food log not found", {"id": log_id})
     
-    # Update allowed fields
+    # Update allowed fields (interaction flags are computed, not client-set)
     updatable = ['food_name', 'servings', 'serving_size', 'serving_unit',
                  'calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar', 'sodium',
-                 'meal_type', 'notes', 'had_interaction', 'interaction_count']
+                 'meal_type', 'notes']
     
     for field in updatable:
         if field in data:
             setattr(food_log, field, data[field])
     
+    if 'food_name' in data:
+        row = food_log_service.screen_rows(user_id, [{"food_name": food_log.food_name}],
+                                           fetch_labels=False)[0]
+        for field in food_log_service.SCREENING_FIELDS:
+            setattr(food_log, field, row[field])
+    
     db.session.commit()
     
     return api_response({"food_log": food_log.to_dict()})
@@ -210,6 +243,7 @@ def update_food_log(log_id: int):
 
 @food_diary_bp.route('/summary', methods=['GET'])
 @auth_required
+@read_replica
 def get_summary():
     """
     Get nutrition summary for date range
@@ -224,9 +258,7 @@ def get_summary():
     start_date = end_date - timedelta(days=days - 1)
     
     daily_summaries = []
-    for i in range(days):
-        current_date = start_date + timedelta(days=i)
-        totals = FoodLog.get_daily_totals(user_id, current_date)
+    for current_date, totals in FoodLog.get_daily_totals_range(user_id, start_date, end_date).items():
         totals["date"] = current_date.isoformat()
         daily_summaries.append(totals)
     
@@ -255,6 +287,7 @@ def get_summary():
 
 @food_diary_bp.route('/weekly', methods=['GET'])
 @auth_required
+@read_replica
 def get_weekly_summary():
     """
     Get weekly nutrition summary with averages per day
@@ -264,9 +297,7 @@ def get_weekly_summary():
     start_date = end_date - timedelta(days=6)
 
     daily_data = []
-    for i in range(7):
-        current_date = start_date + timedelta(days=i)
-        totals = FoodLog.get_daily_totals(user_id, current_date)
+    for current_date, totals in FoodLog.get_daily_totals_range(user_id, start_date, end_date).items():
         totals["date"] = current_date.isoformat()
         totals["day_name"] = current_date.strftime("%A")
         daily_data.append(totals)
@@ -292,40 +323,24 @@ def get_weekly_summary():
 
 @food_diary_bp.route('/streaks', methods=['GET'])
 @auth_required
+@read_replica
 def get_streaks():
     """
     Get food diary logging streak info
     """
-    from sqlalchemy import func
+    from app.models.nutrition_rollup import DailyNutritionRollup
 
     user_id = g.current_user.id
     today = date.today()
 
-    # Current streak
-    current_streak = 0
-    check_date = today
-    while True:
-        has_logs = FoodLog.query.filter_by(user_id=user_id).filter(
-            func.date(FoodLog.logged_date) == check_date
-        ).first()
-        if has_logs:
-            current_streak += 1
-            check_date = date.fromordinal(check_date.toordinal() - 1)
-        else:
-            break
-
-    # Total days ever logged
-    total_days = db.session.query(
-        func.count(func.distinct(FoodLog.logged_date))
-    ).filter_by(user_id=user_id).scalar() or 0
-
-    # Total entries
-    total_entries = FoodLog.query.filter_by(user_id=user_id).count()
+    # Streak is maintained on today's rollup row
+    current_streak = DailyNutritionRollup.get_current_streak(user_id, today)
+    totals = DailyNutritionRollup.get_user_totals(user_id)
 
     return api_response({
         "current_streak": current_streak,
-        "total_days_logged": total_days,
-        "total_entries": total_entries,
+        "total_days_logged": totals["total_days_logged"],
+        "total_entries": totals["total_entries"],
         "today_logged": current_streak > 0
     })
 
@@ -334,25 +349,49 @@ def get_streaks():
 @auth_required
 def export_food_diary():
     """
-    Export food diary as JSON
+    Export food diary
 
     Query Params:
         days (int): Number of days to export, default 30
-        format (str): 'json' (default)
+        format (str): 'json' (default, paginated), or 'ndjson' / 'csv' to
+            stream the whole range in one response
+        limit (int): Entries per page for json, default 1000, max 5000
+        cursor (str): next_cursor from the previous page
+
+    JSON exports are paginated: total_entries counts the whole range,
+    page_entries this page; follow pagination.next_cursor while
+    pagination.has_more.
     """
     user_id = g.current_user.id
     days = request.args.get('days', 30, type=int)
+    limit = min(max(request.args.get('limit', 1000, type=int), 1), 5000)
+    fmt = export_service.parse_format(request.args.get('format'))
 
     end_date = date.today()
     start_date = end_date - timedelta(days=days - 1)
 
-    logs = FoodLog.get_user_logs_range(user_id, start_date, end_date)
+    if fmt != 'json':
+        stmt = export_service.section_statement('food_logs', user_id).where(
+            FoodLog.logged_date >= start_date,
+            FoodLog.logged_date <= end_date
+        )
+        return export_service.stream_response(
+            export_service.iter_dicts(stmt), fmt,
+            f'food-diary-{start_date.isoformat()}-{end_date.isoformat()}'
+        )
+
+    logs, next_cursor = paginate_keyset(
+        FoodLog.range_query(user_id, start_date, end_date),
+        FoodLog.keyset_order(), limit, request.args.get('cursor')
+    )
 
     return api_response({
         "export": {
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
-            "total_entries": len(logs),
+            "total_entries": DailyNutritionRollup.count_entries(user_id, start_date, end_date),
+            "page_entries": len(logs),
             "logs": [log.to_dict() for log in logs]
-        }
+        },
+        "pagination": cursor_meta(limit, next_cursor)
     })
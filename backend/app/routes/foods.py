@@ -3,12 +3,26 @@ Food Routes - USDA FoodData Central API Integration
 Handles food search and nutrition information
 """
 
-from flask import Blueprint, request, g
+import re
+import atexit
+import threading
+import concurrent.futures
+from flask import Blueprint, request, g, current_app
+from app import http_cache
 from app.services.usda_service import search_food, get_food_details
+from app.services.cache import TTLCache
+from app.services.auth_service import auth_optional
+from app.models.medication import SearchHistory
 from app.errors import api_response, BadRequestError, ValidationError, NotFoundError, ExternalAPIError, handle_exceptions
 
 foods_bp = Blueprint('foods', __name__)
 
+# Shared pool for unified search fan-out. Not a per-request `with` block:
+# shutting that down would wait for a timed-out upstream and void the deadline.
+_search_executor = None
+_search_executor_lock = threading.Lock()
+_unified_search_cache = TTLCache(maxsize=512)
+
 
 def validate_limit(limit: int, max_limit: int = 50) -> int:
     """Validate and cap limit parameter"""
@@ -27,7 +41,9 @@ def validate_query(query: str, field_name: str = "q") -> str:
 
 
 @foods_bp.route('/search', methods=['GET'])
+@auth_optional
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def search_foods():
     """
     Search foods by name
@@ -41,12 +57,16 @@ def search_foods():
     """
     query = validate_query(request.args.get('q', ''))
     limit = validate_limit(request.args.get('limit', 10, type=int))
+    http_cache.validate(lambda: http_cache.stamp(search_food.cached_at(query, limit)))
     
     result = search_food(query, limit)
     
     if not result.get('success'):
         raise ExternalAPIError(result.get('error', 'USDA API error'), {"service": "usda"})
     
+    SearchHistory.log_search('food', query, user_id=g.current_user.id if g.current_user else None,
+                             results_count=result.get('count', 0))
+    
     return api_response(
         data={
             "query": query,
@@ -64,6 +84,7 @@ def search_foods():
 
 @foods_bp.route('/<int:fdc_id>', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def get_food(fdc_id: int):
     """
     Get detailed nutrition info for a specific food
@@ -76,6 +97,7 @@ def get_food(fdc_id: int):
     """
     if fdc_id < 1:
         raise ValidationError("Invalid FDC ID", {"field": "fdc_id", "value": fdc_id})
+    http_cache.validate(lambda: http_cache.stamp(get_food_details.cached_at(fdc_id)))
     
     result = get_food_details(fdc_id)
     
@@ -104,13 +126,13 @@ def get_favorites():
     """Get user's favorite foods"""
     from app.services.auth_service import auth_required, get_current_user
     get_current_user()
-    from app.models.favorites import FavoriteFood
+    from app.models import rows
 
-    favorites = FavoriteFood.get_user_favorites(g.current_user.id)
+    favorites = rows.list_favorite_foods(g.current_user.id)
 
     return api_response(
         data={
-            "favorites": [f.to_dict() for f in favorites],
+            "favorites": favorites,
             "count": len(favorites)
         },
         meta={"request_id": g.request_id}
@@ -213,11 +235,119 @@ def get_recent_foods():
     )
 
 
+def _search_usda(query: str, limit: int) -> dict:
+    return search_food(query, limit)
+
+
+def _search_off(query: str, limit: int) -> dict:
+    from app.services.openfoodfacts_service import search_products
+    return search_products(query, limit)
+
+
+def _run_in_app_context(app, fn, *args):
+    with app.app_context():
+        return fn(*args)
+
+
+def _get_search_executor(app) -> concurrent.futures.ThreadPoolExecutor:
+    """The worker's fan-out pool, sized by UNIFIED_SEARCH_MAX_WORKERS on first use"""
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is None:
+            _search_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(int(app.config.get('UNIFIED_SEARCH_MAX_WORKERS', 16)), 1),
+                thread_name_prefix='unified-search'
+            )
+        return _search_executor
+
+
+def shutdown_search_executor():
+    """Stop the fan-out pool without waiting on slow upstreams (restarted on next use)"""
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is not None:
+            _search_executor.shutdown(wait=False, cancel_futures=True)
+        _search_executor = None
+
+
+atexit.register(shutdown_search_executor)
+
+
+def _normalize_food_name(name: str) -> str:
+    """Normalize a food/product name for cross-source deduplication"""
+    return re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).strip()
+
+
+def _merge_results(usda_foods: list, off_products: list) -> list:
+    """
+    Merge USDA and Open Food Facts results into one list
+    Items are deduplicated by normalized GTIN; the normalized name is only
+    used when one of the two items has no GTIN (different GTINs never merge)
+    """
+    from app.services.openfoodfacts_service import normalize_barcode
+
+    merged = []
+    by_gtin = {}
+    by_name = {}
+
+    candidates = [
+        {
+            "source": "usda",
+            "name": food.get("description", ""),
+            "brand": food.get("brand_owner"),
+            "gtin": normalize_barcode(food.get("gtin_upc")),
+            "fdc_id": food.get("fdc_id"),
+            "off_id": None,
+        }
+        for food in usda_foods
+    ] + [
+        {
+            "source": "openfoodfacts",
+            "name": product.get("product_name", ""),
+            "brand": product.get("brands"),
+            "gtin": normalize_barcode(product.get("off_id")),
+            "fdc_id": None,
+            "off_id": product.get("off_id"),
+        }
+        for product in off_products
+    ]
+
+    for item in candidates:
+        name_key = _normalize_food_name(item["name"])
+        existing = by_gtin.get(item["gtin"]) if item["gtin"] else None
+        if existing is None:
+            existing = by_name.get(name_key)
+            if existing and existing["gtin"] and item["gtin"]:
+                existing = None
+
+        if existing:
+            if item["source"] not in existing["sources"]:
+                existing["sources"].append(item["source"])
+            existing["fdc_id"] = existing["fdc_id"] or item["fdc_id"]
+            existing["off_id"] = existing["off_id"] or item["off_id"]
+            existing["gtin"] = existing["gtin"] or item["gtin"]
+        else:
+            existing = {**item, "sources": [item["source"]]}
+            del existing["source"]
+            merged.append(existing)
+
+        if existing["gtin"]:
+            by_gtin.setdefault(existing["gtin"], existing)
+        if name_key:
+            by_name.setdefault(name_key, existing)
+
+    return merged
+
+
 @foods_bp.route('/unified-search', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def unified_search():
     """
-    Search across both USDA and Open Food Facts simultaneously
+    Search across both USDA and Open Food Facts concurrently
+
+    Both sources share a single deadline (UNIFIED_SEARCH_DEADLINE); whatever
+    arrived in time is returned, with a per-source status / timed_out flag.
 
     Query Params:
         q (str): Search query (required)
@@ -228,37 +358,89 @@ def unified_search():
     limit = validate_limit(request.args.get('limit', 5, type=int), max_limit=20)
     source = request.args.get('source', 'all').lower()
 
-    results = {"usda": [], "openfoodfacts": []}
+    cache_key = (query.lower(), limit, source)
 
-    if source in ('all', 'usda'):
-        usda_result = search_food(query, limit)
-        if usda_result.get('success'):
-            results["usda"] = usda_result.get('foods', [])
+    def cached_at():
+        entry = _unified_search_cache.get_entry(cache_key)
+        return (entry[1],) if entry else None
+    http_cache.validate(cached_at)
 
+    cached = _unified_search_cache.get(cache_key)
+    if cached is not None:
+        return api_response(
+            data=cached,
+            meta={"request_id": g.request_id, "cached": True,
+                  "sources_queried": list(cached["sources"].keys())}
+        )
+
+    fetchers = {}
+    if source in ('all', 'usda'):
+        fetchers["usda"] = _search_usda
     if source in ('all', 'off'):
-        from app.services.openfoodfacts_service import search_products
-        off_result = search_products(query, limit)
-        if off_result.get('success'):
-            results["openfoodfacts"] = off_result.get('products', [])
+        fetchers["openfoodfacts"] = _search_off
 
+    app = current_app._get_current_object()
+    deadline = app.config.get('UNIFIED_SEARCH_DEADLINE', 4.0)
+    executor = _get_search_executor(app)
+    futures = {
+        name: executor.submit(_run_in_app_context, app, fetch, query, limit)
+        for name, fetch in fetchers.items()
+    }
+    concurrent.futures.wait(futures.values(), timeout=deadline)
+
+    results = {"usda": [], "openfoodfacts": []}
+    statuses = {}
+    for name, future in futures.items():
+        if not future.done():
+            statuses[name] = {"status": "timeout", "timed_out": True}
+            continue
+        try:
+            result = future.result()
+        except Exception as e:
+            current_app.logger.warning(f"Unified search {name} failed: {e}")
+            result = {"success": False, "error": "Unexpected error"}
+
+        if result.get('success'):
+            key = 'foods' if name == 'usda' else 'products'
+            results[name] = result.get(key, [])
+            statuses[name] = {"status": "ok", "timed_out": False}
+        else:
+            statuses[name] = {"status": "error", "timed_out": False, "error": result.get('error')}
+
+    merged = _merge_results(results["usda"], results["openfoodfacts"])
     total_count = len(results["usda"]) + len(results["openfoodfacts"])
+    partial = any(s["status"] != "ok" for s in statuses.values())
+
+    data = {
+        "query": query,
+        "source": source,
+        "total_count": total_count,
+        "partial": partial,
+        "sources": statuses,
+        "usda": {
+            "count": len(results["usda"]),
+            "foods": results["usda"],
+            **statuses.get("usda", {"status": "skipped", "timed_out": False})
+        },
+        "openfoodfacts": {
+            "count": len(results["openfoodfacts"]),
+            "products": results["openfoodfacts"],
+            **statuses.get("openfoodfacts", {"status": "skipped", "timed_out": False})
+        },
+        "merged": merged,
+        "merged_count": len(merged)
+    }
+
+    # Only complete answers are cached; partial ones should be retried
+    if partial:
+        http_cache.no_store()
+    else:
+        _unified_search_cache.set(cache_key, data, ttl=app.config.get('UNIFIED_SEARCH_CACHE_TTL', 300))
 
     return api_response(
-        data={
-            "query": query,
-            "source": source,
-            "total_count": total_count,
-            "usda": {
-                "count": len(results["usda"]),
-                "foods": results["usda"]
-            },
-            "openfoodfacts": {
-                "count": len(results["openfoodfacts"]),
-                "products": results["openfoodfacts"]
-            }
-        },
+        data=data,
         meta={
             "request_id": g.request_id,
-            "sources_queried": ["usda", "openfoodfacts"] if source == 'all' else [source]
+            "sources_queried": list(fetchers.keys())
         }
-    )
\ No newline at end of file
+    )
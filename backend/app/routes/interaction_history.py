@@ -5,8 +5,11 @@ CRUD operations for user's interaction check history
 
 from flask import Blueprint, request, g
 from app.services.auth_service import auth_required
+from app.db_routing import read_replica
 from app.errors import api_response, BadRequestError, NotFoundError
 from app.models.medication import InteractionCheck
+from app.models import rows
+from app.pagination import paginate_keyset, cursor_meta
 from app import db
 
 interaction_history_bp = Blueprint('interaction_history', __name__)
@@ -14,25 +17,32 @@ interaction_history_bp = Blueprint('interaction_history', __name__)
 
 @interaction_history_bp.route('', methods=['GET'])
 @auth_required
+@read_replica
 def get_history():
     """
     Get user's interaction check history
     
     Query params:
         limit (int): Max number of results (default: 50)
+        cursor (str): next_cursor from the previous page
     
     Returns:
-        { data: { history, count }, meta: {...} }
+        { data: { history, count, pagination }, meta: {...} }
     """
     limit = request.args.get('limit', 50, type=int)
-    limit = min(limit, 100)  # Cap at 100
+    limit = min(max(limit, 1), 100)  # Cap at 100
     
-    history = InteractionCheck.get_user_history(g.current_user.id, limit)
+    history, next_cursor = paginate_keyset(
+        rows.interaction_check_rows.select().where(InteractionCheck.user_id == g.current_user.id),
+        [(InteractionCheck.checked_at, True), (InteractionCheck.id, True)],
+        limit, request.args.get('cursor')
+    )
     
     return api_response(
         {
-            "history": [check.to_dict() for check in history],
+            "history": [rows.interaction_check_rows(row) for row in history],
             "count": len(history),
+            "pagination": cursor_meta(limit, next_cursor)
         }
     )
 
@@ -53,7 +63,9 @@ def save_check():
         }
     
     Returns:
-        { data: { check }, meta: {...} }
+        201 { data: { check }, meta: {...} }, or with the write-behind queue
+        enabled 202 { data: { check: null, queued: true } } (the check shows
+        up in history once the queue flushes)
     """
     data = request.get_json() or {}
     
@@ -74,6 +86,8 @@ def save_check():
         medications=medications,
         interactions=interactions
     )
+    if check is None:
+        return api_response({"check": None, "queued": True}, status_code=202)
     
     return api_response({"check": check.to_dict()}, status_code=201)
 
@@ -110,14 +124,29 @@ def clear_history():
     Returns:
         { data: { deleted_count }, meta: {...} }
     """
+    from sqlalchemy import func
+    from app.models.interaction_stats import InteractionStats
+    from app.models.archive import InteractionCheckMonthly
+    from app.models.platform_stats import PlatformCounter
+    from app.services.retention_service import purge_user_archives
+
+    archived = db.session.query(func.coalesce(func.sum(InteractionCheckMonthly.check_count), 0)).filter(
+        InteractionCheckMonthly.user_id == g.current_user.id
+    ).scalar()
     deleted = InteractionCheck.query.filter_by(user_id=g.current_user.id).delete()
+    InteractionCheckMonthly.query.filter_by(user_id=g.current_user.id).delete()
+    # Bulk delete bypasses the flush hooks that maintain the counters
+    InteractionStats.reset(g.current_user.id)
+    PlatformCounter.apply(db.session.connection(), {"interaction_checks": -(deleted + archived)})
     db.session.commit()
+    purge_user_archives(g.current_user.id, ['interaction_checks'])
     
     return api_response({"deleted_count": deleted})
 
 
 @interaction_history_bp.route('/stats', methods=['GET'])
 @auth_required
+@read_replica
 def get_stats():
     """
     Get user's interaction check statistics
@@ -125,49 +154,6 @@ def get_stats():
     Returns:
         Total checks, severity distribution, most-flagged foods
     """
-    import json
-    from sqlalchemy import func
-
-    user_id = g.current_user.id
-
-    total_checks = InteractionCheck.query.filter_by(user_id=user_id).count()
-
-    # Get all checks to analyze
-    checks = InteractionCheck.query.filter_by(user_id=user_id).all()
-
-    severity_counts = {"high": 0, "medium": 0, "low": 0, "none": 0}
-    food_counts = {}
-
-    for check in checks:
-        food_name = check.food_name.lower()
-        food_counts[food_name] = food_counts.get(food_name, 0) + 1
-
-        try:
-            interactions = json.loads(check.interactions_json) if check.interactions_json else []
-        except (json.JSONDecodeError, TypeError):
-            interactions = []
-
-        if not interactions:
-            severity_counts["none"] += 1
-        else:
-            severities_found = set()
-            for interaction in interactions:
-                sev = interaction.get('severity', 'low').lower()
-                if sev in severity_counts:
-                    severities_found.add(sev)
-            # Count the highest severity found
-            if 'high' in severities_found:
-                severity_counts['high'] += 1
-            elif 'medium' in severities_found:
-                severity_counts['medium'] += 1
-            elif 'low' in severities_found:
-                severity_counts['low'] += 1
-
-    # Top 10 most-checked foods
-    top_foods = sorted(food_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    from app.models.interaction_stats import InteractionStats
 
-    return api_response({
-        "total_checks": total_checks,
-        "severity_distribution": severity_counts,
-        "top_checked_foods": [{"food": f, "count": c} for f, c in top_foods]
-    })
+    return api_response(InteractionStats.get_for_user(g.current_user.id, top_n=10))
@@ -4,13 +4,18 @@ Endpoints for checking interactions between foods and medications
 """
 
 from flask import Blueprint, request, g
+from app import http_cache
 from app.services.interaction_service import (
     check_interaction,
     check_food_against_medications,
     get_drug_interactions,
     get_food_interactions,
-    get_interaction_stats
+    get_interaction_stats,
+    get_snapshot
 )
+from app.services.openfda_service import get_drug_detail
+from app.services.auth_service import auth_optional
+from app.models.medication import SearchHistory
 from app.errors import (
     api_response,
     BadRequestError,
@@ -39,7 +44,9 @@ def validate_param(value: str, field_name: str, max_length: int = 100) -> str:
 
 
 @interactions_bp.route('/check', methods=['GET'])
+@auth_optional
 @handle_exceptions
+@http_cache.conditional('INTERACTIONS_MAX_AGE')
 def check_single_interaction():
     """
     Check for interaction between a single food and drug
@@ -54,7 +61,13 @@ def check_single_interaction():
     food = validate_param(request.args.get('food', ''), 'food')
     drug = validate_param(request.args.get('drug', ''), 'drug')
     
+    # Local matches depend only on the data; without one the FDA label is
+    # checked, so its cache entry is part of the validator
+    http_cache.validate(lambda: (get_snapshot(), get_drug_detail.cached_at(drug)))
+    
     results = check_interaction(food, drug)
+    if not results and get_drug_detail.cached_at(drug) is None:
+        http_cache.no_store()  # label lookup failed; the next request retries it
     
     interactions = []
     for r in results:
@@ -77,6 +90,11 @@ def check_single_interaction():
             overall_severity = sev
             break
     
+    SearchHistory.log_search(
+        'interaction', food, user_id=g.current_user.id if g.current_user else None,
+        results_count=len(interactions), secondary_term=drug, had_interaction=len(interactions) > 0
+    )
+    
     return api_response(
         data={
             "food_queried": food,
@@ -158,6 +176,7 @@ def check_multiple_interactions():
 
 @interactions_bp.route('/drug/<drug_name>', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('INTERACTIONS_MAX_AGE')
 def get_interactions_for_drug(drug_name: str):
     """
     Get all known food interactions for a specific drug
@@ -169,6 +188,7 @@ def get_interactions_for_drug(drug_name: str):
         { data: { drug, interaction_count, foods_to_avoid }, meta: {...} }
     """
     drug = validate_param(drug_name, 'drug_name')
+    http_cache.validate(lambda: (get_snapshot(),))
     
     interactions = get_drug_interactions(drug)
     
@@ -187,6 +207,7 @@ def get_interactions_for_drug(drug_name: str):
 
 @interactions_bp.route('/food/<food_name>', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('INTERACTIONS_MAX_AGE')
 def get_interactions_for_food(food_name: str):
     """
     Get all known drug interactions for a specific food
@@ -198,6 +219,7 @@ def get_interactions_for_food(food_name: str):
         { data: { food, interaction_count, drugs_affected }, meta: {...} }
     """
     food = validate_param(food_name, 'food_name')
+    http_cache.validate(lambda: (get_snapshot(),))
     
     interactions = get_food_interactions(food)
     
@@ -216,6 +238,7 @@ def get_interactions_for_food(food_name: str):
 
 @interactions_bp.route('/stats', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('INTERACTIONS_MAX_AGE')
 def interaction_stats():
     """
     Get statistics about the interaction database
@@ -223,6 +246,7 @@ def interaction_stats():
     Returns:
         { data: { total_interactions, severity_breakdown, ... }, meta: {...} }
     """
+    http_cache.validate(lambda: (get_snapshot(),))
     stats = get_interaction_stats()
     
     return api_response(
@@ -256,9 +280,9 @@ def batch_check():
     Requires auth. Checks every food logged today against every active med.
     """
     from app.services.auth_service import get_current_user
+    from app.services.food_log_service import screened_results
     from app.models.medication import UserMedication, FoodLog
     from datetime import date
-    from sqlalchemy import func
 
     get_current_user()
     from flask import g
@@ -266,9 +290,7 @@ def batch_check():
     today = date.today()
 
     # Get today's food names
-    today_foods = FoodLog.query.filter_by(user_id=user_id).filter(
-        func.date(FoodLog.logged_date) == today
-    ).all()
+    today_foods = FoodLog.get_user_logs_by_date(user_id, today)
 
     food_names = list(set(f.food_name.lower() for f in today_foods))
 
@@ -286,18 +308,17 @@ def batch_check():
             meta={"request_id": g.request_id}
         )
 
+    # Flags stored when the foods were logged; only logs screened against a
+    # different medication set are rechecked
     results = []
     total_warnings = 0
-    for food in food_names:
-        result = check_food_against_medications(food, med_names)
-        warnings = result.get('warnings', [])
-        if warnings:
-            total_warnings += len(warnings)
-            results.append({
-                "food": food,
-                "warning_count": len(warnings),
-                "warnings": warnings
-            })
+    for food, stored in screened_results(today_foods, med_names).items():
+        total_warnings += stored["interaction_count"]
+        results.append({
+            "food": food,
+            "warning_count": stored["interaction_count"],
+            "warnings": stored["warnings"]
+        })
 
     return api_response(
         data={
@@ -3,12 +3,20 @@ User Medications Routes
 CRUD operations for user's saved medications
 """
 
-from flask import Blueprint, request, g
-from datetime import datetime
-from app import db
+from flask import Blueprint, request, g, current_app
+from datetime import datetime, timezone
+from app import db, http_cache
 from app.models.medication import UserMedication
+from app.models import rows
 from app.services.auth_service import auth_required
-from app.services.interaction_service import check_food_against_medications, get_drug_interactions
+from app.db_routing import read_replica
+from app.services.interaction_service import (
+    check_food_against_medications,
+    get_drug_interactions,
+    get_drugs_interactions,
+    get_snapshot
+)
+from app.services import export_service
 from app.errors import (
     api_response,
     BadRequestError,
@@ -73,6 +81,7 @@ def validate_medication_data(data: dict, require_drug_name: bool = True) -> dict
 @medications_bp.route('', methods=['GET'])
 @auth_required
 @handle_exceptions
+@read_replica
 def list_medications():
     """
     List all medications for current user
@@ -85,11 +94,11 @@ def list_medications():
     """
     active_only = request.args.get('active_only', 'false').lower() == 'true'
     
-    medications = UserMedication.get_user_medications(g.current_user.id, active_only)
+    medications = rows.list_medications(g.current_user.id, active_only)
     
     return api_response(
         data={
-            "medications": [med.to_dict() for med in medications],
+            "medications": medications,
             "count": len(medications),
             "active_only": active_only
         },
@@ -298,6 +307,7 @@ def check_food_interactions():
 @medications_bp.route('/interactions-summary', methods=['GET'])
 @auth_required
 @handle_exceptions
+@http_cache.conditional('USER_DATA_MAX_AGE', public=False)
 def get_all_interactions():
     """
     Get all known food interactions for user's medications
@@ -305,6 +315,8 @@ def get_all_interactions():
     Returns:
         { data: { medications_with_interactions }, meta: {...} }
     """
+    user_id = g.current_user.id
+    http_cache.validate(lambda: (user_id, get_snapshot(), UserMedication.data_stamp(user_id)))
     medications = UserMedication.get_user_medications(g.current_user.id, active_only=True)
     
     result = []
@@ -386,7 +398,8 @@ def create_reminder():
         raise ValidationError("reminder_time is required (HH:MM)", {"field": "reminder_time"})
 
     import re
-    if not re.match(r'^\d{2}:\d{2}$', reminder_time):
+    if not re.match(r'^\d{2}:\d{2}$', reminder_time) or \
+            int(reminder_time[:2]) > 23 or int(reminder_time[3:]) > 59:
         raise ValidationError("reminder_time must be HH:MM format", {"field": "reminder_time"})
 
     days = data.get('days_of_week', ["mon", "tue", "wed", "thu", "fri", "sat", "sun"])
@@ -440,7 +453,9 @@ def delete_reminder(reminder_id: int):
 @handle_exceptions
 def bulk_import():
     """
-    Bulk import medications
+    Bulk import medications (up to MEDICATION_IMPORT_MAX, default 500)
+    Returns what was imported and skipped, plus the known food interactions
+    of the imported drugs
 
     Request Body:
         {
@@ -458,46 +473,75 @@ def bulk_import():
     if not isinstance(medications_data, list) or len(medications_data) == 0:
         raise ValidationError("medications array is required and cannot be empty")
 
-    if len(medications_data) > 50:
-        raise ValidationError("Maximum 50 medications per import", {"max": 50})
+    max_items = current_app.config.get('MEDICATION_IMPORT_MAX', 500)
+    if len(medications_data) > max_items:
+        raise ValidationError(f"Maximum {max_items} medications per import", {"max": max_items})
 
-    imported = []
+    user_id = g.current_user.id
+    now = datetime.now(timezone.utc)
+    rows = []
     skipped = []
+    seen = set()
 
     for med_data in medications_data:
-        drug_name = med_data.get('drug_name', '').strip()
+        drug_name = str(med_data.get('drug_name') or '').strip() if isinstance(med_data, dict) else ''
         if not drug_name:
             skipped.append({"data": med_data, "reason": "Missing drug_name"})
             continue
-
-        # Skip if already exists
-        existing = UserMedication.query.filter_by(
-            user_id=g.current_user.id, drug_name=drug_name
-        ).first()
-        if existing:
-            skipped.append({"drug_name": drug_name, "reason": "Already exists"})
+        if len(drug_name) > 255:
+            skipped.append({"drug_name": drug_name[:255], "reason": "drug_name too long"})
+            continue
+        if drug_name in seen:
+            skipped.append({"drug_name": drug_name, "reason": "Duplicate in request"})
             continue
+        seen.add(drug_name)
+
+        rows.append({
+            "user_id": user_id,
+            "drug_name": drug_name,
+            "brand_name": med_data.get('brand_name'),
+            "generic_name": med_data.get('generic_name'),
+            "dosage": med_data.get('dosage'),
+            "frequency": med_data.get('frequency'),
+            "notes": med_data.get('notes'),
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now
+        })
+
+    # One IN query for duplicates, then one multi-row insert; rows that still
+    # conflict (added concurrently) are skipped by the insert itself
+    existing = UserMedication.existing_drug_names(user_id, [row["drug_name"] for row in rows])
+    new_rows = [row for row in rows if row["drug_name"] not in existing]
+    inserted = set(UserMedication.bulk_insert(new_rows))
+    db.session.commit()
 
-        med = UserMedication(
-            user_id=g.current_user.id,
-            drug_name=drug_name,
-            brand_name=med_data.get('brand_name'),
-            generic_name=med_data.get('generic_name'),
-            dosage=med_data.get('dosage'),
-            frequency=med_data.get('frequency'),
-            notes=med_data.get('notes')
-        )
-        db.session.add(med)
-        imported.append(drug_name)
+    imported = [row["drug_name"] for row in new_rows if row["drug_name"] in inserted]
+    skipped.extend(
+        {"drug_name": row["drug_name"], "reason": "Already exists"}
+        for row in rows if row["drug_name"] not in inserted
+    )
 
-    db.session.commit()
+    interactions = get_drugs_interactions(imported)
+    with_interactions = {drug: found for drug, found in interactions.items() if found}
 
     return api_response(
         data={
             "imported_count": len(imported),
             "skipped_count": len(skipped),
             "imported": imported,
-            "skipped": skipped
+            "skipped": skipped,
+            "interaction_summary": {
+                "medications_with_warnings": len(with_interactions),
+                "total_food_interactions": sum(len(found) for found in with_interactions.values()),
+                "by_drug": {
+                    drug: {
+                        "known_food_interactions": len(found),
+                        "interactions": found[:3]
+                    }
+                    for drug, found in with_interactions.items()
+                }
+            }
         },
         meta={"request_id": g.request_id},
         status_code=201
@@ -508,7 +552,19 @@ def bulk_import():
 @auth_required
 @handle_exceptions
 def export_medications():
-    """Export user's medication list as JSON"""
+    """
+    Export user's medication list
+
+    Query Params:
+        format (str): 'json' (default), or 'ndjson' / 'csv' to stream rows
+    """
+    fmt = export_service.parse_format(request.args.get('format'))
+    if fmt != 'json':
+        return export_service.stream_response(
+            export_service.iter_dicts(export_service.section_statement('medications', g.current_user.id)),
+            fmt, 'medications'
+        )
+
     medications = UserMedication.get_user_medications(g.current_user.id)
 
     return api_response(
@@ -3,15 +3,19 @@ Packaged Foods Routes - Open Food Facts API Integration
 Handles search, barcode lookup, and nutrition info for packaged/branded foods
 """
 
-from flask import Blueprint, request, g
+from flask import Blueprint, request, g, current_app
+from app import http_cache
 from app.services.openfoodfacts_service import (
     search_products,
     get_product_by_barcode,
+    get_products_by_barcodes,
     get_product_detail,
+    product_cached_at,
+    normalize_barcode,
     parse_ingredients
 )
-from app.services.auth_service import auth_required
-from app.services.interaction_service import check_food_against_medications
+from app.services.auth_service import auth_required, auth_optional, AuthenticationError
+from app.services.interaction_service import check_food_against_medications, check_foods_against_medications
 from app.errors import (
     api_response,
     BadRequestError,
@@ -26,6 +30,7 @@ packaged_foods_bp = Blueprint('packaged_foods', __name__)
 
 @packaged_foods_bp.route('/search', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def search_packaged_foods():
     """
     Search packaged/branded foods by name via Open Food Facts
@@ -43,6 +48,7 @@ def search_packaged_foods():
 
     limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
     page = max(request.args.get('page', 1, type=int), 1)
+    http_cache.validate(lambda: http_cache.stamp(search_products.cached_at(query, limit, page)))
 
     result = search_products(query, limit, page)
 
@@ -70,16 +76,19 @@ def search_packaged_foods():
 
 @packaged_foods_bp.route('/barcode/<string:barcode>', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def lookup_barcode(barcode: str):
     """
     Look up a product by UPC/EAN barcode
 
     Path Params:
-        barcode (str): UPC or EAN barcode
+        barcode (str): UPC or EAN barcode (UPC-A is normalized to EAN-13)
     """
-    barcode = barcode.strip()
-    if not barcode or not barcode.isdigit():
-        raise ValidationError("Invalid barcode format", {"field": "barcode", "value": barcode})
+    normalized = normalize_barcode(barcode)
+    if not normalized:
+        raise ValidationError("Invalid barcode format", {"field": "barcode", "value": barcode.strip()})
+    barcode = normalized
+    http_cache.validate(lambda: http_cache.stamp(product_cached_at(barcode)))
 
     result = get_product_by_barcode(barcode)
 
@@ -105,8 +114,97 @@ def lookup_barcode(barcode: str):
     )
 
 
+@packaged_foods_bp.route('/barcode/batch', methods=['POST'])
+@auth_optional
+@handle_exceptions
+def lookup_barcodes_batch():
+    """
+    Look up several scanned barcodes in one request
+    Duplicates are collapsed after normalization; cached products are served
+    without hitting Open Food Facts and the rest are fetched concurrently.
+
+    Request Body:
+        {
+            "barcodes": ["5449000000996", "012000161155"],
+            "check_interactions": false  // requires auth; screens ingredients
+                                         // against the user's active medications
+        }
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        raise BadRequestError("Request body must be JSON")
+
+    barcodes = data.get('barcodes')
+    if not isinstance(barcodes, list) or not barcodes:
+        raise ValidationError("barcodes must be a non-empty list", {"field": "barcodes"})
+
+    max_barcodes = current_app.config.get('OFF_BATCH_MAX_BARCODES', 100)
+    if len(barcodes) > max_barcodes:
+        raise ValidationError(
+            f"Too many barcodes (max {max_barcodes})",
+            {"field": "barcodes", "max_items": max_barcodes, "received": len(barcodes)}
+        )
+
+    check_interactions = bool(data.get('check_interactions', False))
+    if check_interactions and not g.current_user:
+        raise AuthenticationError("Authentication required to check interactions")
+
+    lookup = get_products_by_barcodes(barcodes)
+    results = lookup["results"]
+
+    med_names = []
+    if check_interactions:
+        from app.models.medication import UserMedication
+        med_names = UserMedication.get_user_medication_names(g.current_user.id, active_only=True)
+
+    if check_interactions:
+        # One screening call for every distinct ingredient in the batch
+        ingredients = [
+            ingredient.strip().lower()
+            for item in results
+            for ingredient in (item.get("product") or {}).get("ingredients_list", [])
+            if ingredient.strip()
+        ]
+        screened = check_foods_against_medications(ingredients, med_names) if med_names and ingredients else {}
+        warnings_by_ingredient = {
+            key: [
+                {**warning, 'severity': severity}
+                for severity, warnings_list in check.get('warnings', {}).items()
+                for warning in warnings_list
+            ]
+            for key, check in screened.items()
+        }
+        for item in results:
+            item["warnings"] = [
+                {**warning, 'triggering_ingredient': ingredient}
+                for ingredient in (item.get("product") or {}).get("ingredients_list", [])
+                for warning in warnings_by_ingredient.get(ingredient.strip().lower(), [])
+            ]
+
+    found = sum(1 for item in results if item["status"] == "found")
+    not_found = sum(1 for item in results if item["status"] == "not_found")
+
+    return api_response(
+        data={
+            "requested": len(barcodes),
+            "unique": len(results),
+            "found": found,
+            "not_found": not_found,
+            "errors": len(results) - found - not_found,
+            "invalid": lookup["invalid"],
+            "medications_checked": len(med_names) if check_interactions else None,
+            "results": results
+        },
+        meta={
+            "request_id": g.request_id,
+            "source": "openfoodfacts"
+        }
+    )
+
+
 @packaged_foods_bp.route('/<string:off_id>', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def get_packaged_food(off_id: str):
     """
     Get detailed product info by Open Food Facts product code
@@ -117,6 +215,7 @@ def get_packaged_food(off_id: str):
     off_id = off_id.strip()
     if not off_id:
         raise ValidationError("Invalid product ID", {"field": "off_id"})
+    http_cache.validate(lambda: http_cache.stamp(product_cached_at(off_id)))
 
     result = get_product_detail(off_id)
 
@@ -144,6 +243,7 @@ def get_packaged_food(off_id: str):
 
 @packaged_foods_bp.route('/<string:off_id>/ingredients', methods=['GET'])
 @handle_exceptions
+@http_cache.conditional('LOOKUP_MAX_AGE')
 def get_product_ingredients(off_id: str):
     """
     Get parsed ingredient list for a product
@@ -154,6 +254,7 @@ def get_product_ingredients(off_id: str):
     off_id = off_id.strip()
     if not off_id:
         raise ValidationError("Invalid product ID", {"field": "off_id"})
+    http_cache.validate(lambda: http_cache.stamp(product_cached_at(off_id)))
 
     result = get_product_detail(off_id)
 
@@ -5,9 +5,12 @@ Exposes the existing SearchHistory model with GET and DELETE endpoints
 
 from flask import Blueprint, request, g
 from app.services.auth_service import auth_required
+from app.db_routing import read_replica
 from app.models.medication import SearchHistory
+from app.models import rows
 from app import db
 from app.errors import api_response, handle_exceptions
+from app.pagination import paginate_keyset, cursor_meta
 
 search_history_bp = Blueprint('search_history', __name__)
 
@@ -15,6 +18,7 @@ search_history_bp = Blueprint('search_history', __name__)
 @search_history_bp.route('', methods=['GET'])
 @auth_required
 @handle_exceptions
+@read_replica
 def get_search_history():
     """
     Get the current user's search history
@@ -22,21 +26,26 @@ def get_search_history():
     Query Params:
         limit (int): Max results, default 50, max 200
         search_type (str): Filter by type (drug, food, interaction)
+        cursor (str): next_cursor from the previous page
     """
     limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
     search_type = request.args.get('search_type', '').strip().lower()
 
-    query = SearchHistory.query.filter_by(user_id=g.current_user.id)
+    query = rows.search_history_rows.select().where(SearchHistory.user_id == g.current_user.id)
 
     if search_type:
-        query = query.filter_by(search_type=search_type)
+        query = query.where(SearchHistory.search_type == search_type)
 
-    history = query.order_by(SearchHistory.searched_at.desc()).limit(limit).all()
+    history, next_cursor = paginate_keyset(
+        query, [(SearchHistory.searched_at, True), (SearchHistory.id, True)],
+        limit, request.args.get('cursor')
+    )
 
     return api_response(
         data={
-            "history": [h.to_dict() for h in history],
-            "count": len(history)
+            "history": [rows.search_history_rows(row) for row in history],
+            "count": len(history),
+            "pagination": cursor_meta(limit, next_cursor)
         },
         meta={"request_id": g.request_id}
     )
@@ -52,10 +61,24 @@ def clear_search_history():
     Returns:
         { data: { deleted_count }, meta: {...} }
     """
+    from app.models.platform_stats import PlatformCounter, search_deltas
+    from app.services.retention_service import purge_user_archives
+
+    # Bulk delete bypasses the flush hooks that maintain the platform counters
+    removed = db.session.query(SearchHistory.search_type, SearchHistory.search_term).filter_by(
+        user_id=g.current_user.id
+    ).all()
     deleted_count = SearchHistory.query.filter_by(
         user_id=g.current_user.id
     ).delete()
+    counters, top = search_deltas([row._asdict() for row in removed])
+    PlatformCounter.apply(
+        db.session.connection(),
+        {name: -change for name, change in counters.items()},
+        {key: -change for key, change in top.items()}
+    )
     db.session.commit()
+    purge_user_archives(g.current_user.id, ['search_history'])
 
     return api_response(
         data={"deleted_count": deleted_count},
@@ -3,6 +3,7 @@ Authentication Service
 Handles JWT token generation, validation, and user authentication
 """
 
+import hashlib
 import jwt
 import secrets
 from datetime import datetime, timezone, timedelta
@@ -32,6 +33,7 @@ def generate_token(user: User, expires_in: int = 86400) -> str:
     payload = {
         "user_id": user.id,
         "email": user.email,
+        "jti": secrets.token_hex(16),
         "iat": datetime.now(timezone.utc),
         "exp": datetime.now(timezone.utc) + timedelta(seconds=expires_in)
     }
@@ -53,6 +55,7 @@ def generate_refresh_token(user: User, expires_in: int = 604800) -> str:
     payload = {
         "user_id": user.id,
         "type": "refresh",
+        "jti": secrets.token_hex(16),
         "iat": datetime.now(timezone.utc),
         "exp": datetime.now(timezone.utc) + timedelta(seconds=expires_in)
     }
@@ -66,6 +69,14 @@ def generate_refresh_token(user: User, expires_in: int = 604800) -> str:
     return token
 
 
+def token_jti(token: str, payload: dict) -> str:
+    """
+    Revocation key for a token: its jti claim, or a hash of the whole token
+    for tokens issued before jti was added
+    """
+    return payload.get('jti') or hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
 def decode_token(token: str) -> dict:
     """Decode and validate JWT token, checking blacklist"""
     try:
@@ -75,10 +86,9 @@ def decode_token(token: str) -> dict:
             algorithms=['HS256']
         )
 
-        # Check if token is blacklisted
-        from app.models.token_blacklist import TokenBlacklist
-        jti = payload.get('jti')
-        if jti and TokenBlacklist.is_blacklisted(jti):
+        # Check if token is blacklisted (served from the per-worker revocation cache)
+        from app.services.revocation_cache import revocation_cache
+        if revocation_cache.is_revoked(token_jti(token, payload)):
             raise AuthenticationError("Token has been revoked", {"reason": "blacklisted"})
 
         return payload
@@ -106,15 +116,21 @@ def get_token_from_header() -> str:
     return parts[1]
 
 
-def get_current_user() -> User:
-    """Get current authenticated user from request context"""
+def get_current_user():
+    """
+    Get current authenticated user from request context
+    Returns a Principal (see principal_cache): auth fields come from the
+    per-worker cache, the full User row is only loaded if a route needs it
+    """
+    from app.services.principal_cache import principal_cache
+
     if hasattr(g, 'current_user') and g.current_user:
         return g.current_user
     
     token = get_token_from_header()
     payload = decode_token(token)
     
-    user = User.find_by_id(payload.get('user_id'))
+    user = principal_cache.load(payload.get('user_id'))
     
     if not user:
         raise AuthenticationError("User not found", {"user_id": payload.get('user_id')})
@@ -0,0 +1,104 @@
+"""
+In-Process Cache
+Small thread-safe LRU cache with per-entry TTL, shared by services
+that memoize upstream responses within a worker
+"""
+
+import copy
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Hashable, Optional
+
+from flask import current_app, has_app_context
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry
+    Entries are evicted when they expire or when maxsize is exceeded
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, stored_at, expires_at)
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: Hashable) -> Optional[tuple]:
+        """Get (value, stored_at) for a fresh entry, or None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, stored_at, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value, stored_at
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a fresh value, or default"""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """Store a value; ttl overrides the cache default"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, time.time(), time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry, returning its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def cached_lookup(cache: TTLCache, ttl_setting: str = 'LOOKUP_CACHE_TTL'):
+    """
+    Decorator: memoize an upstream lookup's successful results ({"success": True, ...})
+    Entries live for app.config[ttl_setting] seconds (cache default outside an app);
+    callers get a copy. The wrapped function gains cached_at(*args, **kwargs): when
+    the fresh entry for those arguments was stored (epoch seconds), or None.
+    """
+    def decorator(f):
+        signature = inspect.signature(f)
+
+        def key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (f.__name__, tuple((name, repr(value)) for name, value in bound.arguments.items()))
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            cache_key = key(args, kwargs)
+            hit = cache.get(cache_key)
+            if hit is not None:
+                return copy.deepcopy(hit)
+            result = f(*args, **kwargs)
+            ttl = current_app.config.get(ttl_setting) if has_app_context() else None
+            if result.get('success') and ttl != 0:
+                cache.set(cache_key, copy.deepcopy(result), ttl=ttl)
+            return result
+
+        def cached_at(*args, **kwargs) -> Optional[float]:
+            entry = cache.get_entry(key(args, kwargs))
+            return entry[1] if entry is not None else None
+
+        wrapper.cached_at = cached_at
+        return wrapper
+    return decorator
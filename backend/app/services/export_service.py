@@ -0,0 +1,245 @@
+"""
+Export Service
+Streams user data as NDJSON or CSV from server-side cursors (yield_per), so
+export size does not drive worker memory, and runs large exports as
+background jobs that write a gzip file for later download
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+from flask import current_app, Response, stream_with_context
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.errors import BadRequestError
+from app.models.medication import UserMedication, FoodLog, InteractionCheck, SearchHistory
+from app.models.favorites import FavoriteFood, MedicationReminder
+
+logger = logging.getLogger(__name__)
+
+# Section name -> (model, ordering, loader options)
+EXPORT_SECTIONS = {
+    "medications": (UserMedication, [UserMedication.drug_name, UserMedication.id], []),
+    "food_logs": (FoodLog, [FoodLog.logged_date.desc(), FoodLog.logged_at, FoodLog.id], []),
+    "interaction_checks": (InteractionCheck, [InteractionCheck.checked_at, InteractionCheck.id], []),
+    "search_history": (SearchHistory, [SearchHistory.searched_at, SearchHistory.id], []),
+    "favorite_foods": (FavoriteFood, [FavoriteFood.created_at, FavoriteFood.id], []),
+    "medication_reminders": (MedicationReminder, [MedicationReminder.id],
+                             [joinedload(MedicationReminder.medication)]),
+}
+
+EXPORT_FORMATS = ("json", "ndjson", "csv")
+
+_CSV_FLUSH_BYTES = 64 * 1024
+
+_job_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='export-job')
+# Jobs queued or running on this worker's executor
+_active_jobs = set()
+_active_jobs_lock = threading.Lock()
+
+
+def parse_format(value: str, allowed: tuple = EXPORT_FORMATS) -> str:
+    """Validate the ?format= of an export request"""
+    fmt = (value or 'json').lower()
+    if fmt not in allowed:
+        raise BadRequestError(
+            f"format must be one of: {', '.join(allowed)}",
+            {"field": "format"}
+        )
+    return fmt
+
+
+def _chunk_size() -> int:
+    try:
+        return current_app.config.get('EXPORT_CHUNK_SIZE', 500)
+    except RuntimeError:
+        return 500
+
+
+def section_statement(section: str, user_id: int):
+    """SELECT for one export section of a user's data"""
+    model, order, options = EXPORT_SECTIONS[section]
+    return select(model).where(model.user_id == user_id).order_by(*order).options(*options)
+
+
+def iter_dicts(stmt, chunk_size: int = None) -> Iterator[dict]:
+    """
+    Serialize rows of an ORM select one batch at a time
+    Uses a server-side cursor where the driver supports it; each batch is
+    expunged from the session once serialized so memory stays flat
+    """
+    stmt = stmt.execution_options(yield_per=chunk_size or _chunk_size())
+    result = db.session.execute(stmt)
+    for partition in result.scalars().partitions():
+        for obj in partition:
+            yield obj.to_dict()
+        for obj in partition:
+            db.session.expunge(obj)
+
+
+def iter_user_records(user) -> Iterator[dict]:
+    """Every record of a user's export, tagged with its section"""
+    yield {
+        "section": "user",
+        "data": user.to_dict(),
+        "exported_at": datetime.now(timezone.utc).isoformat()
+    }
+    for section in EXPORT_SECTIONS:
+        for record in iter_dicts(section_statement(section, user.id)):
+            yield {"section": section, "data": record}
+
+
+def ndjson_lines(records: Iterable[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, separators=(',', ':'), default=str) + '\n'
+
+
+def csv_lines(records: Iterable[dict]) -> Iterator[str]:
+    """
+    CSV text in chunks of roughly 64 KB; columns come from the first record
+    and nested values (lists, dicts) are written as JSON
+    """
+    buffer = io.StringIO()
+    writer = None
+    for record in records:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(record.keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow({
+            key: json.dumps(value, default=str) if isinstance(value, (list, dict)) else value
+            for key, value in record.items()
+        })
+        if buffer.tell() >= _CSV_FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_response(records: Iterable[dict], fmt: str, filename: str) -> Response:
+    """Chunked download of records as NDJSON or CSV"""
+    if fmt == 'csv':
+        lines, mimetype = csv_lines(records), 'text/csv'
+    else:
+        lines, mimetype = ndjson_lines(records), 'application/x-ndjson'
+    return Response(
+        stream_with_context(lines),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+
+def export_dir() -> str:
+    path = current_app.config.get('EXPORT_DIR') or os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def run_export_job(job_id: str):
+    """Write a user's full export as gzipped NDJSON and record the outcome on the job"""
+    from app.models.user import User
+    from app.models.export_job import ExportJob
+
+    job = db.session.get(ExportJob, job_id)
+    if job is None:
+        return
+    ttl = current_app.config.get('EXPORT_JOB_TTL', 86400)
+    job.status = 'running'
+    db.session.commit()
+
+    path = os.path.join(export_dir(), f'{job.id}.ndjson.gz')
+    try:
+        user = db.session.get(User, job.user_id)
+        count = 0
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for line in ndjson_lines(iter_user_records(user)):
+                f.write(line)
+                count += 1
+        job = db.session.get(ExportJob, job_id)
+        job.file_path = path
+        job.size_bytes = os.path.getsize(path)
+        job.record_count = count
+        job.mark_finished('complete', ttl)
+    except Exception as e:
+        logger.error(f"Export job {job_id} failed: {e}")
+        db.session.rollback()
+        if os.path.exists(path):
+            os.remove(path)
+        job = db.session.get(ExportJob, job_id)
+        job.mark_finished('failed', ttl, error=str(e))
+    db.session.commit()
+
+
+def _run_in_app_context(app, job_id: str):
+    with app.app_context():
+        try:
+            run_export_job(job_id)
+        finally:
+            db.session.remove()
+            with _active_jobs_lock:
+                _active_jobs.discard(job_id)
+
+
+def start_export_job(user_id: int):
+    """Create an export job and run it in the background (inline when EXPORT_JOBS_ASYNC is off)"""
+    from app.models.export_job import ExportJob
+
+    job = ExportJob(user_id=user_id, format='ndjson')
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+
+    if current_app.config.get('EXPORT_JOBS_ASYNC', True):
+        with _active_jobs_lock:
+            _active_jobs.add(job_id)
+        _job_executor.submit(_run_in_app_context, current_app._get_current_object(), job_id)
+    else:
+        run_export_job(job_id)
+    return db.session.get(ExportJob, job_id)
+
+
+def fail_stale_jobs(job_id: str = None, now: datetime = None) -> int:
+    """
+    Mark jobs failed that are still pending/running EXPORT_JOB_STALE_SECONDS
+    after creation and are not queued on this worker: the in-process
+    executor loses its queue when the worker restarts
+    Returns: number of jobs marked failed
+    """
+    from app.models.export_job import ExportJob
+
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=current_app.config.get('EXPORT_JOB_STALE_SECONDS', 3600))
+    with _active_jobs_lock:
+        active = set(_active_jobs)
+    stale = [job for job in ExportJob.get_unfinished(cutoff, job_id) if job.id not in active]
+    ttl = current_app.config.get('EXPORT_JOB_TTL', 86400)
+    for job in stale:
+        logger.warning(f"Export job {job.id} was interrupted ({job.status})")
+        job.mark_finished('failed', ttl, error="Export was interrupted, please start a new one")
+    if stale:
+        db.session.commit()
+    return len(stale)
+
+
+def purge_expired_jobs(now: datetime = None) -> int:
+    """Delete expired export jobs and their files"""
+    from app.models.export_job import ExportJob
+
+    jobs = ExportJob.get_expired(now)
+    for job in jobs:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        db.session.delete(job)
+    db.session.commit()
+    return len(jobs)
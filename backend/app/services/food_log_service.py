@@ -0,0 +1,246 @@
+"""
+Food Log Service
+Builds food log rows from JSON or CSV input, screens them against the user's
+active medications on the server, and bulk-inserts them in one transaction.
+Screening results are stored on each log (keyed by the medication set they
+were computed for) so later checks read them instead of recomputing; logs
+left stale by a medication change are re-screened by `flask food-logs
+rescreen`, and reads screen them in memory until then.
+"""
+
+import csv
+import io
+from datetime import datetime, date
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, or_, select, update, bindparam
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import db
+from app.errors import BadRequestError
+from app.models.medication import FoodLog, UserMedication
+from app.services.interaction_service import check_foods_against_medications
+
+NUMERIC_FIELDS = ("servings", "serving_size") + FoodLog.NUTRIENT_FIELDS
+
+TEXT_FIELDS = {"brand_owner": 255, "serving_unit": 20, "meal_type": 20}
+
+SCREENING_FIELDS = ("had_interaction", "interaction_count", "max_severity",
+                    "interactions_json", "screened_meds_key")
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _number(data: dict, field: str, cast=float):
+    value = data.get(field)
+    if _blank(value):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise BadRequestError(f"{field} must be a number", {"field": field})
+
+
+def build_row(user_id: int, data: dict, default_date: date = None) -> dict:
+    """
+    Column values for one food log from request data (JSON values or CSV strings)
+    Client-sent interaction flags are ignored; see screen_rows
+    """
+    food_name = (data.get('food_name') or '').strip()
+    if not food_name:
+        raise BadRequestError("Food name is required", {"field": "food_name"})
+    if len(food_name) > 255:
+        raise BadRequestError("Food name is too long", {"field": "food_name"})
+
+    date_str = data.get('logged_date')
+    if not _blank(date_str):
+        try:
+            log_date = datetime.strptime(str(date_str).strip(), '%Y-%m-%d').date()
+        except ValueError:
+            raise BadRequestError("Invalid date format. Use YYYY-MM-DD", {"field": "logged_date"})
+    else:
+        log_date = default_date or date.today()
+
+    row = {
+        "user_id": user_id,
+        "food_name": food_name,
+        "fdc_id": _number(data, 'fdc_id', int),
+        "notes": None if _blank(data.get('notes')) else data.get('notes'),
+        "logged_date": log_date,
+    }
+    for field in NUMERIC_FIELDS:
+        row[field] = _number(data, field)
+    if row["servings"] is None:
+        row["servings"] = 1.0
+    for field, max_length in TEXT_FIELDS.items():
+        value = data.get(field)
+        row[field] = None if _blank(value) else str(value).strip()[:max_length]
+    if row["serving_unit"] is None:
+        row["serving_unit"] = 'g'
+    return row
+
+
+def iter_csv_entries(stream) -> Iterator[dict]:
+    """
+    Rows of an uploaded CSV as dicts, read incrementally from the file stream
+    The header row names the columns (food_name, logged_date, calories, ...)
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    try:
+        for row in reader:
+            yield {(key or '').strip().lower(): value for key, value in row.items()}
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise BadRequestError(f"Invalid CSV file: {e}", {"field": "file", "line": reader.line_num})
+
+
+def build_rows(user_id: int, entries: Iterable[dict], limit: int) -> Tuple[List[dict], List[dict]]:
+    """
+    Validate entries into rows, collecting the ones that fail
+    Returns: (rows, skipped) where skipped items carry the 1-based row number
+    """
+    rows, skipped = [], []
+    today = date.today()
+    for index, entry in enumerate(entries, start=1):
+        if index > limit:
+            raise BadRequestError(
+                f"Maximum {limit} entries per import",
+                {"field": "entries", "max": limit}
+            )
+        if not isinstance(entry, dict):
+            skipped.append({"row": index, "reason": "Entry must be an object"})
+            continue
+        try:
+            rows.append(build_row(user_id, entry, today))
+        except BadRequestError as e:
+            skipped.append({"row": index, "food_name": entry.get('food_name'), "reason": e.message})
+    return rows, skipped
+
+
+def screen_rows(user_id: int, rows: List[dict], med_names: Optional[list] = None,
+                fetch_labels: bool = True) -> List[dict]:
+    """
+    Set interaction flags on rows in one pass against the user's active medications
+    Each distinct food is checked once, and each drug label fetched at most once
+    fetch_labels: False to screen against local data and cached labels only
+    (single entries); rows screened without a drug's label are left stale for
+    rescreen
+    """
+    if med_names is None:
+        med_names = UserMedication.get_user_medication_names(user_id, active_only=True)
+    med_key = FoodLog.medication_key(med_names)
+    if not fetch_labels:
+        from app.services.openfda_service import get_drug_detail
+        if any(get_drug_detail.cached_at(name.strip()) is None for name in med_names if name and name.strip()):
+            med_key = None
+    screened = check_foods_against_medications(
+        [row["food_name"].lower() for row in rows], med_names, fetch_labels
+    ) if med_names else {}
+
+    for row in rows:
+        row.update(FoodLog.screening_values(screened.get(row["food_name"].lower(), {}), med_key))
+    return rows
+
+
+def ingest(user_id: int, rows: List[dict]) -> dict:
+    """
+    Screen and insert rows as one multi-row INSERT, then refresh the daily
+    rollups for the days touched, all in one transaction
+    """
+    from app.models.nutrition_rollup import DailyNutritionRollup
+    from app.models.platform_stats import PlatformCounter
+
+    if not rows:
+        return {"imported_count": 0, "days_affected": [], "interactions": []}
+
+    screen_rows(user_id, rows)
+    connection = db.session.connection()
+    connection.execute(insert(FoodLog), rows)
+    days = sorted({row["logged_date"] for row in rows})
+    # Core inserts skip the session's rollup and counter listeners
+    DailyNutritionRollup.refresh(connection, {(user_id, day) for day in days})
+    PlatformCounter.apply(connection, {"food_logs": len(rows)})
+    db.session.commit()
+
+    interactions = {}
+    for row in rows:
+        if row["had_interaction"]:
+            interactions.setdefault(row["food_name"].lower(), {
+                "food": row["food_name"].lower(),
+                "interaction_count": row["interaction_count"],
+                "max_severity": row["max_severity"]
+            })
+    return {
+        "imported_count": len(rows),
+        "days_affected": [day.isoformat() for day in days],
+        "interactions": list(interactions.values())
+    }
+
+
+def screened_results(logs: List[FoodLog], med_names: list) -> dict:
+    """
+    Stored interaction results for logs, one per distinct food (lowercased)
+    Logs screened against a different medication set (or never screened) are
+    rechecked in one batch, in memory only: reads never write, and rescreen
+    persists the fresh flags.
+    Returns: {food: {interaction_count, max_severity, warnings}} for foods
+    with at least one warning
+    """
+    med_key = FoodLog.medication_key(med_names)
+    stale = [log for log in logs if log.screened_meds_key != med_key]
+
+    if stale:
+        screened = check_foods_against_medications(
+            [log.food_name.lower() for log in stale], med_names
+        ) if med_names else {}
+        for log in stale:
+            values = FoodLog.screening_values(screened.get(log.food_name.lower(), {}), med_key)
+            for field, value in values.items():
+                set_committed_value(log, field, value)
+
+    results = {}
+    for log in logs:
+        food = log.food_name.lower()
+        if log.had_interaction and food not in results:
+            results[food] = {
+                "interaction_count": log.interaction_count,
+                "max_severity": log.max_severity,
+                "warnings": log.get_warnings()
+            }
+    return results
+
+
+def rescreen(user_id: Optional[int] = None) -> int:
+    """
+    Re-screen and store flags for logs whose stored results are stale
+    (screened against another medication set, or without a drug's label),
+    one user per transaction
+    Returns: number of logs updated
+    """
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        user_ids = db.session.scalars(select(FoodLog.user_id).distinct().order_by(FoodLog.user_id)).all()
+
+    statement = update(FoodLog.__table__).where(FoodLog.__table__.c.id == bindparam('b_id')).values(
+        {field: bindparam(f"b_{field}") for field in SCREENING_FIELDS}
+    )
+    updated = 0
+    for uid in user_ids:
+        med_names = UserMedication.get_user_medication_names(uid, active_only=True)
+        med_key = FoodLog.medication_key(med_names)
+        stale = db.session.execute(select(FoodLog.id, FoodLog.food_name).where(
+            FoodLog.user_id == uid,
+            or_(FoodLog.screened_meds_key.is_(None), FoodLog.screened_meds_key != med_key)
+        )).all()
+        if not stale:
+            continue
+        rows = screen_rows(uid, [{"food_name": food_name} for _, food_name in stale], med_names)
+        db.session.connection().execute(statement, [
+            {"b_id": log_id, **{f"b_{field}": row[field] for field in SCREENING_FIELDS}}
+            for (log_id, _), row in zip(stale, rows)
+        ])
+        db.session.commit()
+        updated += len(stale)
+    return updated
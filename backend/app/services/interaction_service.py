@@ -3,6 +3,7 @@ Food-Drug Interaction Service
 Core business logic for checking interactions between foods and medications
 """
 
+import hashlib
 import json
 import os
 import re
@@ -64,24 +65,33 @@ class InteractionEngine:
         )
         
         try:
-            with open(data_path, 'r') as f:
-                data = json.load(f)
-                self._interactions = data.get('interactions', [])
-                self._version = data.get('version', 'unknown')
-                self._last_updated = data.get('last_updated', 'unknown')
+            with open(data_path, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw)
+            self._interactions = data.get('interactions', [])
+            self._version = data.get('version', 'unknown')
+            self._last_updated = data.get('last_updated', 'unknown')
+            self._snapshot = hashlib.sha1(raw).hexdigest()[:16]
         except FileNotFoundError:
             self._interactions = []
             self._version = 'unknown'
             self._last_updated = 'unknown'
+            self._snapshot = 'missing'
         except json.JSONDecodeError:
             self._interactions = []
             self._version = 'error'
             self._last_updated = 'error'
+            self._snapshot = 'error'
     
     def reload(self):
         """Force reload of interaction data (useful for updates)"""
         self._load_interactions()
     
+    @property
+    def snapshot(self) -> str:
+        """Version of the loaded data: a digest of the data file, the same in every worker"""
+        return self._snapshot
+    
     @property
     def stats(self) -> dict:
         """Get statistics about loaded interactions"""
@@ -179,6 +189,20 @@ class InteractionEngine:
         if not food or not drug:
             return []
         
+        results = self._local_interactions(food, drug)
+        
+        # If no local JSON matches, check OpenFDA dynamically for allergies & text warnings
+        if not results:
+            from app.services.openfda_service import get_drug_detail
+            fda_res = get_drug_detail(drug)
+            
+            if fda_res.get('success') and fda_res.get('drug'):
+                results = self._label_interactions(food, drug, fda_res['drug'])
+        
+        return self._sort_by_severity(results)
+    
+    def _local_interactions(self, food: str, drug: str) -> List[InteractionResult]:
+        """Matches for a food-drug pair in the local interaction data"""
         results = []
         
         for interaction in self._interactions:
@@ -202,59 +226,58 @@ class InteractionEngine:
                     matched_drug_term=drug_match
                 ))
         
-        # If no local JSON matches, check OpenFDA dynamically for allergies & text warnings
-        if not results:
-            from app.services.openfda_service import get_drug_detail
-            fda_res = get_drug_detail(drug)
-            
-            if fda_res.get('success') and fda_res.get('drug'):
-                drug_info = fda_res['drug']
-                norm_food = self._normalize(food)
-                found_allergy = False
-                
-                # Check ingredients (allergies)
-                act_ing = self._normalize(drug_info.get('active_ingredient', ''))
-                inact_ing = self._normalize(drug_info.get('inactive_ingredient', ''))
-                
-                if norm_food in act_ing or norm_food in inact_ing:
-                    results.append(InteractionResult(
-                        interaction_id=f"FDA-ALG-{drug.upper()}",
-                        food_name=food,
-                        drug_name=drug_info.get('brand_name', drug),
-                        drug_class='FDA Dynamic Check',
-                        severity='high',
-                        effect=f"Contains {food} as an ingredient. Potential for severe allergic reaction.",
-                        recommendation="Avoid this medication and consult your prescriber immediately.",
-                        evidence_level="strong",
-                        matched_food_term=food,
-                        matched_drug_term=drug
-                    ))
-                    found_allergy = True
-                
-                # Check interaction texts
-                if not found_allergy:
-                    inter_txt = self._normalize(drug_info.get('drug_interactions', ''))
-                    warn_txt = self._normalize(drug_info.get('warnings', ''))
-                    contra_txt = self._normalize(drug_info.get('contraindications', ''))
-                    
-                    if norm_food in inter_txt or norm_food in warn_txt or norm_food in contra_txt:
-                        results.append(InteractionResult(
-                            interaction_id=f"FDA-TXT-{drug.upper()}",
-                            food_name=food,
-                            drug_name=drug_info.get('brand_name', drug),
-                            drug_class='FDA Dynamic Check',
-                            severity='medium',
-                            effect=f"The FDA label for this drug mentions '{food}' in its warnings or interactions.",
-                            recommendation="Review the FDA drug label or consult a pharmacist to evaluate safely consuming this item.",
-                            evidence_level="moderate",
-                            matched_food_term=food,
-                            matched_drug_term=drug
-                        ))
-
-        # Sort by severity (high first)
+        return results
+    
+    def _label_interactions(self, food: str, drug: str, drug_info: dict) -> List[InteractionResult]:
+        """Allergy / warning-text matches for a food in a drug's FDA label"""
+        results = []
+        norm_food = self._normalize(food)
+        
+        # Check ingredients (allergies)
+        act_ing = self._normalize(drug_info.get('active_ingredient', ''))
+        inact_ing = self._normalize(drug_info.get('inactive_ingredient', ''))
+        
+        if norm_food in act_ing or norm_food in inact_ing:
+            results.append(InteractionResult(
+                interaction_id=f"FDA-ALG-{drug.upper()}",
+                food_name=food,
+                drug_name=drug_info.get('brand_name', drug),
+                drug_class='FDA Dynamic Check',
+                severity='high',
+                effect=f"Contains {food} as an ingredient. Potential for severe allergic reaction.",
+                recommendation="Avoid this medication and consult your prescriber immediately.",
+                evidence_level="strong",
+                matched_food_term=food,
+                matched_drug_term=drug
+            ))
+            return results
+        
+        # Check interaction texts
+        inter_txt = self._normalize(drug_info.get('drug_interactions', ''))
+        warn_txt = self._normalize(drug_info.get('warnings', ''))
+        contra_txt = self._normalize(drug_info.get('contraindications', ''))
+        
+        if norm_food in inter_txt or norm_food in warn_txt or norm_food in contra_txt:
+            results.append(InteractionResult(
+                interaction_id=f"FDA-TXT-{drug.upper()}",
+                food_name=food,
+                drug_name=drug_info.get('brand_name', drug),
+                drug_class='FDA Dynamic Check',
+                severity='medium',
+                effect=f"The FDA label for this drug mentions '{food}' in its warnings or interactions.",
+                recommendation="Review the FDA drug label or consult a pharmacist to evaluate safely consuming this item.",
+                evidence_level="moderate",
+                matched_food_term=food,
+                matched_drug_term=drug
+            ))
+        
+        return results
+    
+    @staticmethod
+    def _sort_by_severity(results: List[InteractionResult]) -> List[InteractionResult]:
+        """Sort by severity (high first)"""
         severity_order = {'high': 0, 'medium': 1, 'low': 2, 'unknown': 3}
         results.sort(key=lambda x: severity_order.get(x.severity, 3))
-        
         return results
     
     def check_food_against_medications(self, food: str, medications: List[str]) -> dict:
@@ -274,7 +297,46 @@ class InteractionEngine:
             results = self.check_interaction(food, med)
             all_results.extend(results)
         
-        # Group by severity
+        return self._group_results(food, medications_checked, all_results)
+    
+    def check_foods_against_medications(self, foods: List[str], medications: List[str],
+                                        fetch_labels: bool = True) -> dict:
+        """
+        Check many foods against one medication list
+        Same results as check_food_against_medications per food, but each
+        drug's FDA label is fetched at most once for the whole batch
+        fetch_labels: False to use only labels already in the lookup cache
+        (no OpenFDA request); drugs without one get local data only
+        Returns: {food: result} for every distinct food passed in
+        """
+        medications_checked = [med.strip() for med in medications if med and med.strip()]
+        labels = {}
+        
+        def label(drug):
+            if drug not in labels:
+                from app.services.openfda_service import get_drug_detail
+                if not fetch_labels and get_drug_detail.cached_at(drug) is None:
+                    labels[drug] = None
+                    return None
+                fda_res = get_drug_detail(drug)
+                labels[drug] = fda_res.get('drug') if fda_res.get('success') else None
+            return labels[drug]
+        
+        screened = {}
+        for food in dict.fromkeys(foods):
+            all_results = []
+            for med in medications_checked:
+                results = self._local_interactions(food, med) if food else []
+                if food and not results and label(med):
+                    results = self._label_interactions(food, med, label(med))
+                all_results.extend(self._sort_by_severity(results))
+            screened[food] = self._group_results(food, medications_checked, all_results)
+        
+        return screened
+    
+    @staticmethod
+    def _group_results(food: str, medications_checked: List[str], all_results: List[InteractionResult]) -> dict:
+        """Group interaction matches by severity, dropping duplicates"""
         grouped = {"high": [], "medium": [], "low": []}
         seen_ids = set()  # Avoid duplicates
         
@@ -302,22 +364,35 @@ class InteractionEngine:
     
     def get_all_interactions_for_drug(self, drug: str) -> List[dict]:
         """Get all known food interactions for a specific drug"""
-        results = []
+        return self.get_all_interactions_for_drugs([drug]).get(drug, [])
+    
+    def get_all_interactions_for_drugs(self, drugs: List[str]) -> dict:
+        """
+        Get known food interactions for many drugs in one pass over the data
+        Local interaction data only (no OpenFDA fallback)
+        Returns: {drug: [interaction, ...]} for every drug passed in
+        """
+        results = {drug: [] for drug in drugs}
         
         for interaction in self._interactions:
             drug_data = interaction.get('drug', {})
+            food_data = interaction.get('food', {})
+            entry = None
             
-            if self._match_drug(drug, drug_data):
-                food_data = interaction.get('food', {})
-                results.append({
-                    "interaction_id": interaction.get('id'),
-                    "food": food_data.get('name'),
-                    "food_category": food_data.get('category'),
-                    "foods_to_avoid": [food_data.get('name')] + food_data.get('aliases', [])[:3],
-                    "severity": interaction.get('severity'),
-                    "effect": interaction.get('effect'),
-                    "recommendation": interaction.get('recommendation')
-                })
+            for drug in results:
+                if not self._match_drug(drug, drug_data):
+                    continue
+                if entry is None:
+                    entry = {
+                        "interaction_id": interaction.get('id'),
+                        "food": food_data.get('name'),
+                        "food_category": food_data.get('category'),
+                        "foods_to_avoid": [food_data.get('name')] + food_data.get('aliases', [])[:3],
+                        "severity": interaction.get('severity'),
+                        "effect": interaction.get('effect'),
+                        "recommendation": interaction.get('recommendation')
+                    }
+                results[drug].append(entry)
         
         return results
     
@@ -365,16 +440,32 @@ def check_food_against_medications(food: str, medications: List[str]) -> dict:
     return get_engine().check_food_against_medications(food, medications)
 
 
+def check_foods_against_medications(foods: List[str], medications: List[str],
+                                    fetch_labels: bool = True) -> dict:
+    """Convenience function to check many foods against multiple meds"""
+    return get_engine().check_foods_against_medications(foods, medications, fetch_labels)
+
+
 def get_drug_interactions(drug: str) -> List[dict]:
     """Get all food interactions for a drug"""
     return get_engine().get_all_interactions_for_drug(drug)
 
 
+def get_drugs_interactions(drugs: List[str]) -> dict:
+    """Get all food interactions for many drugs at once"""
+    return get_engine().get_all_interactions_for_drugs(drugs)
+
+
 def get_food_interactions(food: str) -> List[dict]:
     """Get all drug interactions for a food"""
     return get_engine().get_all_interactions_for_food(food)
 
 
+def get_snapshot() -> str:
+    """Version of the loaded interaction data (for response validators)"""
+    return get_engine().snapshot
+
+
 def get_interaction_stats() -> dict:
     """Get statistics about the interaction database"""
     return get_engine().stats
\ No newline at end of file
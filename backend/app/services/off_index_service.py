@@ -0,0 +1,251 @@
+"""
+Open Food Facts Local Index Service
+Streams the Open Food Facts JSONL or CSV export into a local product
+index and serves search / barcode lookups from it
+Dump downloads: https://world.openfoodfacts.org/data
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import re
+import sys
+import unicodedata
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import func, insert
+
+from app import db
+from app.models.product_index import LocalProduct, LocalProductToken
+from app.services.openfoodfacts_service import normalize_barcode, _parse_product_detail
+
+logger = logging.getLogger(__name__)
+
+MAX_TOKENS_PER_PRODUCT = 32
+
+# CSV export columns that hold comma-separated tag lists
+_CSV_TAG_COLUMNS = ("categories_tags", "allergens_tags", "traces_tags", "additives_tags")
+
+
+def is_enabled() -> bool:
+    """Check whether lookups should be served from the local index"""
+    try:
+        return bool(current_app.config.get('OFF_LOCAL_INDEX', False))
+    except RuntimeError:
+        return False
+
+
+def tokenize(text: str) -> list:
+    """
+    Split product text into normalized search tokens
+    Lowercase, accents stripped, alphanumeric words of 2+ characters cut to
+    64 characters, first occurrence only. Local search matches whole tokens
+    exactly (no prefix or substring matching), and only a product's first
+    MAX_TOKENS_PER_PRODUCT tokens are indexed.
+    """
+    if not text:
+        return []
+    folded = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    tokens, seen = [], set()
+    for word in re.findall(r'[a-z0-9]+', folded):
+        token = word[:64]
+        if len(token) > 1 and token not in seen:
+            seen.add(token)
+            tokens.append(token)
+    return tokens
+
+
+def _open_dump(path: str):
+    """Open a dump file as text, transparently handling .gz"""
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def _csv_row_to_product(row: dict) -> dict:
+    """Map a row of the OFF CSV export onto the API product shape"""
+    item = {k: v for k, v in row.items() if k and v not in (None, '')}
+
+    nutriments = {}
+    for key, value in item.items():
+        if key.endswith('_100g'):
+            try:
+                nutriments[key] = float(value)
+            except ValueError:
+                continue
+    item["nutriments"] = nutriments
+
+    for key in _CSV_TAG_COLUMNS:
+        if key in item:
+            item[key] = [tag.strip() for tag in item[key].split(',') if tag.strip()]
+
+    if "allergens_tags" not in item and "allergens" in item:
+        item["allergens_tags"] = [tag.strip() for tag in item["allergens"].split(',') if tag.strip()]
+    if "image_url" in item:
+        item.setdefault("image_front_url", item["image_url"])
+    if "image_small_url" in item:
+        item.setdefault("image_front_small_url", item["image_small_url"])
+    if "nova_group" in item:
+        try:
+            item["nova_group"] = int(float(item["nova_group"]))
+        except ValueError:
+            item.pop("nova_group")
+
+    return item
+
+
+def iter_dump_records(path: str) -> Iterator[dict]:
+    """
+    Stream raw product records from an OFF export, one at a time
+    JSONL (one product document per line) or the tab-separated CSV export,
+    optionally gzipped. Memory use is independent of the file size.
+    """
+    is_csv = re.search(r'\.(csv|tsv)(\.gz)?$', path) is not None
+
+    with _open_dump(path) as f:
+        if not is_csv:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed JSON on line {line_number} of {path}")
+            return
+
+        csv.field_size_limit(sys.maxsize)
+        header = f.readline()
+        delimiter = '\t' if '\t' in header else ','
+        fieldnames = next(csv.reader([header], delimiter=delimiter))
+        for row in csv.DictReader(f, fieldnames=fieldnames, delimiter=delimiter):
+            yield _csv_row_to_product(row)
+
+
+def _flush_batch(batch: dict):
+    """Replace a batch of products and their tokens in one transaction"""
+    barcodes = list(batch.keys())
+
+    LocalProductToken.query.filter(LocalProductToken.barcode.in_(barcodes)).delete(synchronize_session=False)
+    LocalProduct.query.filter(LocalProduct.barcode.in_(barcodes)).delete(synchronize_session=False)
+
+    now = datetime.now(timezone.utc)
+    product_rows = []
+    token_rows = []
+    for barcode, product in batch.items():
+        product_rows.append({
+            "barcode": barcode,
+            "product_name": product["product_name"][:255],
+            "product_json": json.dumps(product, separators=(',', ':')),
+            "updated_at": now
+        })
+        tokens = tokenize(f'{product["product_name"]} {product.get("brands", "")}')
+        for token in tokens[:MAX_TOKENS_PER_PRODUCT]:
+            token_rows.append({"token": token, "barcode": barcode})
+
+    db.session.execute(insert(LocalProduct), product_rows)
+    if token_rows:
+        db.session.execute(insert(LocalProductToken), token_rows)
+    db.session.commit()
+
+
+def ingest_dump(path: str, batch_size: int = 1000, progress=None) -> dict:
+    """
+    Load an OFF export into the local index
+    Each record goes through _parse_product_detail (and so parse_ingredients);
+    products without a valid barcode or name are skipped. Existing entries
+    for the same barcode are replaced.
+    Returns: counts of records read, indexed and skipped
+    """
+    stats = {"read": 0, "indexed": 0, "skipped": 0}
+    batch = {}
+
+    for record in iter_dump_records(path):
+        stats["read"] += 1
+
+        barcode = normalize_barcode(record.get("code"))
+        if not barcode or not record.get("product_name"):
+            stats["skipped"] += 1
+            continue
+
+        product = _parse_product_detail(record)
+        product["off_id"] = barcode
+        batch[barcode] = product
+
+        if len(batch) >= batch_size:
+            _flush_batch(batch)
+            stats["indexed"] += len(batch)
+            batch = {}
+            if progress:
+                progress(stats)
+
+    if batch:
+        _flush_batch(batch)
+        stats["indexed"] += len(batch)
+        if progress:
+            progress(stats)
+
+    return stats
+
+
+def get_local_product(barcode: str) -> Optional[dict]:
+    """Look up a product in the local index by normalized barcode"""
+    entry = db.session.get(LocalProduct, barcode)
+    return entry.to_product() if entry else None
+
+
+def get_local_products(barcodes: list) -> dict:
+    """Look up many normalized barcodes in the local index in one query"""
+    if not barcodes:
+        return {}
+    entries = LocalProduct.query.filter(LocalProduct.barcode.in_(barcodes)).all()
+    return {entry.barcode: entry.to_product() for entry in entries}
+
+
+def search_local(query: str, limit: int = 10, page: int = 1) -> dict:
+    """
+    Search the local index: products whose name/brand contain every query
+    token as a whole word (exact token match, see tokenize)
+    Returns: the same shape as openfoodfacts_service.search_products
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return {"success": True, "count": 0, "total_hits": 0, "page": page, "products": []}
+
+    matches = db.session.query(LocalProductToken.barcode).filter(
+        LocalProductToken.token.in_(tokens)
+    ).group_by(LocalProductToken.barcode).having(
+        func.count(LocalProductToken.token) == len(tokens)
+    ).subquery()
+
+    total_hits = db.session.query(func.count()).select_from(matches).scalar() or 0
+
+    rows = db.session.query(LocalProduct.product_json).join(
+        matches, LocalProduct.barcode == matches.c.barcode
+    ).order_by(LocalProduct.product_name, LocalProduct.barcode).offset(
+        (page - 1) * limit
+    ).limit(limit).all()
+
+    products = [json.loads(row.product_json) for row in rows]
+
+    return {
+        "success": True,
+        "count": len(products),
+        "total_hits": total_hits,
+        "page": page,
+        "products": products,
+        "source": "local_index"
+    }
+
+
+def index_stats() -> dict:
+    """Get size of the local index"""
+    return {
+        "products": db.session.query(func.count(LocalProduct.barcode)).scalar() or 0,
+        "tokens": db.session.query(func.count(LocalProductToken.token)).scalar() or 0,
+        "enabled": is_enabled()
+    }
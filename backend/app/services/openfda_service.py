@@ -5,10 +5,15 @@ Docs: https://open.fda.gov/apis/drug/
 """
 
 import requests
+from app.services.cache import TTLCache, cached_lookup
 
 BASE_URL = "https://api.fda.gov/drug"
 
+# Successful responses per worker, for LOOKUP_CACHE_TTL seconds
+_lookup_cache = TTLCache(maxsize=1024)
 
+
+@cached_lookup(_lookup_cache)
 def search_drug(query: str, limit: int = 5):
     """
     Search drugs by brand or generic name
@@ -56,6 +61,7 @@ def search_drug(query: str, limit: int = 5):
         return {"success": False, "error": str(e)}
 
 
+@cached_lookup(_lookup_cache)
 def get_adverse_events(drug_name: str, limit: int = 5):
     """
     Get adverse event reports for a drug
@@ -98,6 +104,7 @@ def get_adverse_events(drug_name: str, limit: int = 5):
         return {"success": False, "error": str(e)}
 
 
+@cached_lookup(_lookup_cache)
 def get_drug_recalls(drug_name: str, limit: int = 5):
     """
     Check for drug recalls
@@ -138,6 +145,7 @@ def get_drug_recalls(drug_name: str, limit: int = 5):
         return {"success": False, "error": str(e)}
 
 
+@cached_lookup(_lookup_cache)
 def get_drug_detail(drug_id: str):
     """
     Get full drug label by application number or search term
@@ -195,6 +203,7 @@ def get_drug_detail(drug_id: str):
         return {"success": False, "error": str(e)}
 
 
+@cached_lookup(_lookup_cache)
 def get_drug_drug_interactions(drug_name: str):
     """
     Get drug-drug interaction info from the drug label
@@ -238,6 +247,7 @@ def get_drug_drug_interactions(drug_name: str):
         return {"success": False, "error": str(e)}
 
 
+@cached_lookup(_lookup_cache)
 def get_side_effects(drug_name: str):
     """
     Get side effects / adverse reactions for a drug from FDA labels
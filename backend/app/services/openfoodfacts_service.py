@@ -4,14 +4,28 @@ Handles search, barcode lookup, and product details for packaged/branded foods
 Docs: https://wiki.openfoodfacts.org/API
 """
 
+import re
 import requests
 import logging
+import concurrent.futures
+from typing import Optional
+from urllib.parse import quote
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from app.services.cache import TTLCache, cached_lookup
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://world.openfoodfacts.org"
 USER_AGENT = "Medible/1.0 (https://medible.app)"
 
+DEFAULT_CACHE_TTL = 7 * 86400       # 7 days for known products
+DEFAULT_NEGATIVE_CACHE_TTL = 86400  # 1 day for unknown barcodes
+
+# Successful search responses per worker, for LOOKUP_CACHE_TTL seconds
+_search_cache = TTLCache(maxsize=1024)
+
 
 def _make_request(url: str, params: dict = None, timeout: int = 10) -> dict:
     """Make a request to Open Food Facts API with standard error handling"""
@@ -33,11 +47,17 @@ def _make_request(url: str, params: dict = None, timeout: int = 10) -> dict:
         return {"success": False, "error": str(e)}
 
 
+@cached_lookup(_search_cache)
 def search_products(query: str, limit: int = 10, page: int = 1) -> dict:
     """
     Search packaged foods by name
+    Served from the local dump index when OFF_LOCAL_INDEX is enabled
     Returns: list of products with nutrition info
     """
+    from app.services import off_index_service
+    if off_index_service.is_enabled():
+        return off_index_service.search_local(query, limit, page)
+
     url = f"{BASE_URL}/cgi/search.pl"
     params = {
         "search_terms": query,
@@ -74,12 +94,143 @@ def search_products(query: str, limit: int = 10, page: int = 1) -> dict:
     }
 
 
+def normalize_barcode(barcode) -> Optional[str]:
+    """
+    Normalize a UPC/EAN barcode to its canonical GTIN form
+    UPC-A (12 digits) and GTIN-14 with a zero indicator collapse to EAN-13,
+    EAN-8/EAN-13/GTIN-14 are kept as-is.
+    Returns: normalized code, or None if malformed or the check digit is wrong
+    """
+    if barcode is None:
+        return None
+
+    code = str(barcode).strip()
+    if not re.fullmatch(r'[0-9]+', code):
+        return None
+
+    if len(code) == 12:
+        code = "0" + code
+    elif len(code) == 14 and code.startswith("0"):
+        code = code[1:]
+    elif len(code) not in (8, 13, 14):
+        return None
+
+    if not _gtin_check_digit_valid(code):
+        return None
+
+    return code
+
+
+def _gtin_check_digit_valid(code: str) -> bool:
+    """Validate the GS1 mod-10 check digit of a GTIN"""
+    digits = [int(c) for c in code]
+    body, check_digit = digits[:-1], digits[-1]
+    total = sum(
+        digit * (3 if i % 2 == 0 else 1)
+        for i, digit in enumerate(reversed(body))
+    )
+    return (10 - total % 10) % 10 == check_digit
+
+
+def _cache_ttls() -> tuple:
+    """Get (positive, negative) cache TTLs from config"""
+    try:
+        return (
+            current_app.config.get('OFF_CACHE_TTL', DEFAULT_CACHE_TTL),
+            current_app.config.get('OFF_NEGATIVE_CACHE_TTL', DEFAULT_NEGATIVE_CACHE_TTL)
+        )
+    except RuntimeError:
+        return DEFAULT_CACHE_TTL, DEFAULT_NEGATIVE_CACHE_TTL
+
+
+def _get_cached_product(code: str) -> Optional[dict]:
+    """Return a cached lookup result for a normalized barcode, if fresh"""
+    from app.models.product_cache import ProductCache
+
+    try:
+        entry = ProductCache.get_fresh(code)
+    except (RuntimeError, SQLAlchemyError) as e:
+        logger.warning(f"Product cache read failed for {code}: {e}")
+        return None
+
+    if not entry:
+        return None
+
+    product = entry.to_product()
+    if product is None:
+        return {"success": True, "product": None, "message": "Product not found", "cached": True}
+    return {"success": True, "product": product, "cached": True}
+
+
+def _cache_product(code: str, product: Optional[dict]):
+    """Store a lookup result; None is cached as a negative entry"""
+    from app.models.product_cache import ProductCache
+
+    ttl, negative_ttl = _cache_ttls()
+    try:
+        ProductCache.store(code, product, ttl if product is not None else negative_ttl)
+    except (RuntimeError, SQLAlchemyError) as e:
+        logger.warning(f"Product cache write failed for {code}: {e}")
+
+
 def get_product_by_barcode(barcode: str) -> dict:
     """
     Look up a product by UPC/EAN barcode
+    Served from the local dump index or the persistent product cache when
+    possible; invalid barcodes and cached misses never reach the network.
     Returns: product details with full nutrition and ingredients
     """
-    url = f"{BASE_URL}/api/v2/product/{barcode}"
+    code = normalize_barcode(barcode)
+    if not code:
+        return {"success": True, "product": None, "message": "Invalid barcode"}
+
+    from app.services import off_index_service
+    if off_index_service.is_enabled():
+        product = off_index_service.get_local_product(code)
+        if product:
+            return {"success": True, "product": product, "source": "local_index"}
+
+    cached = _get_cached_product(code)
+    if cached is not None:
+        return cached
+
+    result = _fetch_product(code)
+    if result.get("success"):
+        _cache_product(code, result.get("product"))
+
+    return result
+
+
+def product_cached_at(barcode: str) -> Optional[datetime]:
+    """
+    When the stored copy of a barcode's lookup was taken (local index row or
+    fresh product cache entry), or None when the next lookup goes upstream
+    """
+    from app import db
+    from app.models.product_cache import ProductCache
+    from app.models.product_index import LocalProduct
+    from app.services import off_index_service
+
+    code = normalize_barcode(barcode)
+    if not code:
+        return None
+    try:
+        if off_index_service.is_enabled():
+            updated_at = db.session.query(LocalProduct.updated_at).filter(LocalProduct.barcode == code).scalar()
+            if updated_at is not None:
+                return updated_at
+        return db.session.query(ProductCache.fetched_at).filter(
+            ProductCache.barcode == code,
+            ProductCache.expires_at > datetime.now(timezone.utc)
+        ).scalar()
+    except (RuntimeError, SQLAlchemyError) as e:
+        logger.warning(f"Product cache read failed for {code}: {e}")
+        return None
+
+
+def _fetch_product(barcode: str) -> dict:
+    """Fetch and parse a single product from the Open Food Facts API"""
+    url = f"{BASE_URL}/api/v2/product/{quote(barcode, safe='')}"
     params = {
         "fields": "code,product_name,brands,image_front_url,image_front_small_url,"
                   "nutriscore_grade,nutriments,categories_tags,ingredients_text,"
@@ -104,12 +255,102 @@ def get_product_by_barcode(barcode: str) -> dict:
     }
 
 
+def _batch_max_workers() -> int:
+    try:
+        return current_app.config.get('OFF_BATCH_MAX_WORKERS', 8)
+    except RuntimeError:
+        return 8
+
+
+def get_products_by_barcodes(barcodes: list, max_workers: int = None) -> dict:
+    """
+    Look up many barcodes at once
+    Codes are normalized and deduplicated; local index and cache hits are
+    served with one query each, and the misses are fetched concurrently
+    with at most max_workers requests in flight.
+    Returns: {"results": [...], "invalid": [...]} with one result per unique
+             normalized barcode, in request order
+    """
+    inputs_by_code = {}
+    invalid = []
+    for raw in barcodes:
+        code = normalize_barcode(raw)
+        if code:
+            inputs_by_code.setdefault(code, []).append(str(raw).strip())
+        else:
+            invalid.append(raw)
+
+    codes = list(inputs_by_code)
+    results = {}
+
+    from app.services import off_index_service
+    if off_index_service.is_enabled():
+        for code, product in off_index_service.get_local_products(codes).items():
+            if product:
+                results[code] = {"status": "found", "product": product, "source": "local_index"}
+
+    pending = [code for code in codes if code not in results]
+    if pending:
+        from app.models.product_cache import ProductCache
+        try:
+            cached = ProductCache.get_fresh_many(pending)
+        except (RuntimeError, SQLAlchemyError) as e:
+            logger.warning(f"Product cache batch read failed: {e}")
+            cached = {}
+        for code, entry in cached.items():
+            product = entry.to_product()
+            results[code] = {
+                "status": "found" if product else "not_found",
+                "product": product,
+                "source": "cache"
+            }
+
+    misses = [code for code in codes if code not in results]
+    if misses:
+        workers = min(max_workers or _batch_max_workers(), len(misses))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = dict(zip(misses, executor.map(_fetch_product, misses)))
+
+        to_cache = {}
+        ttl, negative_ttl = _cache_ttls()
+        for code, result in fetched.items():
+            if not result.get("success"):
+                results[code] = {"status": "error", "product": None, "error": result.get("error")}
+                continue
+            product = result.get("product")
+            results[code] = {
+                "status": "found" if product else "not_found",
+                "product": product,
+                "source": "openfoodfacts"
+            }
+            to_cache[code] = (product, ttl if product is not None else negative_ttl)
+
+        if to_cache:
+            from app.models.product_cache import ProductCache
+            try:
+                ProductCache.store_many(to_cache)
+            except (RuntimeError, SQLAlchemyError) as e:
+                logger.warning(f"Product cache batch write failed: {e}")
+
+    return {
+        "results": [
+            {"barcode": code, "inputs": inputs_by_code[code], **results[code]}
+            for code in codes
+        ],
+        "invalid": invalid
+    }
+
+
 def get_product_detail(off_id: str) -> dict:
     """
     Get detailed product info by Open Food Facts product code
+    Codes that pass the GTIN check share the barcode cache with
+    get_product_by_barcode; any other code is fetched exactly as given
     Returns: full nutrition, ingredients, allergens, additives
     """
-    return get_product_by_barcode(off_id)
+    if normalize_barcode(off_id):
+        return get_product_by_barcode(off_id)
+    return _fetch_product(off_id)
 
 
 def parse_ingredients(product_data: dict) -> list:
@@ -132,7 +373,6 @@ def parse_ingredients(product_data: dict) -> list:
 
     # Parse comma-separated ingredient list
     # Remove parenthetical info and clean up
-    import re
     cleaned = re.sub(r'\([^)]*\)', '', ingredients_text)
     cleaned = re.sub(r'\[[^\]]*\]', '', cleaned)
 
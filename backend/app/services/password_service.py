@@ -0,0 +1,157 @@
+"""
+Password Hashing Service
+Runs password hashing and verification on a bounded process pool so that
+slow, deliberately expensive hashes do not hold the GIL on request threads.
+The algorithm and cost come from PASSWORD_HASH_METHOD (any werkzeug method
+string, e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1'; unset means the
+installed werkzeug's pbkdf2:sha256 default, which existing hashes use);
+hashes made with other parameters are upgraded on the next successful login.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+from app.errors import AppError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METHOD = f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'
+SALT_LENGTH = 16
+
+# werkzeug's scrypt parameters when the method string leaves them out
+_SCRYPT_DEFAULTS = (2 ** 15, 8, 1)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_executor_lock = threading.Lock()
+
+
+class PasswordHashingBusyError(AppError):
+    """Too many password operations are already queued on this worker"""
+    def __init__(self, message: str = "Server is busy, please retry", details: dict = None):
+        super().__init__(message, 503, "PASSWORD_HASHING_BUSY", details)
+
+
+def _config(key: str, default):
+    try:
+        return current_app.config.get(key, default)
+    except RuntimeError:
+        return default
+
+
+def current_method() -> str:
+    return _config('PASSWORD_HASH_METHOD', None) or DEFAULT_METHOD
+
+
+def normalize_method(method: str) -> str:
+    """
+    Method string with werkzeug's defaults filled in, as stored in hashes
+    e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:600000', 'scrypt' -> 'scrypt:32768:8:1'
+    """
+    name, *params = (method or '').split(':')
+    if name == 'pbkdf2':
+        hash_name = params[0] if params and params[0] else 'sha256'
+        iterations = int(params[1]) if len(params) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    if name == 'scrypt':
+        values = [int(value) for value in params[:3]]
+        return 'scrypt:' + ':'.join(str(value) for value in values + list(_SCRYPT_DEFAULTS[len(values):]))
+    return method
+
+
+def hash_method(password_hash: str) -> str:
+    """Method string a stored hash was made with (e.g. 'pbkdf2:sha256:600000')"""
+    return password_hash.split('$', 1)[0] if password_hash else ''
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Check whether a stored hash uses different parameters than PASSWORD_HASH_METHOD"""
+    return normalize_method(hash_method(password_hash)) != normalize_method(current_method())
+
+
+def _get_executor():
+    """The worker's process pool, started on first use (after any fork)"""
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = max(int(_config('PASSWORD_HASH_WORKERS', 2)), 1)
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _slots = threading.BoundedSemaphore(workers + max(int(_config('PASSWORD_HASH_QUEUE', 8)), 0))
+        return _executor, _slots
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is executor:
+            _executor, _slots = None, None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(fn, *args):
+    """
+    Run fn on the pool, or inline when PASSWORD_HASH_WORKERS is 0
+    A queue slot is held until the pool finishes the call, even when the
+    request has stopped waiting for it. Timeouts and a crashed pool (which
+    is replaced) are reported as 503s.
+    """
+    if int(_config('PASSWORD_HASH_WORKERS', 2)) <= 0:
+        return fn(*args)
+
+    executor, slots = _get_executor()
+    timeout = float(_config('PASSWORD_HASH_TIMEOUT', 10))
+    if not slots.acquire(timeout=timeout):
+        raise PasswordHashingBusyError()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        slots.release()
+        logger.error("Password hashing pool is broken, starting a new one")
+        _discard_executor(executor)
+        raise PasswordHashingBusyError()
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.warning(f"Password hashing took longer than {timeout:g}s")
+        raise PasswordHashingBusyError("Password check timed out, please retry")
+    except BrokenProcessPool:
+        logger.error("Password hashing pool crashed, starting a new one")
+        _discard_executor(executor)
+        raise PasswordHashingBusyError()
+
+
+def hash_password(password: str, method: str = None) -> str:
+    """Hash a password with the configured (or given) method"""
+    return _run(generate_password_hash, password, method or current_method(), SALT_LENGTH)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Check a password against a stored hash"""
+    if not password_hash:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+def shutdown():
+    """Stop the process pool (it is restarted on next use)"""
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor, _slots = None, None
@@ -0,0 +1,195 @@
+"""
+Principal Cache
+Per-worker cache of the user fields authentication needs (is_active,
+is_admin, deleted_at), so authenticated requests resolve the current user
+without a users query. Entries are dropped whenever a User row is flushed in
+this worker. Changes made by other workers are picked up from the users'
+updated_at stamps: every PRINCIPAL_CACHE_REFRESH_SECONDS one query lists the
+users updated since the last check, and cached entries whose stamp differs
+are dropped. Entries also expire after PRINCIPAL_CACHE_TTL seconds.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.services.cache import TTLCache
+
+# Overlap each stamp check by this much so updates committed slightly out of
+# updated_at order (or stamped by a worker with a lagging clock) are not missed
+_WATERMARK_OVERLAP = timedelta(seconds=5)
+
+
+def _utc(value: datetime) -> datetime:
+    """Treat naive datetimes (SQLite) as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class Principal:
+    """
+    The authenticated user for a request (read-only; change the User row)
+    Auth fields are plain attributes; anything else (to_dict, first_name,
+    check_password, ...) loads the User row on first use
+    """
+
+    FIELDS = ('id', 'email', 'is_active', 'is_admin', 'deleted_at', 'updated_at')
+    __slots__ = FIELDS + ('_user',)
+
+    def __init__(self, fields: dict, user=None):
+        for field in self.FIELDS:
+            object.__setattr__(self, field, fields[field])
+        object.__setattr__(self, '_user', user)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Principal is read-only (cannot set {name}); update the User instead")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Principal is read-only (cannot delete {name})")
+
+    @property
+    def user(self):
+        """The full User model (loaded once per request)"""
+        if self._user is None:
+            from app.models.user import User
+            object.__setattr__(self, '_user', User.find_by_id(self.id))
+        return self._user
+
+    @property
+    def version(self) -> str:
+        return self.updated_at.isoformat() if isinstance(self.updated_at, datetime) else None
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set in __init__
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __repr__(self):
+        return f'<Principal {self.id} v={self.version}>'
+
+
+class PrincipalCache:
+    """user_id -> auth fields, invalidated on User flushes and updated_at stamps"""
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.refresh_interval = 5.0
+        self._cache = TTLCache(maxsize=10000, ttl=self.ttl)
+        self._generations = {}  # user_id -> invalidation count
+        self._watermark: Optional[datetime] = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = float(app.config.get('PRINCIPAL_CACHE_TTL', 30))
+        self.refresh_interval = float(app.config.get('PRINCIPAL_CACHE_REFRESH_SECONDS', 5))
+        self._cache = TTLCache(maxsize=int(app.config.get('PRINCIPAL_CACHE_SIZE', 10000)), ttl=self.ttl)
+        self._generations = {}
+        self._watermark = None
+        self._next_refresh = 0.0
+
+    def get(self, user_id: int):
+        """Cached Principal for a user, or None"""
+        fields = self._cache.get(user_id)
+        return Principal(fields) if fields is not None else None
+
+    def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, 0)
+
+    def load(self, user_id: int):
+        """
+        Principal for an active (non-deleted) user, from cache or one query
+        Returns None if the user does not exist or is deleted
+        """
+        if self.ttl > 0 and time.monotonic() >= self._next_refresh:
+            self.refresh()
+        principal = self.get(user_id)
+        if principal is not None:
+            return principal
+
+        from app.models.user import User
+        generation = self.generation(user_id)
+        user = User.find_by_id(user_id)
+        if user is None:
+            return None
+
+        fields = {field: getattr(user, field) for field in Principal.FIELDS}
+        with self._lock:
+            # Skip caching if the user was changed while we were loading it
+            if self.ttl > 0 and self.generation(user_id) == generation:
+                self._cache.set(user_id, fields, ttl=self.ttl)
+        return Principal(fields, user=user)
+
+    def refresh(self):
+        """Drop entries whose user was updated (by any worker) since the last check"""
+        from app import db
+        from app.models.user import User
+
+        with self._lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            now = datetime.now(timezone.utc)
+            if self._watermark is None:
+                # Nothing cached was loaded before now
+                self._watermark = now
+            else:
+                changed = db.session.query(User.id, User.updated_at).filter(
+                    User.updated_at >= self._watermark - _WATERMARK_OVERLAP
+                )
+                for user_id, updated_at in changed:
+                    cached = self._cache.get(user_id)
+                    if cached is not None and _utc(cached['updated_at']) != _utc(updated_at):
+                        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                        self._cache.pop(user_id)
+                    self._watermark = max(self._watermark, _utc(updated_at))
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                self._cache.pop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._generations.clear()
+            self._watermark = None
+            self._next_refresh = 0.0
+
+
+principal_cache = PrincipalCache()
+
+_CHANGED_USERS = 'principal_cache_user_ids'
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_flushed_users(session, flush_context):
+    """Drop cached principals for users written in this flush (again after commit)"""
+    from app.models.user import User
+
+    user_ids = {
+        obj.id for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if user_ids:
+        principal_cache.invalidate(user_ids)
+        session.info.setdefault(_CHANGED_USERS, set()).update(user_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    user_ids = session.info.pop(_CHANGED_USERS, None)
+    if user_ids:
+        principal_cache.invalidate(user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_users(session):
+    session.info.pop(_CHANGED_USERS, None)
@@ -0,0 +1,62 @@
+"""
+Reminder Dispatch Service
+Finds medication reminders that are due and advances their schedule.
+Meant to be run every minute by a scheduler (flask reminders dispatch).
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from app import db
+from app.models.favorites import MedicationReminder
+
+logger = logging.getLogger(__name__)
+
+
+def _log_reminder(reminder: MedicationReminder):
+    logger.info(
+        f"Reminder {reminder.id} due for user {reminder.user_id}: "
+        f"{reminder.medication.drug_name if reminder.medication else 'medication'} at {reminder.reminder_time}"
+    )
+
+
+def dispatch_due_reminders(now: datetime = None, limit: int = 500,
+                           handler: Optional[Callable] = None) -> list:
+    """
+    Deliver every due reminder and move it to its next occurrence
+    handler(reminder) does the delivery (defaults to logging); reminders whose
+    handler raises keep their next_fire_at and are retried on the next run.
+    Returns: list of dispatched reminder dicts
+    """
+    now = now or datetime.now(timezone.utc)
+    handler = handler or _log_reminder
+    dispatched = []
+
+    for reminder in MedicationReminder.get_due(now, limit=limit):
+        try:
+            handler(reminder)
+        except Exception as e:
+            logger.error(f"Reminder {reminder.id} delivery failed: {e}")
+            continue
+        dispatched.append(reminder.to_dict())
+        reminder.schedule_next(after=now)
+
+    db.session.commit()
+    return dispatched
+
+
+def backfill_schedules() -> int:
+    """
+    Compute next_fire_at for active reminders that do not have one yet
+    (rows created before the column existed)
+    Returns: number of reminders scheduled
+    """
+    reminders = MedicationReminder.query.filter(
+        MedicationReminder.is_active.is_(True),
+        MedicationReminder.next_fire_at.is_(None)
+    ).all()
+    for reminder in reminders:
+        reminder.schedule_next()
+    db.session.commit()
+    return len(reminders)
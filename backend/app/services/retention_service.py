@@ -0,0 +1,332 @@
+"""
+Retention Service
+Moves search_history and interaction_checks rows older than their retention
+horizon out of the live tables: full rows are appended to gzipped NDJSON
+files (one per table, user and month), counts are added to the monthly
+archive rollups, and the rows are deleted in small chunks, each its own
+short transaction. On PostgreSQL, tables created with native monthly range
+partitions have whole expired partitions archived and dropped instead.
+Clearing a user's history or deleting their account removes their archive
+files too (purge_user_archives).
+"""
+
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone, timedelta, date
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, AddConstraint
+
+from app import db
+from app.models.medication import SearchHistory, InteractionCheck
+from app.models.archive import SearchHistoryMonthly, InteractionCheckMonthly, month_start
+
+logger = logging.getLogger(__name__)
+
+# Table -> model, timestamp column, monthly rollup, retention config key and default days
+RETENTION_TABLES = {
+    "search_history": (SearchHistory, SearchHistory.searched_at, SearchHistoryMonthly,
+                       'RETENTION_SEARCH_HISTORY_DAYS', 180),
+    "interaction_checks": (InteractionCheck, InteractionCheck.checked_at, InteractionCheckMonthly,
+                           'RETENTION_INTERACTION_CHECKS_DAYS', 365),
+}
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f'{table}_p{month.year:04d}{month.month:02d}'
+
+
+def cutoff_for(table: str, now: datetime = None) -> Optional[datetime]:
+    """Rows older than this are archived; None when retention is off for the table"""
+    days = int(current_app.config.get(RETENTION_TABLES[table][3], RETENTION_TABLES[table][4]))
+    if days <= 0:
+        return None
+    # Timestamps are stored naive (UTC)
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
+    return now - timedelta(days=days)
+
+
+def archive_dir() -> str:
+    path = current_app.config.get('RETENTION_ARCHIVE_DIR') or os.path.join(current_app.instance_path, 'archive')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_archive_dir(table: str, user_id: Optional[int]) -> str:
+    """Directory holding one user's archive files for a table (anonymous/ for rows without a user)"""
+    return os.path.join(archive_dir(), table, str(user_id) if user_id is not None else 'anonymous')
+
+
+class ArchiveWriter:
+    """
+    Appends rows to {archive_dir}/{table}/{user_id}/{YYYY-MM}.ndjson.gz
+    Rows are buffered per file and written as one gzip member per file on
+    flush, so a chunk touching many users keeps no files open.
+    """
+
+    def __init__(self, table: str, enabled: bool = True):
+        self.table = table
+        self.enabled = enabled
+        self._pending = {}
+
+    def write(self, month: date, row: dict):
+        if not self.enabled:
+            return
+        self._pending.setdefault((row.get('user_id'), month), []).append(
+            json.dumps(row, separators=(',', ':'), default=str) + '\n'
+        )
+
+    def flush(self):
+        """Write everything buffered so far, before the matching rows are deleted"""
+        for (user_id, month), lines in self._pending.items():
+            directory = user_archive_dir(self.table, user_id)
+            os.makedirs(directory, exist_ok=True)
+            with gzip.open(os.path.join(directory, f'{month:%Y-%m}.ndjson.gz'), 'at', encoding='utf-8') as f:
+                f.writelines(lines)
+        self._pending = {}
+
+    def close(self):
+        """Drop anything not flushed (its rows were not deleted)"""
+        self._pending = {}
+
+
+def _rewrite_without_user(path: str, user_id: int) -> bool:
+    """Drop a user's lines from an archive file; returns whether any were dropped"""
+    dropped = False
+    temp_path = path + '.tmp'
+    with gzip.open(path, 'rt', encoding='utf-8') as source, \
+            gzip.open(temp_path, 'wt', encoding='utf-8') as target:
+        for line in source:
+            if line.strip() and json.loads(line).get('user_id') == user_id:
+                dropped = True
+            else:
+                target.write(line)
+    if dropped:
+        os.replace(temp_path, path)
+    else:
+        os.remove(temp_path)
+    return dropped
+
+
+def purge_user_archives(user_id: int, tables: list = None) -> int:
+    """
+    Remove a user's archived rows for the given tables (default: all): their
+    per-user directory, and their lines in any file from before archives
+    were split per user (written directly under {table}/)
+    Returns: number of files removed or rewritten
+    """
+    changed = 0
+    for table in tables or RETENTION_TABLES:
+        directory = user_archive_dir(table, user_id)
+        if os.path.isdir(directory):
+            changed += len(os.listdir(directory))
+            shutil.rmtree(directory)
+        for path in sorted(glob.glob(os.path.join(archive_dir(), table, '*.ndjson.gz'))):
+            changed += _rewrite_without_user(path, user_id)
+    if changed:
+        logger.info(f"Purged {changed} archive files for user {user_id}")
+    return changed
+
+
+class _RowView:
+    """Attribute access over a result mapping, for the rollup key functions"""
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+    def __getattr__(self, name):
+        return self._mapping[name]
+
+
+def _archive_rows(writer: ArchiveWriter, rollup, timestamp_key: str, rows) -> dict:
+    """Write rows to the archive files and return their rollup counts"""
+    counts = {}
+    for row in rows:
+        writer.write(month_start(row[timestamp_key]), dict(row))
+        key = rollup.key(_RowView(row))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def archive_table(table: str, cutoff: datetime = None, chunk_size: int = None,
+                  dry_run: bool = False) -> dict:
+    """
+    Archive and delete a table's rows older than cutoff (default: its retention horizon)
+    Returns: {"table", "cutoff", "archived", "chunks", "partitions_dropped"}
+    """
+    model, timestamp, rollup, _, _ = RETENTION_TABLES[table]
+    cutoff = cutoff or cutoff_for(table)
+    stats = {"table": table, "cutoff": cutoff.isoformat() if cutoff else None,
+             "archived": 0, "chunks": 0, "partitions_dropped": []}
+    if cutoff is None:
+        return stats
+
+    if dry_run:
+        stats["archived"] = db.session.query(func.count(model.id)).filter(timestamp < cutoff).scalar()
+        return stats
+
+    chunk_size = chunk_size or current_app.config.get('RETENTION_CHUNK_SIZE', 1000)
+    writer = ArchiveWriter(table, current_app.config.get('RETENTION_ARCHIVE_FILES', True))
+    try:
+        for month in droppable_partitions(table, cutoff):
+            stats["archived"] += _archive_partition(table, month, writer)
+            stats["partitions_dropped"].append(partition_name(table, month))
+
+        while True:
+            connection = db.session.connection()
+            rows = connection.execute(
+                select(model.__table__).where(timestamp < cutoff).order_by(model.id).limit(chunk_size)
+            ).mappings().all()
+            if not rows:
+                break
+            rollup.apply(connection, _archive_rows(writer, rollup, timestamp.key, rows))
+            # Core delete: the per-user interaction counters keep counting archived checks
+            connection.execute(delete(model).where(model.id.in_([row["id"] for row in rows])))
+            writer.flush()
+            db.session.commit()
+            stats["archived"] += len(rows)
+            stats["chunks"] += 1
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        writer.close()
+
+    logger.info(f"Archived {stats['archived']} {table} rows older than {stats['cutoff']}")
+    return stats
+
+
+def run_retention(tables: list = None, dry_run: bool = False, now: datetime = None) -> list:
+    """Apply each table's retention horizon; returns archive_table stats per table"""
+    return [
+        archive_table(table, cutoff=cutoff_for(table, now), dry_run=dry_run)
+        for table in (tables or RETENTION_TABLES)
+    ]
+
+
+# -- PostgreSQL native partitioning -------------------------------------------
+
+def _is_postgres() -> bool:
+    return db.engine.dialect.name == 'postgresql'
+
+
+def is_partitioned(table: str) -> bool:
+    """Whether the table is a PostgreSQL range-partitioned table"""
+    if not _is_postgres():
+        return False
+    return bool(db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table"
+    ), {"table": table}).scalar())
+
+
+def partition_months(table: str) -> list:
+    """Months with a partition named {table}_pYYYYMM, oldest first"""
+    if not is_partitioned(table):
+        return []
+    names = db.session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": table}).scalars()
+    months = []
+    prefix = f'{table}_p'
+    for name in names:
+        suffix = name[len(prefix):] if name.startswith(prefix) else ''
+        if len(suffix) == 6 and suffix.isdigit():
+            months.append(date(int(suffix[:4]), int(suffix[4:]), 1))
+    return sorted(months)
+
+
+def droppable_partitions(table: str, cutoff: datetime) -> list:
+    """Partition months that end on or before the cutoff"""
+    return [month for month in partition_months(table) if _next_month(month) <= cutoff.date()]
+
+
+def _archive_partition(table: str, month: date, writer: ArchiveWriter) -> int:
+    """Archive one month partition and drop it, in a single transaction"""
+    model, timestamp, rollup, _, _ = RETENTION_TABLES[table]
+    stmt = select(model.__table__).where(
+        timestamp >= month, timestamp < _next_month(month)
+    ).execution_options(yield_per=current_app.config.get('RETENTION_CHUNK_SIZE', 1000))
+
+    connection = db.session.connection()
+    archived = 0
+    for partition in connection.execute(stmt).mappings().partitions():
+        rollup.apply(connection, _archive_rows(writer, rollup, timestamp.key, partition))
+        writer.flush()
+        archived += len(partition)
+    name = partition_name(table, month)
+    connection.execute(text(f'ALTER TABLE {table} DETACH PARTITION {name}'))
+    connection.execute(text(f'DROP TABLE {name}'))
+    db.session.commit()
+    return archived
+
+
+def ensure_partitions(table: str, months_ahead: int = 3, today: date = None) -> list:
+    """Create monthly partitions from the current month through months_ahead; returns names created"""
+    if not is_partitioned(table):
+        return []
+    existing = set(partition_months(table))
+    month = month_start(today or date.today())
+    created = []
+    for _ in range(months_ahead + 1):
+        if month not in existing:
+            name = partition_name(table, month)
+            db.session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            ))
+            created.append(name)
+        month = _next_month(month)
+    db.session.commit()
+    return created
+
+
+def partitioning_ddl(table: str, first_month: date, months_ahead: int = 3) -> list:
+    """
+    Statements that convert a live table into a monthly range-partitioned one
+    (to run by hand in a maintenance window; the primary key gains the
+    timestamp column because PostgreSQL requires the partition key in it)
+    """
+    model, timestamp, _, _, _ = RETENTION_TABLES[table]
+    column = timestamp.key
+    statements = [
+        f'ALTER TABLE {table} RENAME TO {table}_unpartitioned',
+        f'CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE ({column})',
+        f'ALTER TABLE {table} ADD PRIMARY KEY (id, {column})',
+    ]
+    month = month_start(first_month)
+    last = month_start(date.today())
+    for _ in range(months_ahead):
+        last = _next_month(last)
+    while month <= last:
+        statements.append(
+            f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+    statements += [
+        f'INSERT INTO {table} SELECT * FROM {table}_unpartitioned',
+        # The id sequence (and its default) carried over; keep it when dropping the old table
+        f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id',
+        f'DROP TABLE {table}_unpartitioned',
+    ]
+    dialect = postgresql.dialect()
+    statements += [str(CreateIndex(index).compile(dialect=dialect)) for index in model.__table__.indexes]
+    statements += [
+        str(AddConstraint(constraint).compile(dialect=dialect))
+        for constraint in model.__table__.foreign_key_constraints
+    ]
+    return statements
@@ -0,0 +1,140 @@
+"""
+Token Revocation Cache
+Per-worker view of token_blacklist so that checking a token that was never
+revoked (nearly every request) does not touch the database: a bloom filter
+answers "definitely not revoked", backed by an exact map of non-expired JTIs.
+The map is loaded on first use and refreshed incrementally from a
+blacklisted_at watermark every REVOCATION_REFRESH_SECONDS.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Overlap each incremental refresh by this much so rows committed slightly
+# out of blacklisted_at order are not missed (duplicates are harmless)
+_WATERMARK_OVERLAP = timedelta(seconds=5)
+
+
+def _utc(value: datetime) -> datetime:
+    """Treat naive datetimes (SQLite) as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (double hashing on a blake2b digest)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationCache:
+    """Bloom filter plus exact JTI -> expires_at map of revoked, unexpired tokens"""
+
+    def __init__(self, app=None):
+        self.refresh_interval = 5.0
+        self.capacity = 100000
+        self._lock = threading.Lock()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_interval = float(app.config.get('REVOCATION_REFRESH_SECONDS', 5))
+        self.capacity = int(app.config.get('REVOCATION_BLOOM_CAPACITY', 100000))
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next lookup reloads from the database"""
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity)
+            self._revoked = {}
+            self._watermark: Optional[datetime] = None
+            self._next_refresh = 0.0
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check a JTI, refreshing from the database at most once per refresh interval"""
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        if jti not in self._bloom:
+            return False
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > datetime.now(timezone.utc)
+
+    def add(self, jti: str, expires_at: datetime):
+        """Record a revocation made by this worker without waiting for a refresh"""
+        with self._lock:
+            self._revoked[jti] = _utc(expires_at)
+            self._bloom.add(jti)
+
+    def refresh(self):
+        """Pull revocations newer than the watermark and drop expired entries"""
+        from app import db
+        from app.models.token_blacklist import TokenBlacklist
+
+        with self._lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            now = datetime.now(timezone.utc)
+            query = db.session.query(
+                TokenBlacklist.jti, TokenBlacklist.expires_at, TokenBlacklist.blacklisted_at
+            ).filter(TokenBlacklist.expires_at > now)
+            if self._watermark is not None:
+                query = query.filter(TokenBlacklist.blacklisted_at >= self._watermark - _WATERMARK_OVERLAP)
+
+            for jti, expires_at, blacklisted_at in query:
+                self._revoked[jti] = _utc(expires_at)
+                self._bloom.add(jti)
+                blacklisted_at = _utc(blacklisted_at)
+                if self._watermark is None or blacklisted_at > self._watermark:
+                    self._watermark = blacklisted_at
+            if self._watermark is None:
+                self._watermark = now
+
+            expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+            for jti in expired:
+                del self._revoked[jti]
+            if expired or len(self._revoked) > self.capacity:
+                self._rebuild_bloom()
+
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def _rebuild_bloom(self):
+        """Rebuild the filter from the exact map (after purging, or growing past capacity)"""
+        self.capacity = max(self.capacity, len(self._revoked) * 2)
+        self._bloom = BloomFilter(self.capacity)
+        for jti in self._revoked:
+            self._bloom.add(jti)
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._revoked),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hash_count,
+            "watermark": self._watermark.isoformat() if self._watermark else None
+        }
+
+
+revocation_cache = RevocationCache()
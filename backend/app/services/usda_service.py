@@ -7,9 +7,13 @@ Docs: https://fdc.nal.usda.gov/api-guide/
 import os
 import requests
 from flask import current_app
+from app.services.cache import TTLCache, cached_lookup
 
 BASE_URL = "https://api.nal.usda.gov/fdc/v1"
 
+# Successful responses per worker, for LOOKUP_CACHE_TTL seconds
+_lookup_cache = TTLCache(maxsize=1024)
+
 
 def get_api_key():
     """Get API key from config or environment"""
@@ -19,6 +23,7 @@ def get_api_key():
         return os.getenv('USDA_API_KEY', '')
 
 
+@cached_lookup(_lookup_cache)
 def search_food(query: str, limit: int = 10, data_type: list = None):
     """
     Search foods by name
@@ -54,6 +59,7 @@ def search_food(query: str, limit: int = 10, data_type: list = None):
                     "description": item.get("description", "Unknown"),
                     "brand_owner": item.get("brandOwner", "Generic"),
                     "data_type": item.get("dataType", "Unknown"),
+                    "gtin_upc": item.get("gtinUpc"),
                     "serving_size": item.get("servingSize"),
                     "serving_unit": item.get("servingSizeUnit", "g"),
                     "nutrients": {
@@ -90,6 +96,7 @@ def search_food(query: str, limit: int = 10, data_type: list = None):
         return {"success": False, "error": str(e)}
 
 
+@cached_lookup(_lookup_cache)
 def get_food_details(fdc_id: int):
     """
     Get detailed nutrition info for a specific food
@@ -0,0 +1,245 @@
+"""
+Write-Behind Queue
+Takes analytics-grade writes (search history, interaction checks, last-login
+timestamps) off the request path: requests enqueue rows and a background
+worker writes them as multi-row inserts/updates every WRITE_BEHIND_FLUSH_MS
+or WRITE_BEHIND_BATCH_SIZE rows, whichever comes first
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, update, bindparam
+
+logger = logging.getLogger(__name__)
+
+
+def _write_search_history(connection, rows: list):
+    from app.models.medication import SearchHistory
+    from app.models.platform_stats import PlatformCounter, search_deltas
+    connection.execute(insert(SearchHistory), rows)
+    PlatformCounter.apply(connection, *search_deltas(rows))
+
+
+def _write_interaction_checks(connection, rows: list):
+    """Insert checks and apply their interaction stats counters (no ORM flush here)"""
+    from app.models.medication import InteractionCheck
+    from app.models.interaction_stats import InteractionStats
+    from app.models.platform_stats import PlatformCounter
+
+    connection.execute(insert(InteractionCheck), rows)
+    PlatformCounter.apply(connection, {"interaction_checks": len(rows)})
+    deltas = {}
+    for row in rows:
+        key = (
+            row["user_id"],
+            InteractionCheck.severity_bucket(row.get("max_severity")),
+            (row["food_name"] or '').lower()[:255]
+        )
+        deltas[key] = deltas.get(key, 0) + 1
+    InteractionStats.apply(connection, deltas)
+
+
+def _write_last_logins(connection, rows: list):
+    """One UPDATE per user, keeping the latest login in the batch"""
+    from app.models.user import User
+
+    latest = {}
+    for row in rows:
+        if row["user_id"] not in latest or row["last_login_at"] > latest[row["user_id"]]:
+            latest[row["user_id"]] = row["last_login_at"]
+    connection.execute(
+        update(User).where(User.id == bindparam('b_user_id')).values(
+            last_login_at=bindparam('b_last_login_at')
+        ),
+        [{"b_user_id": user_id, "b_last_login_at": ts} for user_id, ts in latest.items()]
+    )
+
+
+# Queued row kind -> writer(connection, rows), applied in this order per batch
+WRITERS = {
+    "search_history": _write_search_history,
+    "interaction_check": _write_interaction_checks,
+    "last_login": _write_last_logins,
+}
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue of pending writes with a single writer thread
+    When the queue is full, submit() waits up to WRITE_BEHIND_PUT_TIMEOUT_MS
+    for room and then drops the write (counted in metrics)
+    """
+
+    def __init__(self, app=None, start_worker: bool = True):
+        self.app = None
+        self.enabled = False
+        self.start_worker = start_worker
+        self._queue = None
+        self._worker = None
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = bool(app.config.get('WRITE_BEHIND_ENABLED', False))
+        self.batch_size = max(int(app.config.get('WRITE_BEHIND_BATCH_SIZE', 200)), 1)
+        self.flush_interval = app.config.get('WRITE_BEHIND_FLUSH_MS', 250) / 1000
+        self.put_timeout = app.config.get('WRITE_BEHIND_PUT_TIMEOUT_MS', 0) / 1000
+        self._queue = queue.Queue(maxsize=app.config.get('WRITE_BEHIND_MAX_QUEUE', 10000))
+        self._metrics = dict.fromkeys(
+            ("enqueued", "written", "dropped", "failed", "flushes", "max_depth"), 0
+        )
+        self._metrics["last_flush_at"] = None
+        if self.enabled:
+            atexit.register(self.shutdown)
+
+    def submit(self, kind: str, values: dict) -> bool:
+        """
+        Queue a row for writing
+        Returns: False if the write was dropped because the queue stayed full
+        """
+        if kind not in WRITERS:
+            raise ValueError(f"Unknown write-behind kind: {kind}")
+        self._ensure_worker()
+        try:
+            if self.put_timeout > 0:
+                self._queue.put((kind, values), timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait((kind, values))
+        except queue.Full:
+            self._count("dropped")
+            logger.warning(f"Write-behind queue full, dropped {kind} write")
+            return False
+
+        depth = self._queue.qsize()
+        with self._metrics_lock:
+            self._metrics["enqueued"] += 1
+            self._metrics["max_depth"] = max(self._metrics["max_depth"], depth)
+        return True
+
+    def flush(self) -> int:
+        """Write everything queued so far in the calling thread. Returns rows written."""
+        written = 0
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the worker and flush what is left (registered with atexit)"""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+        if self._queue is not None and self.app is not None:
+            self.flush()
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics["depth"] = self._queue.qsize() if self._queue is not None else 0
+        metrics["capacity"] = self._queue.maxsize if self._queue is not None else 0
+        metrics["enabled"] = self.enabled
+        return metrics
+
+    def _count(self, key: str, n: int = 1):
+        with self._metrics_lock:
+            self._metrics[key] += n
+
+    def _ensure_worker(self):
+        if not self.start_worker or (self._worker is not None and self._worker.is_alive()):
+            return
+        with self._metrics_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._worker.start()
+
+    def _take(self, block: bool = True) -> list:
+        """Collect up to batch_size items, waiting at most flush_interval after the first"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list) -> int:
+        """
+        Write a batch in one transaction; if that fails, retry each kind in
+        its own transaction and then each row of a failing kind, so one bad
+        row only loses itself. Returns rows written.
+        """
+        by_kind = {}
+        for kind, values in batch:
+            by_kind.setdefault(kind, []).append(values)
+
+        with self._write_lock, self.app.app_context():
+            try:
+                self._execute(by_kind)
+                written = len(batch)
+            except Exception as e:
+                logger.warning(f"Write-behind flush of {len(batch)} rows failed, retrying in parts: {e}")
+                written = sum(self._write_kind(kind, rows) for kind, rows in by_kind.items())
+
+        with self._metrics_lock:
+            self._metrics["written"] += written
+            self._metrics["failed"] += len(batch) - written
+            self._metrics["flushes"] += 1
+            self._metrics["last_flush_at"] = datetime.now(timezone.utc).isoformat()
+        return written
+
+    @staticmethod
+    def _execute(by_kind: dict):
+        """Run the writers for {kind: rows} in one transaction, in WRITERS order"""
+        from app import db
+
+        with db.engine.begin() as connection:
+            for kind, writer in WRITERS.items():
+                if kind in by_kind:
+                    writer(connection, by_kind[kind])
+
+    def _write_kind(self, kind: str, rows: list) -> int:
+        try:
+            self._execute({kind: rows})
+            return len(rows)
+        except Exception:
+            pass
+        written = 0
+        for row in rows:
+            try:
+                self._execute({kind: [row]})
+                written += 1
+            except Exception as e:
+                logger.error(f"Write-behind dropped a {kind} row that failed to write: {e}")
+        return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take()
+            if batch:
+                self._write(batch)
+
+
+write_behind = WriteBehindQueue()
@@ -0,0 +1,69 @@
+"""
+SQLite Engine Profile
+Pragmas applied to every new SQLite connection so a file database holds up
+under several gunicorn workers: WAL lets readers run alongside a writer,
+synchronous=NORMAL drops the per-commit fsync that WAL makes unnecessary,
+and busy_timeout makes writers wait for the lock instead of failing with
+"database is locked". Values come from the SQLITE_* settings in Config.
+"""
+
+import logging
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+TEMP_STORES = ('DEFAULT', 'FILE', 'MEMORY')
+
+
+def _choice(config, key: str, default: str, allowed: tuple) -> str:
+    value = str(config.get(key, default)).upper()
+    if value not in allowed:
+        raise ValueError(f"{key} must be one of: {', '.join(allowed)}")
+    return value
+
+
+def pragmas(config) -> list:
+    """PRAGMA statements for the configured profile, in the order they are run"""
+    return [
+        f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA journal_mode = {_choice(config, 'SQLITE_JOURNAL_MODE', 'WAL', JOURNAL_MODES)}",
+        f"PRAGMA synchronous = {_choice(config, 'SQLITE_SYNCHRONOUS', 'NORMAL', SYNCHRONOUS_MODES)}",
+        f"PRAGMA cache_size = {int(config.get('SQLITE_CACHE_SIZE', -65536))}",
+        f"PRAGMA mmap_size = {int(config.get('SQLITE_MMAP_SIZE', 268435456))}",
+        f"PRAGMA temp_store = {_choice(config, 'SQLITE_TEMP_STORE', 'MEMORY', TEMP_STORES)}",
+    ]
+
+
+def is_file_database(engine) -> bool:
+    return engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:')
+
+
+def init_app(app, engines):
+    """Attach the profile to every SQLite engine of the app (no-op for other databases)"""
+    if not app.config.get('SQLITE_PROFILE_ENABLED', True):
+        return
+    statements = pragmas(app.config)
+
+    for engine in engines:
+        if not is_file_database(engine):
+            continue
+
+        @event.listens_for(engine, 'connect')
+        def _apply_pragmas(dbapi_connection, connection_record, statements=statements):
+            cursor = dbapi_connection.cursor()
+            try:
+                for statement in statements:
+                    cursor.execute(statement)
+            finally:
+                cursor.close()
+
+        logger.info(f"SQLite profile applied to {engine.url.database}: {'; '.join(statements)}")
+
+
+def current_settings(connection) -> dict:
+    """The pragma values a connection is actually running with"""
+    names = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store')
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
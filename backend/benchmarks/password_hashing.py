@@ -0,0 +1,73 @@
+"""
+Password Hashing Benchmark
+Reports logins/sec per core (password verifications) for each hashing cost,
+measured in one process and across a process pool using every core
+
+Usage (from backend/):
+    python -m benchmarks.password_hashing
+    python -m benchmarks.password_hashing --method pbkdf2:sha256:600000 --method scrypt:32768:8:1
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHODS = (
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+    'scrypt:32768:8:1',
+)
+PASSWORD = 'BenchmarkPass1'
+
+
+def _verify_for(password_hash: str, seconds: float) -> int:
+    """Verify repeatedly for `seconds`; returns the number of verifications"""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        check_password_hash(password_hash, PASSWORD)
+        count += 1
+    return count
+
+
+def bench_method(method: str, seconds: float, workers: int) -> dict:
+    password_hash = generate_password_hash(PASSWORD, method=method, salt_length=16)
+
+    single = _verify_for(password_hash, seconds) / seconds
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        pool.submit(_verify_for, password_hash, 0).result()  # start the workers
+        started = time.perf_counter()
+        total = sum(pool.map(_verify_for, [password_hash] * workers, [seconds] * workers))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "method": method,
+        "ms_per_login": 1000 / single if single else float('inf'),
+        "single_process": single,
+        "pool_total": total / elapsed,
+        "pool_per_core": total / elapsed / workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--method', action='append', help='werkzeug method string (repeatable)')
+    parser.add_argument('--seconds', type=float, default=2.0, help='measurement time per run')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='pool size (default: all cores)')
+    args = parser.parse_args()
+
+    print(f"{'method':<24} {'ms/login':>9} {'1 proc/s':>9} {'pool/s':>9} {'per core/s':>11}  ({args.workers} workers)")
+    for method in args.method or DEFAULT_METHODS:
+        r = bench_method(method, args.seconds, args.workers)
+        print(f"{r['method']:<24} {r['ms_per_login']:>9.1f} {r['single_process']:>9.1f} "
+              f"{r['pool_total']:>9.1f} {r['pool_per_core']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
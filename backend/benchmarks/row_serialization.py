@@ -0,0 +1,126 @@
+"""
+Row Serialization Benchmark
+Reports rows/sec for each list endpoint's read path: the ORM path (query
+.all() then to_dict per object) against the Core path (column-projected
+select through the model's precompiled row serializer), on a fresh SQLite
+file seeded with one user's rows
+
+Usage (from backend/):
+    python -m benchmarks.row_serialization
+    python -m benchmarks.row_serialization --rows 1000 --seconds 3
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+
+def _make_app(db_path: str):
+    """Create the app against db_path; config is read from the environment at import"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['WRITE_BEHIND_ENABLED'] = 'false'
+    os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    from app import create_app
+    return create_app('production')
+
+
+def _seed(n: int) -> int:
+    from app import db
+    from app.models.user import User
+    from app.models.medication import UserMedication, FoodLog, InteractionCheck, SearchHistory
+    from app.models.favorites import FavoriteFood
+
+    db.create_all()
+    user = User(email='bench@example.com', password='BenchPass1')
+    db.session.add(user)
+    db.session.flush()
+    now = datetime.now(timezone.utc)
+    warnings = json.dumps([{"drugName": "Warfarin", "severity": "high", "effect": "Reduced effect"}])
+    for i in range(n):
+        db.session.add_all([
+            UserMedication(user_id=user.id, drug_name=f'Drug {i}', dosage='10mg', frequency='daily',
+                           start_date=date.today(), is_active=True),
+            FoodLog(user_id=user.id, food_name=f'Food {i}', calories=100, protein=5, carbs=10, fat=2,
+                    logged_date=date.today() - timedelta(days=i % 7), meal_type='lunch'),
+            InteractionCheck(user_id=user.id, food_name=f'Food {i}', medications_checked='["Warfarin"]',
+                             had_interaction=True, interaction_count=1, interactions_json=warnings,
+                             max_severity='high', checked_at=now - timedelta(minutes=i)),
+            SearchHistory(user_id=user.id, search_type='food', search_term=f'food {i}',
+                          results_count=10, searched_at=now - timedelta(minutes=i)),
+            FavoriteFood(user_id=user.id, food_name=f'Food {i}', nutrition_snapshot='{"calories": 100}'),
+        ])
+    db.session.commit()
+    return user.id
+
+
+def _cases(user_id: int) -> list:
+    """(endpoint, ORM read, Core read) per list endpoint, each returning a list of dicts"""
+    from app.models import rows
+    from app.models.medication import UserMedication, FoodLog, InteractionCheck, SearchHistory
+    from app.models.favorites import FavoriteFood
+
+    start, end = date.today() - timedelta(days=6), date.today()
+    return [
+        ("/medications",
+         lambda: [m.to_dict() for m in UserMedication.get_user_medications(user_id)],
+         lambda: rows.list_medications(user_id)),
+        ("/food-diary",
+         lambda: [f.to_dict() for f in FoodLog.get_user_logs_range(user_id, start, end)],
+         lambda: rows.food_log_rows.all(rows.food_log_range(user_id, start, end).order_by(
+             FoodLog.logged_date.desc(), FoodLog.logged_at, FoodLog.id))),
+        ("/interaction-history",
+         lambda: [c.to_dict() for c in InteractionCheck.query.filter_by(user_id=user_id).order_by(
+             InteractionCheck.checked_at.desc(), InteractionCheck.id.desc())],
+         lambda: rows.interaction_check_rows.all(rows.interaction_check_rows.select().where(
+             InteractionCheck.user_id == user_id).order_by(
+             InteractionCheck.checked_at.desc(), InteractionCheck.id.desc()))),
+        ("/search-history",
+         lambda: [s.to_dict() for s in SearchHistory.query.filter_by(user_id=user_id).order_by(
+             SearchHistory.searched_at.desc(), SearchHistory.id.desc())],
+         lambda: rows.search_history_rows.all(rows.search_history_rows.select().where(
+             SearchHistory.user_id == user_id).order_by(
+             SearchHistory.searched_at.desc(), SearchHistory.id.desc()))),
+        ("/foods/favorites",
+         lambda: [f.to_dict() for f in FavoriteFood.get_user_favorites(user_id)],
+         lambda: rows.list_favorite_foods(user_id)),
+    ]
+
+
+def _rows_per_second(read, seconds: float) -> float:
+    """Run read (as one request would: fresh session each time) for `seconds`"""
+    from app import db
+
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        count += len(read())
+        db.session.remove()
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500, help='rows per table for the user')
+    parser.add_argument('--seconds', type=float, default=2.0, help='measurement time per path')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _make_app(os.path.join(tmp, 'bench.db'))
+        with app.app_context():
+            user_id = _seed(args.rows)
+            print(f"{args.rows} rows per endpoint, {args.seconds:g}s per path")
+            print(f"{'endpoint':<22} {'ORM rows/s':>12} {'Core rows/s':>12} {'speedup':>8}")
+            for endpoint, orm_read, core_read in _cases(user_id):
+                assert orm_read() == core_read(), f"{endpoint}: read paths disagree"
+                orm = _rows_per_second(orm_read, args.seconds)
+                core = _rows_per_second(core_read, args.seconds)
+                print(f"{endpoint:<22} {orm:>12,.0f} {core:>12,.0f} {core / orm:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
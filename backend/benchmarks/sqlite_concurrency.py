@@ -0,0 +1,170 @@
+"""
+SQLite Concurrency Benchmark
+Runs a food-diary workload (day reads plus weekly totals, and food log
+inserts that refresh the daily rollups) from several worker processes with
+several threads each - the gunicorn layout in the Procfile - against a fresh
+SQLite file, once with SQLite's defaults and once with the app's SQLite
+profile (WAL and tuned pragmas), and reports throughput and latency
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_concurrency
+    python -m benchmarks.sqlite_concurrency --workers 2 --threads 4 --seconds 10 --write-ratio 0.2
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROFILES = {
+    "default": {"SQLITE_PROFILE_ENABLED": "false"},
+    "tuned": {"SQLITE_PROFILE_ENABLED": "true"},
+}
+SEED_DAYS = 30
+SEED_LOGS_PER_DAY = 5
+
+
+def _make_app(db_path: str, profile: str):
+    """Create the app against db_path; config is read from the environment at import"""
+    os.environ.update(PROFILES[profile])
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['WRITE_BEHIND_ENABLED'] = 'false'
+    # Password hashing is not what is measured here
+    os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    from app import create_app
+    return create_app('production')
+
+
+def _seed(db_path: str, profile: str, users: int) -> list:
+    from datetime import date, timedelta
+    app = _make_app(db_path, profile)  # before any app import, so Config sees the environment
+    from app import db
+    from app.models.user import User
+    from app.models.medication import FoodLog
+
+    with app.app_context():
+        db.create_all()
+        user_ids = []
+        for n in range(users):
+            user = User(email=f'bench{n}@example.com', password='BenchPass1', first_name='Bench', last_name=str(n))
+            db.session.add(user)
+            db.session.flush()
+            user_ids.append(user.id)
+            db.session.add_all([
+                FoodLog(user_id=user.id, food_name=f'Food {i}', calories=100 + i, protein=5,
+                        logged_date=date.today() - timedelta(days=day))
+                for day in range(SEED_DAYS) for i in range(SEED_LOGS_PER_DAY)
+            ])
+        db.session.commit()
+        return user_ids
+
+
+def _run_thread(app, user_id: int, deadline: float, write_ratio: float, out: dict):
+    from datetime import date, timedelta
+    from app import db
+    from app.models.medication import FoodLog
+
+    rng = random.Random(user_id)
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    db.session.add(FoodLog(user_id=user_id, food_name='Bench snack', calories=50,
+                                           logged_date=date.today()))
+                    db.session.commit()
+                    kind = 'write'
+                else:
+                    FoodLog.get_user_logs_by_date(user_id, date.today() - timedelta(days=rng.randrange(SEED_DAYS)))
+                    FoodLog.get_daily_totals_range(user_id, date.today() - timedelta(days=6), date.today())
+                    db.session.rollback()  # end the read transaction like a request teardown
+                    kind = 'read'
+            except Exception:
+                db.session.rollback()
+                out['errors'] += 1
+                continue
+            out[kind].append(time.perf_counter() - started)
+        db.session.remove()
+
+
+def _run_worker(db_path: str, profile: str, user_ids: list, seconds: float, write_ratio: float) -> dict:
+    """One 'gunicorn worker': a thread per user id, all sharing the app's engine"""
+    app = _make_app(db_path, profile)
+    deadline = time.perf_counter() + seconds
+    results = [{"read": [], "write": [], "errors": 0} for _ in user_ids]
+    threads = [
+        threading.Thread(target=_run_thread, args=(app, user_id, deadline, write_ratio, out))
+        for user_id, out in zip(user_ids, results)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "read": [t for r in results for t in r["read"]],
+        "write": [t for r in results for t in r["write"]],
+        "errors": sum(r["errors"] for r in results),
+    }
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * pct), len(values) - 1)] * 1000
+
+
+def bench_profile(profile: str, workers: int, threads: int, seconds: float, write_ratio: float) -> dict:
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            user_ids = pool.submit(_seed, db_path, profile, workers * threads).result()
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_run_worker, db_path, profile, user_ids[w * threads:(w + 1) * threads],
+                            seconds, write_ratio)
+                for w in range(workers)
+            ]
+            results = [future.result() for future in futures]
+
+    reads = [t for r in results for t in r["read"]]
+    writes = [t for r in results for t in r["write"]]
+    return {
+        "profile": profile,
+        "reads_per_s": len(reads) / seconds,
+        "writes_per_s": len(writes) / seconds,
+        "read_p50": _percentile(reads, 0.50),
+        "read_p95": _percentile(reads, 0.95),
+        "write_p50": _percentile(writes, 0.50),
+        "write_p95": _percentile(writes, 0.95),
+        "errors": sum(r["errors"] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker')
+    parser.add_argument('--seconds', type=float, default=10.0, help='measurement time per profile')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='share of operations that write')
+    parser.add_argument('--profile', action='append', choices=list(PROFILES), help='profile to run (repeatable)')
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x {args.threads} threads, {args.write_ratio:.0%} writes, {args.seconds:g}s per profile")
+    print(f"{'profile':<9} {'reads/s':>9} {'writes/s':>9} {'read p50':>9} {'read p95':>9} "
+          f"{'write p50':>10} {'write p95':>10} {'errors':>7}")
+    for profile in args.profile or PROFILES:
+        r = bench_profile(profile, args.workers, args.threads, args.seconds, args.write_ratio)
+        print(f"{r['profile']:<9} {r['reads_per_s']:>9.1f} {r['writes_per_s']:>9.1f} {r['read_p50']:>7.1f}ms "
+              f"{r['read_p95']:>7.1f}ms {r['write_p50']:>8.1f}ms {r['write_p95']:>8.1f}ms {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Add keyset pagination indexes
+
+Revision ID: 06c458f8e0d7
+Revises: 0d0afc73d502
+Create Date: 2026-10-19 03:51:31.288648
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '06c458f8e0d7'
+down_revision = '0d0afc73d502'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_food_logs_user_date_logged_at', ['user_id', 'logged_date', 'logged_at', 'id'], unique=False)
+
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_interaction_checks_user_checked_at'))
+        batch_op.create_index('ix_interaction_checks_user_checked_at', ['user_id', 'checked_at', 'id'], unique=False)
+
+    with op.batch_alter_table('search_history', schema=None) as batch_op:
+        batch_op.create_index('ix_search_history_user_searched_at', ['user_id', 'searched_at', 'id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_created_at_id')
+
+    with op.batch_alter_table('search_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_history_user_searched_at')
+
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.drop_index('ix_interaction_checks_user_checked_at')
+        batch_op.create_index(batch_op.f('ix_interaction_checks_user_checked_at'), ['user_id', 'checked_at'], unique=False)
+
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_food_logs_user_date_logged_at')
@@ -0,0 +1,28 @@
+"""Add medication_reminders.next_fire_at
+
+Revision ID: 073011c5f3fa
+Revises: f9fead3f905d
+Create Date: 2026-10-19 03:51:23.434839
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '073011c5f3fa'
+down_revision = 'f9fead3f905d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('medication_reminders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_fire_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_medication_reminders_next_fire_at'), ['next_fire_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('medication_reminders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_medication_reminders_next_fire_at'))
+        batch_op.drop_column('next_fire_at')
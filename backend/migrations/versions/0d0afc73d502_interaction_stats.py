@@ -0,0 +1,53 @@
+"""Add interaction stats tables and interaction_checks user/checked_at index
+
+Revision ID: 0d0afc73d502
+Revises: 073011c5f3fa
+Create Date: 2026-10-19 03:51:27.102350
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d0afc73d502'
+down_revision = '073011c5f3fa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('interaction_food_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_key', sa.String(length=255), nullable=False),
+    sa.Column('check_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'food_key')
+    )
+    with op.batch_alter_table('interaction_food_counts', schema=None) as batch_op:
+        batch_op.create_index('ix_interaction_food_counts_user_count', ['user_id', 'check_count'], unique=False)
+
+    op.create_table('interaction_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_checks', sa.Integer(), nullable=False),
+    sa.Column('high_count', sa.Integer(), nullable=False),
+    sa.Column('medium_count', sa.Integer(), nullable=False),
+    sa.Column('low_count', sa.Integer(), nullable=False),
+    sa.Column('none_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.create_index('ix_interaction_checks_user_checked_at', ['user_id', 'checked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.drop_index('ix_interaction_checks_user_checked_at')
+
+    op.drop_table('interaction_stats')
+    with op.batch_alter_table('interaction_food_counts', schema=None) as batch_op:
+        batch_op.drop_index('ix_interaction_food_counts_user_count')
+
+    op.drop_table('interaction_food_counts')
@@ -0,0 +1,38 @@
+"""Add daily_nutrition_rollup table
+
+Revision ID: 10761ffca8d8
+Revises: d4a46f66e5d0
+Create Date: 2026-10-19 03:51:11.451749
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '10761ffca8d8'
+down_revision = 'd4a46f66e5d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_nutrition_rollup',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('log_date', sa.Date(), nullable=False),
+    sa.Column('food_count', sa.Integer(), nullable=False),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('protein', sa.Float(), nullable=False),
+    sa.Column('carbs', sa.Float(), nullable=False),
+    sa.Column('fat', sa.Float(), nullable=False),
+    sa.Column('fiber', sa.Float(), nullable=False),
+    sa.Column('sugar', sa.Float(), nullable=False),
+    sa.Column('sodium', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'log_date')
+    )
+
+
+def downgrade():
+    op.drop_table('daily_nutrition_rollup')
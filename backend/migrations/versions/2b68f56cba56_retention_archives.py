@@ -0,0 +1,46 @@
+"""Add monthly archive rollup tables
+
+Revision ID: 2b68f56cba56
+Revises: a1d2768fbabc
+Create Date: 2026-10-19 03:52:09.975938
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b68f56cba56'
+down_revision = 'a1d2768fbabc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('search_history_monthly',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('search_type', sa.String(length=20), nullable=False),
+    sa.Column('search_term', sa.String(length=255), nullable=False),
+    sa.Column('search_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('month', 'search_type', 'search_term')
+    )
+    with op.batch_alter_table('search_history_monthly', schema=None) as batch_op:
+        batch_op.create_index('ix_search_history_monthly_type_term', ['search_type', 'search_term'], unique=False)
+
+    op.create_table('interaction_check_monthly',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('severity', sa.String(length=10), nullable=False),
+    sa.Column('food_key', sa.String(length=255), nullable=False),
+    sa.Column('check_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'severity', 'food_key')
+    )
+
+
+def downgrade():
+    op.drop_table('interaction_check_monthly')
+    with op.batch_alter_table('search_history_monthly', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_history_monthly_type_term')
+
+    op.drop_table('search_history_monthly')
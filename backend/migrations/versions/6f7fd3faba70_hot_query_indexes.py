@@ -0,0 +1,62 @@
+"""Composite and partial indexes for hot queries
+
+Adds user_medications (user_id, is_active, drug_name), search_history
+(user_id, search_type, searched_at, id) and a partial unique index on
+users.password_reset_token, and drops the single-column user_id indexes
+now covered by composites that lead with user_id.
+
+Revision ID: 6f7fd3faba70
+Revises: 81272bfae3c4
+Create Date: 2026-10-19 04:03:10.251687
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f7fd3faba70'
+down_revision = '81272bfae3c4'
+branch_labels = None
+depends_on = None
+
+RESET_TOKEN_SET = sa.text('password_reset_token IS NOT NULL')
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_password_reset_token', ['password_reset_token'], unique=True,
+                              sqlite_where=RESET_TOKEN_SET, postgresql_where=RESET_TOKEN_SET)
+
+    with op.batch_alter_table('user_medications', schema=None) as batch_op:
+        batch_op.create_index('ix_user_medications_user_active_name', ['user_id', 'is_active', 'drug_name'], unique=False)
+        batch_op.drop_index(batch_op.f('ix_user_medications_user_id'))
+
+    with op.batch_alter_table('search_history', schema=None) as batch_op:
+        batch_op.create_index('ix_search_history_user_type_searched_at', ['user_id', 'search_type', 'searched_at', 'id'], unique=False)
+        batch_op.drop_index(batch_op.f('ix_search_history_user_id'))
+
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_interaction_checks_user_id'))
+
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_food_logs_user_id'))
+
+
+def downgrade():
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_food_logs_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_interaction_checks_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('search_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_search_history_user_id'), ['user_id'], unique=False)
+        batch_op.drop_index('ix_search_history_user_type_searched_at')
+
+    with op.batch_alter_table('user_medications', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_medications_user_id'), ['user_id'], unique=False)
+        batch_op.drop_index('ix_user_medications_user_active_name')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_password_reset_token')
@@ -0,0 +1,28 @@
+"""Index token_blacklist blacklisted_at and expires_at
+
+Revision ID: 729aa5884cd9
+Revises: b19fc6a6b242
+Create Date: 2026-10-19 03:51:45.479709
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '729aa5884cd9'
+down_revision = 'b19fc6a6b242'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_blacklist_blacklisted_at'), ['blacklisted_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_token_blacklist_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blacklist_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_token_blacklist_blacklisted_at'))
@@ -0,0 +1,41 @@
+"""Add platform counter tables
+
+Revision ID: 81272bfae3c4
+Revises: 2b68f56cba56
+Create Date: 2026-10-19 03:52:15.781903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '81272bfae3c4'
+down_revision = '2b68f56cba56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('platform_counters',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('platform_top_counts',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'key')
+    )
+    with op.batch_alter_table('platform_top_counts', schema=None) as batch_op:
+        batch_op.create_index('ix_platform_top_counts_kind_count', ['kind', 'count'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('platform_top_counts', schema=None) as batch_op:
+        batch_op.drop_index('ix_platform_top_counts_kind_count')
+
+    op.drop_table('platform_top_counts')
+    op.drop_table('platform_counters')
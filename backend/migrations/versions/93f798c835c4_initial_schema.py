@@ -0,0 +1,225 @@
+"""Initial schema
+
+Revision ID: 93f798c835c4
+Revises: 
+Create Date: 2026-10-19 03:50:45.873971
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '93f798c835c4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('first_name', sa.String(length=100), nullable=True),
+    sa.Column('last_name', sa.String(length=100), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('is_admin', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('last_login_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('password_reset_token', sa.String(length=255), nullable=True),
+    sa.Column('password_reset_expires', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+
+    op.create_table('favorite_foods',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_name', sa.String(length=255), nullable=False),
+    sa.Column('fdc_id', sa.Integer(), nullable=True),
+    sa.Column('off_id', sa.String(length=100), nullable=True),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('nutrition_snapshot', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'food_name', 'source', name='uq_user_food_source')
+    )
+    with op.batch_alter_table('favorite_foods', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_favorite_foods_user_id'), ['user_id'], unique=False)
+
+    op.create_table('food_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_name', sa.String(length=255), nullable=False),
+    sa.Column('fdc_id', sa.Integer(), nullable=True),
+    sa.Column('brand_owner', sa.String(length=255), nullable=True),
+    sa.Column('servings', sa.Float(), nullable=False),
+    sa.Column('serving_size', sa.Float(), nullable=True),
+    sa.Column('serving_unit', sa.String(length=20), nullable=True),
+    sa.Column('calories', sa.Float(), nullable=True),
+    sa.Column('protein', sa.Float(), nullable=True),
+    sa.Column('carbs', sa.Float(), nullable=True),
+    sa.Column('fat', sa.Float(), nullable=True),
+    sa.Column('fiber', sa.Float(), nullable=True),
+    sa.Column('sugar', sa.Float(), nullable=True),
+    sa.Column('sodium', sa.Float(), nullable=True),
+    sa.Column('meal_type', sa.String(length=20), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('logged_date', sa.Date(), nullable=False),
+    sa.Column('logged_at', sa.DateTime(), nullable=False),
+    sa.Column('had_interaction', sa.Boolean(), nullable=True),
+    sa.Column('interaction_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_food_logs_logged_date'), ['logged_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_food_logs_user_id'), ['user_id'], unique=False)
+
+    op.create_table('interaction_checks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_name', sa.String(length=255), nullable=False),
+    sa.Column('medications_checked', sa.Text(), nullable=False),
+    sa.Column('had_interaction', sa.Boolean(), nullable=False),
+    sa.Column('interaction_count', sa.Integer(), nullable=False),
+    sa.Column('interactions_json', sa.Text(), nullable=True),
+    sa.Column('max_severity', sa.String(length=20), nullable=True),
+    sa.Column('checked_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_interaction_checks_checked_at'), ['checked_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_interaction_checks_user_id'), ['user_id'], unique=False)
+
+    op.create_table('interaction_reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_name', sa.String(length=255), nullable=False),
+    sa.Column('drug_name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('severity_suggestion', sa.String(length=20), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('reviewer_notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('interaction_reports', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_interaction_reports_user_id'), ['user_id'], unique=False)
+
+    op.create_table('search_history',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('search_type', sa.String(length=20), nullable=False),
+    sa.Column('search_term', sa.String(length=255), nullable=False),
+    sa.Column('results_count', sa.Integer(), nullable=True),
+    sa.Column('secondary_term', sa.String(length=255), nullable=True),
+    sa.Column('had_interaction', sa.Boolean(), nullable=True),
+    sa.Column('searched_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('search_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_search_history_searched_at'), ['searched_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_search_history_user_id'), ['user_id'], unique=False)
+
+    op.create_table('token_blacklist',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jti', sa.String(length=255), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('blacklisted_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_blacklist_jti'), ['jti'], unique=True)
+
+    op.create_table('user_medications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('drug_name', sa.String(length=255), nullable=False),
+    sa.Column('brand_name', sa.String(length=255), nullable=True),
+    sa.Column('generic_name', sa.String(length=255), nullable=True),
+    sa.Column('dosage', sa.String(length=100), nullable=True),
+    sa.Column('frequency', sa.String(length=100), nullable=True),
+    sa.Column('prescriber', sa.String(length=255), nullable=True),
+    sa.Column('pharmacy', sa.String(length=255), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'drug_name', name='unique_user_medication')
+    )
+    with op.batch_alter_table('user_medications', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_medications_user_id'), ['user_id'], unique=False)
+
+    op.create_table('medication_reminders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('medication_id', sa.Integer(), nullable=False),
+    sa.Column('reminder_time', sa.String(length=5), nullable=False),
+    sa.Column('days_of_week', sa.Text(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['medication_id'], ['user_medications.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('medication_reminders', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_medication_reminders_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('medication_reminders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_medication_reminders_user_id'))
+
+    op.drop_table('medication_reminders')
+    with op.batch_alter_table('user_medications', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_medications_user_id'))
+
+    op.drop_table('user_medications')
+    with op.batch_alter_table('token_blacklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blacklist_jti'))
+
+    op.drop_table('token_blacklist')
+    with op.batch_alter_table('search_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_search_history_user_id'))
+        batch_op.drop_index(batch_op.f('ix_search_history_searched_at'))
+
+    op.drop_table('search_history')
+    with op.batch_alter_table('interaction_reports', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_interaction_reports_user_id'))
+
+    op.drop_table('interaction_reports')
+    with op.batch_alter_table('interaction_checks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_interaction_checks_user_id'))
+        batch_op.drop_index(batch_op.f('ix_interaction_checks_checked_at'))
+
+    op.drop_table('interaction_checks')
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_food_logs_user_id'))
+        batch_op.drop_index(batch_op.f('ix_food_logs_logged_date'))
+
+    op.drop_table('food_logs')
+    with op.batch_alter_table('favorite_foods', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_favorite_foods_user_id'))
+
+    op.drop_table('favorite_foods')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
@@ -0,0 +1,30 @@
+"""Add interaction screening columns to food_logs
+
+Revision ID: a1d2768fbabc
+Revises: 729aa5884cd9
+Create Date: 2026-10-19 03:52:04.267698
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d2768fbabc'
+down_revision = '729aa5884cd9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('max_severity', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('interactions_json', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('screened_meds_key', sa.String(length=40), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('food_logs', schema=None) as batch_op:
+        batch_op.drop_column('screened_meds_key')
+        batch_op.drop_column('interactions_json')
+        batch_op.drop_column('max_severity')
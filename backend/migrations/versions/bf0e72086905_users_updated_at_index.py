@@ -0,0 +1,29 @@
+"""Index users.updated_at
+
+Lets each worker's principal cache list the users changed since its last
+check without scanning the table.
+
+Revision ID: bf0e72086905
+Revises: 6f7fd3faba70
+Create Date: 2026-10-19 04:21:10.718555
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bf0e72086905'
+down_revision = '6f7fd3faba70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_updated_at', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_updated_at')
@@ -0,0 +1,112 @@
+"""Shard platform counters
+
+Each platform total becomes several (name, shard) rows that writers add to
+at random and reads sum. Existing totals move to shard 0; a database whose
+counters were never built is seeded from SQL here, so the admin dashboard
+never has to build them on a read.
+
+Revision ID: c12fd6b7b4a3
+Revises: bf0e72086905
+Create Date: 2026-10-19 05:02:41.306128
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c12fd6b7b4a3'
+down_revision = 'bf0e72086905'
+branch_labels = None
+depends_on = None
+
+
+def _counters_table(name):
+    return sa.table(name, sa.column('name'), sa.column('shard'), sa.column('value'), sa.column('updated_at'))
+
+
+def _count(connection, table, where=None):
+    stmt = sa.select(sa.func.count()).select_from(sa.table(table))
+    if where is not None:
+        stmt = stmt.where(where)
+    return connection.execute(stmt).scalar()
+
+
+def _sum(connection, table, column):
+    return connection.execute(
+        sa.select(sa.func.coalesce(sa.func.sum(sa.column(column)), 0)).select_from(sa.table(table))
+    ).scalar()
+
+
+def _seed(connection, now):
+    """Totals and top counts from the tables (same as PlatformCounter.compute)"""
+    deleted_at, is_active = sa.column('deleted_at'), sa.column('is_active', sa.Boolean)
+    counters = {
+        'users': _count(connection, 'users', deleted_at.is_(None)),
+        'active_users': _count(connection, 'users', sa.and_(deleted_at.is_(None), is_active.is_(sa.true()))),
+        'medications': _count(connection, 'user_medications'),
+        'food_logs': _count(connection, 'food_logs'),
+        'interaction_checks': _count(connection, 'interaction_checks')
+        + _sum(connection, 'interaction_check_monthly', 'check_count'),
+        'searches': _count(connection, 'search_history') + _sum(connection, 'search_history_monthly', 'search_count'),
+        'interaction_reports': _count(connection, 'interaction_reports'),
+    }
+    op.bulk_insert(_counters_table('platform_counters'), [
+        {'name': name, 'shard': 0, 'value': value, 'updated_at': now} for name, value in counters.items()
+    ])
+
+    top = {}
+    drug_name = sa.column('drug_name')
+    for name, count in connection.execute(
+        sa.select(drug_name, sa.func.count()).select_from(sa.table('user_medications')).group_by(drug_name)
+    ):
+        top[('drug', name)] = count
+    term, search_type = sa.column('search_term'), sa.column('search_type')
+    searches = [
+        sa.select(term, sa.func.count()).select_from(sa.table('search_history')),
+        sa.select(term, sa.func.sum(sa.column('search_count'))).select_from(sa.table('search_history_monthly')),
+    ]
+    for stmt in searches:
+        for name, count in connection.execute(stmt.where(search_type == 'food').group_by(term)):
+            key = ('food', name[:255])
+            top[key] = top.get(key, 0) + int(count)
+    rows = [{'kind': kind, 'key': key, 'count': count} for (kind, key), count in top.items() if count > 0]
+    if rows:
+        op.bulk_insert(sa.table('platform_top_counts', sa.column('kind'), sa.column('key'), sa.column('count')), rows)
+
+
+def upgrade():
+    op.create_table('platform_counter_shards',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('shard', sa.SmallInteger(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name', 'shard')
+    )
+    connection = op.get_bind()
+    built = _count(connection, 'platform_counters') > 0
+    op.execute(
+        'INSERT INTO platform_counter_shards (name, shard, value, updated_at) '
+        'SELECT name, 0, value, updated_at FROM platform_counters'
+    )
+    op.drop_table('platform_counters')
+    op.rename_table('platform_counter_shards', 'platform_counters')
+    if not built:
+        _seed(connection, datetime.now(timezone.utc))
+
+
+def downgrade():
+    op.create_table('platform_counter_totals',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(
+        'INSERT INTO platform_counter_totals (name, value, updated_at) '
+        'SELECT name, SUM(value), MAX(updated_at) FROM platform_counters GROUP BY name'
+    )
+    op.drop_table('platform_counters')
+    op.rename_table('platform_counter_totals', 'platform_counters')
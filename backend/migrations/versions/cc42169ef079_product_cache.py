@@ -0,0 +1,39 @@
+"""Add product_cache table
+
+Revision ID: cc42169ef079
+Revises: 93f798c835c4
+Create Date: 2026-10-19 03:50:50.981839
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cc42169ef079'
+down_revision = '93f798c835c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('barcode', sa.String(length=14), nullable=False),
+    sa.Column('found', sa.Boolean(), nullable=False),
+    sa.Column('product_json', sa.Text(), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('product_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_cache_barcode'), ['barcode'], unique=True)
+        batch_op.create_index(batch_op.f('ix_product_cache_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('product_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_cache_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_product_cache_barcode'))
+
+    op.drop_table('product_cache')
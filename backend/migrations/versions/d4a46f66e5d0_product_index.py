@@ -0,0 +1,42 @@
+"""Add local Open Food Facts product index tables
+
+Revision ID: d4a46f66e5d0
+Revises: cc42169ef079
+Create Date: 2026-10-19 03:50:55.387521
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a46f66e5d0'
+down_revision = 'cc42169ef079'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('local_products',
+    sa.Column('barcode', sa.String(length=14), nullable=False),
+    sa.Column('product_name', sa.String(length=255), nullable=False),
+    sa.Column('product_json', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('barcode')
+    )
+    op.create_table('local_product_tokens',
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('barcode', sa.String(length=14), nullable=False),
+    sa.ForeignKeyConstraint(['barcode'], ['local_products.barcode'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('token', 'barcode')
+    )
+    with op.batch_alter_table('local_product_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_local_product_tokens_barcode'), ['barcode'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('local_product_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_local_product_tokens_barcode'))
+
+    op.drop_table('local_product_tokens')
+    op.drop_table('local_products')
@@ -0,0 +1,26 @@
+"""Add streak to daily_nutrition_rollup
+
+Revision ID: f9fead3f905d
+Revises: 10761ffca8d8
+Create Date: 2026-10-19 03:51:15.636999
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f9fead3f905d'
+down_revision = '10761ffca8d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('daily_nutrition_rollup', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('streak', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('daily_nutrition_rollup', schema=None) as batch_op:
+        batch_op.drop_column('streak')
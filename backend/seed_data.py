@@ -16,6 +16,7 @@ from app.models.user import User
 from app.models.medication import UserMedication, SearchHistory, FoodLog, InteractionCheck
 from app.models.token_blacklist import TokenBlacklist
 from app.models.favorites import FavoriteFood, MedicationReminder, InteractionReport
+from app.models.nutrition_rollup import DailyNutritionRollup
 from datetime import datetime, timezone, timedelta, date
 
 # Demo Users with comprehensive data
@@ -559,6 +560,7 @@ def clear_database():
         FavoriteFood.query.delete()
         TokenBlacklist.query.delete()
         InteractionCheck.query.delete()
+        DailyNutritionRollup.query.delete()
         FoodLog.query.delete()
         SearchHistory.query.delete()
         UserMedication.query.delete()
@@ -4,6 +4,11 @@ Covers: register, login, refresh, profile, update, password change,
         logout, delete account, forgot/reset password, export
 """
 
+import csv
+import gzip
+import io
+import json
+
 import pytest
 
 
@@ -123,6 +128,241 @@ class TestLogout:
         assert resp.status_code == 200
         assert 'logged out' in resp.get_json()['data']['message'].lower()
 
+    def test_logout_revokes_only_that_token(self, client, auth_headers):
+        other = client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'TestPass1'
+        }).get_json()['data']['tokens']['access_token']
+
+        client.post('/api/v1/auth/logout', headers=auth_headers)
+
+        resp = client.get('/api/v1/auth/me', headers=auth_headers)
+        assert resp.status_code == 401
+        assert resp.get_json()['error']['details']['reason'] == 'blacklisted'
+        resp = client.get('/api/v1/auth/me', headers={'Authorization': f'Bearer {other}'})
+        assert resp.status_code == 200
+
+
+class TestPasswordHashing:
+    def test_login_rehashes_outdated_hash(self, client, test_user):
+        from werkzeug.security import generate_password_hash
+        from app import db
+        from app.models.user import User
+
+        user_id = test_user.id
+        test_user.password_hash = generate_password_hash('TestPass1', method='pbkdf2:sha256:500')
+        db.session.commit()
+
+        resp = client.post('/api/v1/auth/login', json={
+            'email': 'test@example.com', 'password': 'TestPass1'
+        })
+        assert resp.status_code == 200
+        db.session.expire_all()
+        assert db.session.get(User, user_id).password_hash.startswith('pbkdf2:sha256:1000$')
+
+    def test_failed_login_does_not_rehash(self, client, test_user):
+        from werkzeug.security import generate_password_hash
+        from app import db
+
+        old_hash = generate_password_hash('TestPass1', method='pbkdf2:sha256:500')
+        test_user.password_hash = old_hash
+        db.session.commit()
+
+        client.post('/api/v1/auth/login', json={'email': 'test@example.com', 'password': 'WrongPass1'})
+        db.session.expire_all()
+        assert test_user.password_hash == old_hash
+
+    def test_process_pool(self, app, monkeypatch):
+        from app.services import password_service
+        monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 1)
+        try:
+            password_hash = password_service.hash_password('Secret123')
+            assert password_service.hash_method(password_hash) == app.config['PASSWORD_HASH_METHOD']
+            assert password_service.verify_password(password_hash, 'Secret123') is True
+            assert password_service.verify_password(password_hash, 'Wrong123') is False
+        finally:
+            password_service.shutdown()
+
+    def test_needs_rehash_fills_in_method_defaults(self, app, monkeypatch):
+        from werkzeug.security import generate_password_hash, DEFAULT_PBKDF2_ITERATIONS
+        from app.services import password_service
+        current = generate_password_hash('Secret123', method=f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}')
+
+        monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+        assert password_service.needs_rehash(current) is False
+        monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', '')
+        assert password_service.needs_rehash(current) is False
+        assert password_service.normalize_method('scrypt') == 'scrypt:32768:8:1'
+        monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+        assert password_service.needs_rehash(current) is True
+
+    def test_pool_timeout_and_crash_are_503s(self, app, monkeypatch):
+        import os
+        import time
+        from app.services import password_service
+        monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 1)
+        monkeypatch.setitem(app.config, 'PASSWORD_HASH_QUEUE', 0)
+        try:
+            password_service.hash_password('Warmup123')  # start the worker process
+            monkeypatch.setitem(app.config, 'PASSWORD_HASH_TIMEOUT', 0.1)
+            with pytest.raises(password_service.PasswordHashingBusyError) as exc:
+                password_service._run(time.sleep, 0.5)
+            assert exc.value.status_code == 503
+            # The slot is held until the worker finishes, not released on timeout
+            _, slots = password_service._get_executor()
+            assert slots.acquire(blocking=False) is False
+            time.sleep(0.6)
+            assert slots.acquire(blocking=False) is True
+            slots.release()
+
+            monkeypatch.setitem(app.config, 'PASSWORD_HASH_TIMEOUT', 10)
+            broken, _ = password_service._get_executor()
+            with pytest.raises(password_service.PasswordHashingBusyError):
+                password_service._run(os._exit, 1)
+            assert password_service._get_executor()[0] is not broken
+            assert password_service.verify_password(password_service.hash_password('Secret123'), 'Secret123')
+        finally:
+            password_service.shutdown()
+
+
+class TestPrincipalCache:
+    @pytest.fixture
+    def warm_cache(self, monkeypatch):
+        from app.services.principal_cache import principal_cache
+        monkeypatch.setattr(principal_cache, 'ttl', 60)
+        yield principal_cache
+        principal_cache.clear()
+
+    def _user_queries(self, app, client, headers, path='/api/v1/medications'):
+        from sqlalchemy import event
+        from app import db
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            resp = client.get(path, headers=headers)
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        return resp, [s for s in statements if 'FROM users' in s]
+
+    def test_warm_requests_skip_user_query(self, app, client, auth_headers, warm_cache):
+        resp, queries = self._user_queries(app, client, auth_headers)
+        assert resp.status_code == 200
+        assert len(queries) == 1
+
+        resp, queries = self._user_queries(app, client, auth_headers)
+        assert resp.status_code == 200
+        assert queries == []
+
+    def test_admin_deactivation_invalidates(self, client, auth_headers, admin_headers, test_user, warm_cache):
+        user_id = test_user.id
+        assert client.get('/api/v1/medications', headers=auth_headers).status_code == 200
+        assert warm_cache.get(user_id) is not None
+
+        client.patch(f'/api/v1/admin/users/{user_id}', headers=admin_headers, json={'is_active': False})
+        assert warm_cache.get(user_id) is None
+        assert client.get('/api/v1/medications', headers=auth_headers).status_code == 403
+
+    def test_profile_update_invalidates(self, client, auth_headers, test_user, warm_cache):
+        user_id = test_user.id
+        client.get('/api/v1/medications', headers=auth_headers)
+        before = warm_cache.get(user_id)
+
+        client.patch('/api/v1/auth/me', headers=auth_headers, json={'first_name': 'Renamed'})
+        assert warm_cache.get(user_id) is None
+
+        resp = client.get('/api/v1/auth/me', headers=auth_headers)
+        assert resp.get_json()['data']['user']['first_name'] == 'Renamed'
+        assert warm_cache.get(user_id).version != before.version
+
+    def test_change_by_another_worker_found_by_stamp(self, client, auth_headers, test_user, warm_cache):
+        from sqlalchemy import update
+        from app import db
+        from app.models.user import User
+
+        user_id = test_user.id
+        assert client.get('/api/v1/medications', headers=auth_headers).status_code == 200
+        # A Core UPDATE skips this worker's flush hooks, like a write made elsewhere
+        db.session.execute(update(User).where(User.id == user_id).values(is_active=False))
+        db.session.commit()
+        assert warm_cache.get(user_id) is not None
+
+        warm_cache._next_refresh = 0.0
+        assert client.get('/api/v1/medications', headers=auth_headers).status_code == 403
+        assert warm_cache.get(user_id) is None or warm_cache.get(user_id).is_active is False
+
+    def test_principal_is_read_only(self, app, test_user):
+        from app.services.principal_cache import principal_cache
+        principal = principal_cache.load(test_user.id)
+        with pytest.raises(AttributeError):
+            principal.is_admin = True
+        with pytest.raises(AttributeError):
+            principal.first_name = 'Changed'
+        assert principal.is_admin is False
+
+
+class TestRevocationCache:
+    def _cache(self, app, monkeypatch, refresh_seconds):
+        from app.services.revocation_cache import RevocationCache
+        monkeypatch.setitem(app.config, 'REVOCATION_REFRESH_SECONDS', refresh_seconds)
+        return RevocationCache(app)
+
+    def _blacklist(self, test_user, jti, expires_in=3600):
+        from datetime import datetime, timezone, timedelta
+        from app import db
+        from app.models.token_blacklist import TokenBlacklist
+        db.session.add(TokenBlacklist(
+            jti=jti, user_id=test_user.id,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+        ))
+        db.session.commit()
+
+    def test_unrevoked_lookup_skips_database(self, app, monkeypatch, test_user):
+        from sqlalchemy import event
+        from app import db
+
+        self._blacklist(test_user, 'revoked-jti')
+        cache = self._cache(app, monkeypatch, refresh_seconds=60)
+        assert cache.is_revoked('revoked-jti') is True
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert cache.is_revoked('some-other-jti') is False
+            assert cache.is_revoked('revoked-jti') is True
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert statements == []
+
+    def test_refresh_picks_up_new_revocations(self, app, monkeypatch, test_user):
+        cache = self._cache(app, monkeypatch, refresh_seconds=0)
+        assert cache.is_revoked('from-another-worker') is False
+
+        self._blacklist(test_user, 'from-another-worker')
+        assert cache.is_revoked('from-another-worker') is True
+
+    def test_expired_entries_dropped(self, app, monkeypatch, test_user):
+        self._blacklist(test_user, 'expired-jti', expires_in=-60)
+        cache = self._cache(app, monkeypatch, refresh_seconds=0)
+        assert cache.is_revoked('expired-jti') is False
+        assert cache.stats()['revoked'] == 0
+
+        result = app.test_cli_runner().invoke(args=['tokens', 'purge'])
+        assert result.exit_code == 0
+        assert 'Purged 1 expired' in result.output
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        from app.services.revocation_cache import BloomFilter
+        bloom = BloomFilter(capacity=1000)
+        keys = [f'jti-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        assert false_positives < 100
+
 
 class TestDeleteAccount:
     def test_delete_account_success(self, client, auth_headers):
@@ -172,3 +412,95 @@ class TestExportUserData:
     def test_export_data_no_auth(self, client):
         resp = client.get('/api/v1/auth/me/export')
         assert resp.status_code == 401
+
+    def test_export_ndjson_streams_sections(self, client, auth_headers, sample_medication, sample_food_log):
+        resp = client.get('/api/v1/auth/me/export?format=ndjson', headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.mimetype == 'application/x-ndjson'
+        assert resp.is_streamed
+
+        records = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert records[0]['section'] == 'user'
+        sections = [r['section'] for r in records[1:]]
+        assert sections.count('medications') == 1
+        assert sections.count('food_logs') == 1
+
+    def test_export_csv_section(self, client, auth_headers, sample_food_log):
+        resp = client.get('/api/v1/auth/me/export?format=csv&section=food_logs', headers=auth_headers)
+        assert resp.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+        assert len(rows) == 1
+        assert rows[0]['food_name'] == 'Banana'
+
+    def test_export_csv_requires_section(self, client, auth_headers):
+        resp = client.get('/api/v1/auth/me/export?format=csv', headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_export_invalid_format(self, client, auth_headers):
+        resp = client.get('/api/v1/auth/me/export?format=xml', headers=auth_headers)
+        assert resp.status_code == 400
+
+
+class TestExportJobs:
+    def test_job_completes_and_downloads(self, app, client, auth_headers, sample_food_log, tmp_path, monkeypatch):
+        monkeypatch.setitem(app.config, 'EXPORT_DIR', str(tmp_path))
+
+        resp = client.post('/api/v1/auth/me/export/jobs', headers=auth_headers)
+        assert resp.status_code == 202
+        job = resp.get_json()['data']['job']
+        assert job['status'] == 'complete'
+        assert job['record_count'] >= 2
+
+        resp = client.get(f"/api/v1/auth/me/export/jobs/{job['id']}", headers=auth_headers)
+        assert resp.get_json()['data']['job']['status'] == 'complete'
+
+        resp = client.get(f"/api/v1/auth/me/export/jobs/{job['id']}/download", headers=auth_headers)
+        assert resp.status_code == 200
+        lines = gzip.decompress(resp.data).decode('utf-8').splitlines()
+        resp.close()
+        assert json.loads(lines[0])['section'] == 'user'
+        assert any(json.loads(line)['section'] == 'food_logs' for line in lines)
+
+    def test_unknown_job(self, client, auth_headers):
+        resp = client.get('/api/v1/auth/me/export/jobs/missing', headers=auth_headers)
+        assert resp.status_code == 404
+
+    def test_download_not_ready(self, client, auth_headers, test_user):
+        from app import db
+        from app.models.export_job import ExportJob
+
+        job = ExportJob(user_id=test_user.id)
+        db.session.add(job)
+        db.session.commit()
+
+        resp = client.get(f'/api/v1/auth/me/export/jobs/{job.id}/download', headers=auth_headers)
+        assert resp.status_code == 409
+
+    def test_interrupted_job_marked_failed(self, client, auth_headers, test_user):
+        from datetime import datetime, timedelta, timezone
+        from app import db
+        from app.models.export_job import ExportJob
+
+        lost = ExportJob(user_id=test_user.id, status='running',
+                         created_at=datetime.now(timezone.utc) - timedelta(hours=2))
+        fresh = ExportJob(user_id=test_user.id)
+        db.session.add_all([lost, fresh])
+        db.session.commit()
+
+        job = client.get(f'/api/v1/auth/me/export/jobs/{lost.id}', headers=auth_headers).get_json()['data']['job']
+        assert job['status'] == 'failed'
+        assert 'interrupted' in job['error']
+        job = client.get(f'/api/v1/auth/me/export/jobs/{fresh.id}', headers=auth_headers).get_json()['data']['job']
+        assert job['status'] == 'pending'
+
+    def test_purge_expired(self, app, client, auth_headers, tmp_path, monkeypatch):
+        from app.models.export_job import ExportJob
+        from app.services.export_service import purge_expired_jobs
+
+        monkeypatch.setitem(app.config, 'EXPORT_DIR', str(tmp_path))
+        monkeypatch.setitem(app.config, 'EXPORT_JOB_TTL', -1)
+        job_id = client.post('/api/v1/auth/me/export/jobs', headers=auth_headers).get_json()['data']['job']['id']
+
+        assert purge_expired_jobs() == 1
+        assert ExportJob.query.get(job_id) is None
+        assert list(tmp_path.iterdir()) == []
@@ -42,6 +42,21 @@ class TestSearchHistory:
         assert resp.status_code == 200
         assert 'history' in resp.get_json()['data']
 
+    def test_search_history_cursor_walk(self, client, auth_headers, test_user):
+        from app.models.medication import SearchHistory
+        for term in ('aspirin', 'kale', 'warfarin'):
+            SearchHistory.log_search('drug', term, user_id=test_user.id)
+
+        first = client.get('/api/v1/search-history?limit=2', headers=auth_headers).get_json()['data']
+        assert first['count'] == 2
+        cursor = first['pagination']['next_cursor']
+        second = client.get(f'/api/v1/search-history?limit=2&cursor={cursor}',
+                            headers=auth_headers).get_json()['data']
+        assert second['count'] == 1
+        assert second['pagination']['has_more'] is False
+        terms = [h['search_term'] for h in first['history'] + second['history']]
+        assert sorted(terms) == ['aspirin', 'kale', 'warfarin']
+
     def test_clear_search_history(self, client, auth_headers):
         resp = client.delete('/api/v1/search-history', headers=auth_headers)
         assert resp.status_code == 200
@@ -62,6 +77,56 @@ class TestAdminUsers:
         assert 'users' in data
         assert 'pagination' in data
 
+    def _count_list_queries(self, app, client, admin_headers):
+        from sqlalchemy import event
+        from app import db
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            resp = client.get('/api/v1/admin/users?per_page=100', headers=admin_headers)
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        assert resp.status_code == 200
+        return len(statements), resp.get_json()['data']['users']
+
+    def test_list_users_constant_queries(self, app, client, admin_headers, test_user):
+        from app import db
+        from app.models.user import User
+        from app.models.medication import UserMedication
+
+        db.session.add(UserMedication(user_id=test_user.id, drug_name='Lipitor'))
+        db.session.add(UserMedication(user_id=test_user.id, drug_name='Warfarin'))
+        db.session.commit()
+        baseline, users = self._count_list_queries(app, client, admin_headers)
+        counts = {u['email']: u['medication_count'] for u in users}
+        assert counts == {'test@example.com': 2, 'admin@example.com': 0}
+
+        for i in range(3):
+            db.session.add(User(email=f'extra{i}@example.com', password='TestPass1'))
+        db.session.commit()
+        with_more_users, users = self._count_list_queries(app, client, admin_headers)
+        assert len(users) == 5
+        assert with_more_users == baseline
+
+    def test_list_users_cursor_and_legacy_page(self, client, admin_headers, test_user):
+        first = client.get('/api/v1/admin/users?per_page=1', headers=admin_headers).get_json()['data']
+        assert first['pagination']['has_more'] is True
+        assert 'total' not in first['pagination']
+        counted = client.get('/api/v1/admin/users?per_page=1&include_total=1', headers=admin_headers)
+        assert counted.get_json()['data']['pagination']['total'] == 2
+        cursor = first['pagination']['next_cursor']
+        second = client.get(f'/api/v1/admin/users?per_page=1&cursor={cursor}',
+                            headers=admin_headers).get_json()['data']
+        assert second['pagination']['has_more'] is False
+        assert len({first['users'][0]['id'], second['users'][0]['id']}) == 2
+
+        legacy = client.get('/api/v1/admin/users?page=2&per_page=1', headers=admin_headers).get_json()['data']
+        assert legacy['pagination']['page'] == 2
+        assert legacy['users'][0]['id'] == second['users'][0]['id']
+
     def test_list_users_non_admin(self, client, auth_headers):
         resp = client.get('/api/v1/admin/users', headers=auth_headers)
         assert resp.status_code == 403
@@ -99,3 +164,725 @@ class TestAdminStats:
     def test_stats_non_admin(self, client, auth_headers):
         resp = client.get('/api/v1/admin/stats', headers=auth_headers)
         assert resp.status_code == 403
+
+    def test_stats_include_write_behind_metrics(self, client, admin_headers):
+        resp = client.get('/api/v1/admin/stats', headers=admin_headers)
+        metrics = resp.get_json()['data']['write_behind']
+        assert metrics['enabled'] is False
+        assert metrics['depth'] == 0
+
+    def test_counters_follow_writes(self, app, client, admin_headers, auth_headers, test_user, monkeypatch):
+        from app.models.medication import SearchHistory
+        from app.models.platform_stats import PlatformCounter
+
+        first = client.get('/api/v1/admin/stats', headers=admin_headers).get_json()['data']
+        assert first['users'] == {'total': 2, 'active': 2}
+        assert first['stats_updated_at'] is not None
+
+        client.post('/api/v1/medications', headers=auth_headers, json={'drug_name': 'Lipitor'})
+        client.post('/api/v1/medications/import', headers=auth_headers, json={'medications': [
+            {'drug_name': 'Warfarin'}, {'drug_name': 'Lipitor'}
+        ]})
+        client.post('/api/v1/food-diary', headers=auth_headers, json={'food_name': 'Kale'})
+        client.post('/api/v1/food-diary/import', headers=auth_headers, json=[{'food_name': 'Rice'}] * 3)
+        client.post('/api/v1/interaction-history', headers=auth_headers, json={
+            'food_name': 'Grapefruit', 'medications': ['Lipitor'], 'interactions': []
+        })
+        client.post('/api/v1/interactions/report', headers=auth_headers, json={
+            'food_name': 'Pomelo', 'drug_name': 'Lipitor'
+        })
+        for term in ('kale', 'kale', 'rice'):
+            SearchHistory.log_search('food', term, user_id=test_user.id)
+        client.post('/api/v1/auth/register', json={
+            'email': 'new@example.com', 'password': 'NewPass123', 'first_name': 'New', 'last_name': 'User'
+        })
+
+        # Write-behind inserts bypass the session hooks
+        queue = _write_behind_queue(app, monkeypatch)
+        queue.submit('search_history', {"user_id": test_user.id, "search_type": "food", "search_term": "rice"})
+        queue.flush()
+
+        data = client.get('/api/v1/admin/stats', headers=admin_headers).get_json()['data']
+        assert data['users'] == {'total': 3, 'active': 3}
+        assert data['content'] == {
+            'total_medications': 2, 'total_food_logs': 4, 'total_interaction_checks': 1,
+            'total_searches': 4, 'total_interaction_reports': 1
+        }
+        assert data['top_drugs'] == [{'drug_name': 'Lipitor', 'count': 1}, {'drug_name': 'Warfarin', 'count': 1}]
+        assert data['top_foods'] == [{'food_name': 'kale', 'count': 2}, {'food_name': 'rice', 'count': 2}]
+
+        client.delete('/api/v1/search-history', headers=auth_headers)
+        client.delete('/api/v1/interaction-history', headers=auth_headers)
+        client.delete('/api/v1/auth/me', headers=auth_headers, json={'password': 'TestPass1'})
+
+        data = client.get('/api/v1/admin/stats', headers=admin_headers).get_json()['data']
+        assert data['users'] == {'total': 2, 'active': 2}
+        assert data['content']['total_searches'] == 0
+        assert data['content']['total_interaction_checks'] == 0
+        assert data['top_foods'] == []
+        assert PlatformCounter.find_mismatches() == []
+
+    def test_stats_read_counters_only(self, app, client, admin_headers, sample_food_log):
+        from sqlalchemy import event
+        from app import db
+
+        client.get('/api/v1/admin/stats', headers=admin_headers)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            resp = client.get('/api/v1/admin/stats', headers=admin_headers)
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        assert resp.get_json()['data']['content']['total_food_logs'] == 1
+        tables = ('food_logs', 'search_history', 'interaction_checks', 'user_medications')
+        assert not [s for s in statements if any(f'FROM {table}' in s for table in tables)]
+
+    def test_stats_read_never_writes(self, app, client, admin_headers):
+        from sqlalchemy import event
+        from app import db
+        from app.models.platform_stats import PlatformCounter
+
+        PlatformCounter.query.delete()
+        db.session.commit()
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            data = client.get('/api/v1/admin/stats', headers=admin_headers).get_json()['data']
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        assert data['content']['total_food_logs'] == 0
+        assert not [s for s in statements if s.startswith(('INSERT', 'UPDATE', 'DELETE'))]
+
+    def test_counter_writes_spread_over_shards(self, app, client, admin_headers, monkeypatch):
+        import itertools
+        from app import db
+        from app.models import platform_stats
+        from app.models.platform_stats import PlatformCounter, SHARDS
+
+        shards = itertools.cycle(range(SHARDS))
+        monkeypatch.setattr(platform_stats.random, 'randrange', lambda n: next(shards))
+        for _ in range(SHARDS * 2):
+            PlatformCounter.apply(db.session.connection(), {"food_logs": 1, "searches": 2})
+        db.session.commit()
+
+        rows = PlatformCounter.query.filter_by(name='food_logs').all()
+        assert sorted(row.shard for row in rows) == list(range(SHARDS))
+        assert {row.value for row in rows} == {2}
+        content = client.get('/api/v1/admin/stats', headers=admin_headers).get_json()['data']['content']
+        assert content['total_food_logs'] == SHARDS * 2
+        assert content['total_searches'] == SHARDS * 4
+
+    def test_check_and_rebuild_commands(self, app, client, admin_headers, sample_food_log, db_session):
+        from app import db
+        from app.models.platform_stats import PlatformCounter
+
+        runner = app.test_cli_runner()
+        assert 'consistent' in runner.invoke(args=['platform-stats', 'check']).output
+
+        runner.invoke(args=['platform-stats', 'rebuild'])
+        db.session.get(PlatformCounter, ('food_logs', 0)).value = 99
+        db.session.commit()
+        result = runner.invoke(args=['platform-stats', 'check'])
+        assert result.exit_code != 0
+        assert 'food_logs: expected 1, found 99' in result.output
+
+        runner.invoke(args=['platform-stats', 'rebuild'])
+        assert PlatformCounter.find_mismatches() == []
+
+
+# ─── Write-behind queue ───────────────────────────────────
+
+def _write_behind_queue(app, monkeypatch, start_worker=False, **config):
+    from app.services.write_behind import WriteBehindQueue
+    for key, value in config.items():
+        monkeypatch.setitem(app.config, key, value)
+    return WriteBehindQueue(app, start_worker=start_worker)
+
+
+class TestWriteBehind:
+    def test_flush_writes_batched_rows(self, app, monkeypatch, test_user):
+        from datetime import datetime, timezone, timedelta
+        from sqlalchemy import event
+        from app import db
+        from app.models.user import User
+        from app.models.medication import SearchHistory, InteractionCheck
+        from app.models.interaction_stats import InteractionStats
+
+        user_id = test_user.id
+        InteractionStats.get_for_user(user_id)
+        queue = _write_behind_queue(app, monkeypatch)
+        now = datetime.now(timezone.utc)
+
+        for term in ('kale', 'grapefruit'):
+            queue.submit('search_history', {"user_id": user_id, "search_type": "food",
+                                            "search_term": term, "searched_at": now})
+        queue.submit('interaction_check', {"user_id": user_id, "food_name": "Grapefruit",
+                                           "medications_checked": '["Lipitor"]', "had_interaction": True,
+                                           "interaction_count": 1, "max_severity": "high",
+                                           "checked_at": now})
+        queue.submit('last_login', {"user_id": user_id, "last_login_at": now - timedelta(minutes=5)})
+        queue.submit('last_login', {"user_id": user_id, "last_login_at": now})
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert queue.flush() == 5
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert sum(s.startswith('INSERT INTO search_history') for s in statements) == 1
+        assert sum(s.startswith('UPDATE users') for s in statements) == 1
+
+        db.session.expire_all()
+        assert SearchHistory.query.filter_by(user_id=user_id).count() == 2
+        assert InteractionCheck.query.filter_by(user_id=user_id).count() == 1
+        assert InteractionStats.get_for_user(user_id)['severity_distribution']['high'] == 1
+        last_login = db.session.get(User, user_id).last_login_at
+        assert last_login.replace(tzinfo=timezone.utc) == now
+
+        metrics = queue.metrics()
+        assert metrics['written'] == 5
+        assert metrics['flushes'] == 1
+        assert metrics['depth'] == 0
+
+    def test_full_queue_drops_writes(self, app, monkeypatch):
+        queue = _write_behind_queue(app, monkeypatch, WRITE_BEHIND_MAX_QUEUE=2,
+                                    WRITE_BEHIND_PUT_TIMEOUT_MS=0)
+        row = {"search_type": "drug", "search_term": "aspirin"}
+
+        assert queue.submit('search_history', row) is True
+        assert queue.submit('search_history', row) is True
+        assert queue.submit('search_history', row) is False
+
+        metrics = queue.metrics()
+        assert metrics['dropped'] == 1
+        assert metrics['depth'] == 2
+        assert metrics['max_depth'] == 2
+
+    def test_log_search_is_deferred_when_enabled(self, app, monkeypatch, test_user):
+        from app.services import write_behind as write_behind_module
+        from app.models.medication import SearchHistory
+
+        user_id = test_user.id
+        queue = _write_behind_queue(app, monkeypatch, WRITE_BEHIND_ENABLED=True)
+        monkeypatch.setattr(write_behind_module, 'write_behind', queue)
+
+        assert SearchHistory.log_search('drug', 'warfarin', user_id=user_id) is None
+        assert SearchHistory.query.filter_by(user_id=user_id).count() == 0
+
+        queue.shutdown()
+        assert SearchHistory.query.filter_by(user_id=user_id).count() == 1
+
+    def test_search_routes_log_history(self, app, client, auth_headers, monkeypatch, test_user):
+        from unittest.mock import patch
+        from app.services import write_behind as write_behind_module
+        from app.models.medication import SearchHistory
+
+        user_id = test_user.id
+        queue = _write_behind_queue(app, monkeypatch, WRITE_BEHIND_ENABLED=True)
+        monkeypatch.setattr(write_behind_module, 'write_behind', queue)
+        with patch('app.routes.foods.search_food', return_value={"success": True, "count": 2, "foods": []}):
+            client.get('/api/v1/foods/search?q=kale', headers=auth_headers)
+        client.get('/api/v1/interactions/check?food=grapefruit&drug=simvastatin', headers=auth_headers)
+        resp = client.post('/api/v1/interaction-history', headers=auth_headers, json={
+            'food_name': 'Grapefruit', 'medications': ['Simvastatin'], 'interactions': []
+        })
+        assert resp.status_code == 202
+        assert SearchHistory.query.filter_by(user_id=user_id).count() == 0
+
+        assert queue.flush() == 3
+        searches = {s.search_type: s for s in SearchHistory.query.filter_by(user_id=user_id)}
+        assert searches['food'].results_count == 2
+        assert searches['interaction'].secondary_term == 'simvastatin'
+        assert searches['interaction'].had_interaction is True
+
+    def test_failed_batch_retries_rows(self, app, monkeypatch):
+        from app.models.medication import SearchHistory
+
+        queue = _write_behind_queue(app, monkeypatch)
+        queue.submit('search_history', {"search_type": "food", "search_term": "kale"})
+        queue.submit('search_history', {"search_type": "food", "search_term": None})
+        queue.submit('search_history', {"search_type": "food", "search_term": "rice"})
+
+        assert queue.flush() == 2
+        assert queue.metrics()['failed'] == 1
+        assert SearchHistory.query.filter(SearchHistory.search_term.in_(['kale', 'rice'])).count() == 2
+
+    def test_worker_flushes_in_background(self, app, monkeypatch):
+        import time
+        from app.models.medication import SearchHistory
+
+        queue = _write_behind_queue(app, monkeypatch, start_worker=True, WRITE_BEHIND_FLUSH_MS=10)
+        queue.submit('search_history', {"search_type": "food", "search_term": "kale"})
+
+        deadline = time.monotonic() + 5
+        while queue.metrics()['written'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        queue.shutdown()
+
+        assert queue.metrics()['written'] == 1
+        assert SearchHistory.query.filter_by(search_term='kale').count() == 1
+
+
+# ─── Retention ────────────────────────────────────────────
+
+def _seed_history(user_id, days_ago, foods):
+    from datetime import datetime, timezone, timedelta
+    from app import db
+    from app.models.medication import SearchHistory, InteractionCheck
+
+    at = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    for food in foods:
+        db.session.add(SearchHistory(user_id=user_id, search_type='food', search_term=food, searched_at=at))
+        db.session.add(InteractionCheck(user_id=user_id, food_name=food, medications_checked='["Lipitor"]',
+                                        had_interaction=food == 'Grapefruit', interaction_count=1,
+                                        max_severity='high' if food == 'Grapefruit' else None,
+                                        checked_at=at))
+    db.session.commit()
+
+
+class TestRetention:
+    @pytest.fixture
+    def retention_config(self, app, monkeypatch, tmp_path):
+        monkeypatch.setitem(app.config, 'RETENTION_ARCHIVE_DIR', str(tmp_path))
+        monkeypatch.setitem(app.config, 'RETENTION_CHUNK_SIZE', 2)
+        monkeypatch.setitem(app.config, 'RETENTION_SEARCH_HISTORY_DAYS', 180)
+        monkeypatch.setitem(app.config, 'RETENTION_INTERACTION_CHECKS_DAYS', 365)
+        return tmp_path
+
+    def test_archives_old_rows_and_keeps_counts(self, app, client, test_user, admin_headers,
+                                                 auth_headers, retention_config):
+        import gzip
+        import json
+        from sqlalchemy import event
+        from app import db
+        from app.models.medication import SearchHistory, InteractionCheck
+        from app.models.interaction_stats import InteractionStats
+
+        user_id = test_user.id
+        _seed_history(user_id, 400, ['Grapefruit', 'Grapefruit', 'Kale', 'Kale', 'Milk'])
+        _seed_history(user_id, 200, ['Kale'])
+        _seed_history(user_id, 3, ['Grapefruit'])
+        stats_before = client.get('/api/v1/interaction-history/stats', headers=auth_headers).get_json()['data']
+        admin_before = client.get('/api/v1/admin/stats', headers=admin_headers).get_json()['data']
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            result = app.test_cli_runner().invoke(args=['retention', 'run'])
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        assert result.exit_code == 0, result.output
+        assert 'search_history: archived 6 rows' in result.output
+        assert 'interaction_checks: archived 5 rows' in result.output
+        # Chunks of two rows: 3 deletes per table
+        assert sum(s.startswith('DELETE FROM search_history') for s in statements) == 3
+        assert sum(s.startswith('DELETE FROM interaction_checks') for s in statements) == 3
+
+        assert SearchHistory.query.filter_by(user_id=user_id).count() == 1
+        assert InteractionCheck.query.filter_by(user_id=user_id).count() == 2
+
+        archived = []
+        for path in sorted((retention_config / 'interaction_checks' / str(user_id)).iterdir()):
+            with gzip.open(path, 'rt') as f:
+                archived += [json.loads(line) for line in f]
+        assert sorted(row['food_name'] for row in archived) == ['Grapefruit', 'Grapefruit', 'Kale', 'Kale', 'Milk']
+        assert archived[0]['medications_checked'] == '["Lipitor"]'
+
+        stats_after = client.get('/api/v1/interaction-history/stats', headers=auth_headers).get_json()['data']
+        admin_after = client.get('/api/v1/admin/stats', headers=admin_headers).get_json()['data']
+        assert stats_after == stats_before
+        assert admin_after['content']['total_searches'] == admin_before['content']['total_searches']
+        assert admin_after['content']['total_interaction_checks'] == admin_before['content']['total_interaction_checks']
+        assert admin_after['top_foods'] == admin_before['top_foods']
+
+        # Rebuilding from SQL includes the archived checks
+        InteractionStats.reset(user_id)
+        db.session.commit()
+        assert InteractionStats.get_for_user(user_id) == stats_before
+
+    def test_dry_run_and_disabled(self, app, test_user, monkeypatch, retention_config):
+        from app.models.medication import SearchHistory
+
+        _seed_history(test_user.id, 400, ['Kale', 'Milk'])
+        monkeypatch.setitem(app.config, 'RETENTION_INTERACTION_CHECKS_DAYS', 0)
+
+        result = app.test_cli_runner().invoke(args=['retention', 'run', '--dry-run'])
+        assert 'search_history: would archive 2 rows' in result.output
+        assert 'interaction_checks: retention disabled' in result.output
+        assert SearchHistory.query.count() == 2
+        assert not (retention_config / 'search_history').exists()
+
+    def test_clear_history_drops_archived_counts(self, app, client, test_user, auth_headers, retention_config):
+        from app.services.retention_service import run_retention
+
+        _seed_history(test_user.id, 400, ['Kale'])
+        run_retention(['interaction_checks'])
+        client.delete('/api/v1/interaction-history', headers=auth_headers)
+
+        stats = client.get('/api/v1/interaction-history/stats', headers=auth_headers).get_json()['data']
+        assert stats['total_checks'] == 0
+
+    def test_clearing_history_purges_archives(self, app, client, test_user, auth_headers, retention_config):
+        import gzip
+        import json
+        from app.services.retention_service import run_retention
+
+        user_id = test_user.id
+        _seed_history(user_id, 400, ['Kale', 'Milk'])
+        run_retention()
+        # A file from before archives were split per user
+        legacy = retention_config / 'search_history' / '2020-01.ndjson.gz'
+        with gzip.open(legacy, 'wt') as f:
+            f.write(json.dumps({"user_id": user_id, "search_term": "kale"}) + '\n')
+            f.write(json.dumps({"user_id": user_id + 1000, "search_term": "milk"}) + '\n')
+        assert (retention_config / 'search_history' / str(user_id)).is_dir()
+
+        client.delete('/api/v1/search-history', headers=auth_headers)
+        assert not (retention_config / 'search_history' / str(user_id)).exists()
+        with gzip.open(legacy, 'rt') as f:
+            assert [json.loads(line)['user_id'] for line in f] == [user_id + 1000]
+        assert (retention_config / 'interaction_checks' / str(user_id)).is_dir()
+
+        client.delete('/api/v1/auth/me', headers=auth_headers, json={'password': 'TestPass1'})
+        assert not (retention_config / 'interaction_checks' / str(user_id)).exists()
+
+    def test_partitioning_ddl(self):
+        from datetime import date
+        from app.services.retention_service import partitioning_ddl, partition_name, _next_month
+
+        first = date(2024, 11, 1)
+        statements = partitioning_ddl('search_history', first, months_ahead=1)
+        assert statements[:3] == [
+            'ALTER TABLE search_history RENAME TO search_history_unpartitioned',
+            'CREATE TABLE search_history (LIKE search_history_unpartitioned INCLUDING DEFAULTS) '
+            'PARTITION BY RANGE (searched_at)',
+            'ALTER TABLE search_history ADD PRIMARY KEY (id, searched_at)',
+        ]
+        partitions = [s for s in statements if ' PARTITION OF ' in s]
+        assert partitions[0] == ("CREATE TABLE search_history_p202411 PARTITION OF search_history "
+                                 "FOR VALUES FROM ('2024-11-01') TO ('2024-12-01')")
+        last_month = _next_month(date.today().replace(day=1))
+        assert partitions[-1].startswith(f'CREATE TABLE {partition_name("search_history", last_month)} ')
+        copy = statements.index('INSERT INTO search_history SELECT * FROM search_history_unpartitioned')
+        assert statements.index(partitions[-1]) < copy
+        assert statements[copy + 2] == 'DROP TABLE search_history_unpartitioned'
+        indexes = [s for s in statements if s.startswith('CREATE INDEX')]
+        assert 'CREATE INDEX ix_search_history_user_searched_at ON search_history (user_id, searched_at, id)' in indexes
+        assert any(s.startswith('ALTER TABLE search_history ADD FOREIGN KEY(user_id) REFERENCES users') for s in statements)
+
+    def test_droppable_partitions_end_before_cutoff(self, app, monkeypatch):
+        from datetime import date, datetime
+        from app.services import retention_service
+
+        months = [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+        monkeypatch.setattr(retention_service, 'partition_months', lambda table: months)
+        with app.app_context():
+            dropped = retention_service.droppable_partitions('search_history', datetime(2024, 3, 1, 12))
+        assert dropped == [date(2024, 1, 1), date(2024, 2, 1)]
+
+
+# ─── SQLite profile ───────────────────────────────────────
+
+class TestSqliteProfile:
+    def test_pragmas_applied_to_file_database(self, app):
+        from app import db
+        from app.sqlite_profile import current_settings
+
+        with app.app_context():
+            with db.engine.connect() as connection:
+                settings = current_settings(connection)
+        assert settings['journal_mode'] == 'wal'
+        assert settings['synchronous'] == 1  # NORMAL
+        assert settings['busy_timeout'] == app.config['SQLITE_BUSY_TIMEOUT_MS']
+        assert settings['cache_size'] == app.config['SQLITE_CACHE_SIZE']
+        assert settings['temp_store'] == 2  # MEMORY
+
+    def test_settings_validated(self):
+        from app.sqlite_profile import pragmas
+
+        assert 'PRAGMA synchronous = FULL' in pragmas({'SQLITE_SYNCHRONOUS': 'full'})
+        with pytest.raises(ValueError):
+            pragmas({'SQLITE_JOURNAL_MODE': 'fast'})
+
+    def test_skips_memory_and_other_databases(self):
+        from sqlalchemy import create_engine
+        from app.sqlite_profile import is_file_database
+
+        assert is_file_database(create_engine('sqlite:///medible.db')) is True
+        assert is_file_database(create_engine('sqlite://')) is False
+
+
+# ─── Migrations ───────────────────────────────────────────
+
+class TestMigrations:
+    def test_upgrade_matches_models(self, app, tmp_path):
+        import os
+        import subprocess
+        import sys
+        from sqlalchemy import create_engine
+        from alembic.autogenerate import compare_metadata
+        from alembic.migration import MigrationContext
+        from app import db
+
+        backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        url = f"sqlite:///{tmp_path / 'migrated.db'}"
+        env = dict(os.environ, DATABASE_URL=url, FLASK_APP='run.py', FLASK_ENV='development')
+        result = subprocess.run([sys.executable, '-m', 'flask', 'db', 'upgrade'],
+                                cwd=backend, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+        engine = create_engine(url)
+        try:
+            with engine.connect() as connection:
+                diff = compare_metadata(MigrationContext.configure(connection), db.metadata)
+        finally:
+            engine.dispose()
+        assert diff == [], "models changed without a migration (run 'flask db migrate')"
+
+
+# ─── Query plans ──────────────────────────────────────────
+
+# Per-user reads served on every page load or poll; each must reach its rows
+# through an index, never a full scan of the table
+HOT_READS = [
+    '/api/v1/auth/me',
+    '/api/v1/medications',
+    '/api/v1/medications?active_only=true',
+    '/api/v1/medications/reminders',
+    '/api/v1/food-diary',
+    '/api/v1/food-diary?date=2026-01-01',
+    '/api/v1/food-diary?start_date=2026-01-01&end_date=2026-01-07',
+    '/api/v1/food-diary/today',
+    '/api/v1/food-diary/summary',
+    '/api/v1/food-diary/weekly',
+    '/api/v1/food-diary/streaks',
+    '/api/v1/interaction-history',
+    '/api/v1/interaction-history/stats',
+    '/api/v1/search-history',
+    '/api/v1/search-history?search_type=food',
+    '/api/v1/foods/favorites',
+    '/api/v1/foods/recent',
+    '/api/v1/dashboard/summary',
+    '/api/v1/dashboard/alerts',
+]
+
+
+@pytest.fixture
+def hot_selects(app, client, auth_headers, sample_medication, sample_food_log):
+    """Every SELECT the hot reads (and a reset-token lookup) run: [(sql, params, statement)]"""
+    from sqlalchemy import event
+    from app import db
+
+    statements, selects = {}, []
+
+    def before_execute(conn, clauseelement, multiparams, params, execution_options):
+        statements[id(conn)] = clauseelement
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            selects.append((statement, parameters, statements.get(id(conn))))
+
+    event.listen(db.engine, 'before_execute', before_execute)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for path in HOT_READS:
+            resp = client.get(path, headers=auth_headers)
+            assert resp.status_code == 200, path
+        resp = client.post('/api/v1/auth/reset-password',
+                           json={'token': 'not-a-token', 'new_password': 'NewPass123'})
+        assert resp.status_code == 401
+    finally:
+        event.remove(db.engine, 'before_execute', before_execute)
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert selects
+    return selects
+
+
+def _sqlite_full_scans(connection, sql, params) -> list:
+    """Plan steps that read a whole table (SCAN <table>, with or without an index)"""
+    from app import db
+
+    plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params).all()
+    scans = []
+    for row in plan:
+        words = row[-1].split()
+        if words[0] == 'SCAN' and words[1] in db.metadata.tables:
+            scans.append(row[-1])
+    return scans
+
+
+def _postgres_seq_scans(node: dict) -> list:
+    scans = [node['Relation Name']] if node['Node Type'] == 'Seq Scan' else []
+    for child in node.get('Plans', []):
+        scans.extend(_postgres_seq_scans(child))
+    return scans
+
+
+class TestQueryPlans:
+    def test_hot_reads_use_indexes_on_sqlite(self, app, hot_selects):
+        from app import db
+
+        with db.engine.connect() as connection:
+            regressions = {
+                ' '.join(sql.split()): scans for sql, params, _ in hot_selects
+                if (scans := _sqlite_full_scans(connection, sql, params))
+            }
+        assert regressions == {}, "hot query regressed to a full scan"
+
+    def test_hot_reads_use_composite_indexes(self, app, hot_selects):
+        from app import db
+
+        with db.engine.connect() as connection:
+            steps = ' '.join(
+                row[-1] for sql, params, _ in hot_selects
+                for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql, params)
+            )
+        for index in ('ix_user_medications_user_active_name', 'ix_food_logs_user_date_logged_at',
+                      'ix_interaction_checks_user_checked_at', 'ix_search_history_user_type_searched_at'):
+            assert index in steps, index
+
+    def test_password_reset_lookup_uses_partial_index(self, app):
+        from app import db
+        from app.models.user import User
+
+        with db.engine.connect() as connection:
+            plan = connection.exec_driver_sql(
+                'EXPLAIN QUERY PLAN ' + str(User.query.filter_by(password_reset_token='x').statement.compile(db.engine)),
+                ('x',)
+            ).all()
+        assert any('ix_users_password_reset_token' in row[-1] for row in plan)
+
+    def test_detects_full_scan(self, app):
+        from app import db
+
+        with db.engine.connect() as connection:
+            assert _sqlite_full_scans(connection, 'SELECT * FROM food_logs WHERE notes = ?', ('x',)) == ['SCAN food_logs']
+            assert _sqlite_full_scans(connection, 'SELECT * FROM food_logs WHERE user_id = ?', (1,)) == []
+
+    def test_hot_reads_use_indexes_on_postgres(self, hot_selects):
+        """Runs when TEST_POSTGRES_URL points at an empty scratch database"""
+        import json
+        import os
+        from sqlalchemy import create_engine
+        from app import db
+
+        url = os.environ.get('TEST_POSTGRES_URL')
+        if not url:
+            pytest.skip('TEST_POSTGRES_URL not set')
+        engine = create_engine(url)
+        try:
+            db.metadata.create_all(engine)
+            regressions = {}
+            with engine.connect() as connection:
+                # tables are empty, so only an unusable index makes the planner scan
+                connection.exec_driver_sql('SET enable_seqscan = off')
+                for _, _, statement in hot_selects:
+                    sql = str(statement.compile(engine, compile_kwargs={'literal_binds': True}))
+                    plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + sql).scalar()
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    if scans := _postgres_seq_scans(plan[0]['Plan']):
+                        regressions[' '.join(sql.split())] = scans
+            assert regressions == {}, "hot query regressed to a full scan"
+        finally:
+            db.metadata.drop_all(engine)
+            engine.dispose()
+
+    def test_hot_reads_compile_for_postgres(self, hot_selects):
+        from sqlalchemy.dialects import postgresql
+
+        for _, _, statement in hot_selects:
+            assert str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+# ─── Read replicas ────────────────────────────────────────
+
+@pytest.fixture
+def replica(app, tmp_path, monkeypatch):
+    """A second SQLite database configured as the only read replica"""
+    from sqlalchemy import create_engine
+    from app import db
+    from app.db_routing import _recent_writers
+
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    db.metadata.create_all(engine)
+    monkeypatch.setitem(app.config, 'DATABASE_READ_URLS', [url])
+    _recent_writers.clear()
+    yield engine
+    engine.dispose()
+    replicas = app.extensions.pop('db_replicas', None)
+    if replicas:
+        replicas.dispose()
+
+
+def _replica_only_medication(engine, user_id):
+    from app.models.medication import UserMedication
+
+    with engine.begin() as connection:
+        connection.execute(UserMedication.__table__.insert().values(
+            user_id=user_id, drug_name='ReplicaOnly', is_active=True
+        ))
+
+
+class TestReadReplicas:
+    def _drug_names(self, client, headers):
+        resp = client.get('/api/v1/medications', headers=headers)
+        assert resp.status_code == 200
+        return [m['drug_name'] for m in resp.get_json()['data']['medications']]
+
+    def test_read_only_route_reads_replica(self, client, test_user, auth_headers, sample_medication, replica):
+        _replica_only_medication(replica, test_user.id)
+        assert self._drug_names(client, auth_headers) == ['ReplicaOnly']
+
+    def test_other_reads_stay_on_primary(self, app, test_user, sample_medication, replica):
+        from app.db_routing import replica_reads
+        from app.models.medication import UserMedication
+
+        _replica_only_medication(replica, test_user.id)
+        with app.app_context():
+            assert [m.drug_name for m in UserMedication.query.all()] == ['Lipitor']
+            with replica_reads():
+                assert [m.drug_name for m in UserMedication.query.all()] == ['ReplicaOnly']
+
+    def test_reads_own_writes_from_primary(self, client, test_user, auth_headers, replica):
+        _replica_only_medication(replica, test_user.id)
+        resp = client.post('/api/v1/medications', headers=auth_headers, json={'drug_name': 'Metformin'})
+        assert resp.status_code == 201
+        assert self._drug_names(client, auth_headers) == ['Metformin']
+
+    def test_write_window_expires(self, app, client, test_user, auth_headers, replica, monkeypatch):
+        monkeypatch.setitem(app.config, 'DATABASE_READ_YOUR_WRITES_SECONDS', 0)
+        _replica_only_medication(replica, test_user.id)
+        client.post('/api/v1/medications', headers=auth_headers, json={'drug_name': 'Metformin'})
+        assert self._drug_names(client, auth_headers) == ['ReplicaOnly']
+
+    def test_lagging_replica_skipped(self, client, test_user, auth_headers, sample_medication, replica, monkeypatch):
+        import app.db_routing as db_routing
+
+        _replica_only_medication(replica, test_user.id)
+        monkeypatch.setattr(db_routing, 'replica_lag', lambda engine: 60.0)
+        assert self._drug_names(client, auth_headers) == ['Lipitor']
+
+    def test_unreachable_replica_skipped(self, app, client, test_user, auth_headers, sample_medication, monkeypatch):
+        monkeypatch.setitem(app.config, 'DATABASE_READ_URLS', ['sqlite:////nonexistent/dir/replica.db'])
+        try:
+            assert self._drug_names(client, auth_headers) == ['Lipitor']
+            result = app.test_cli_runner().invoke(args=['replicas', 'status'])
+            assert result.exit_code != 0
+            assert 'unreachable' in result.output
+        finally:
+            app.extensions.pop('db_replicas').dispose()
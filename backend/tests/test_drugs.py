@@ -34,6 +34,47 @@ class TestDrugSearch:
         assert resp.status_code == 400
 
 
+@pytest.fixture
+def lookup_cache(app, monkeypatch):
+    """Upstream lookups memoized for five minutes (the testing config disables it)"""
+    from app.services.openfda_service import _lookup_cache
+
+    monkeypatch.setitem(app.config, 'LOOKUP_CACHE_TTL', 300)
+    _lookup_cache.clear()
+    yield _lookup_cache
+    _lookup_cache.clear()
+
+
+class TestLookupCache:
+    @patch('app.services.openfda_service.requests.get')
+    def test_repeat_search_served_from_cache(self, mock_get, client, lookup_cache):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {"results": [{"openfda": {"brand_name": ["Aspirin"]}}]}
+
+        first = client.get('/api/v1/drugs/search?q=aspirin')
+        assert first.status_code == 200
+        assert first.headers['ETag']
+        resp = client.get('/api/v1/drugs/search?q=aspirin', headers={'If-None-Match': first.headers['ETag']})
+        assert resp.status_code == 304
+        again = client.get('/api/v1/drugs/search?q=aspirin')
+        assert again.get_json()['data'] == first.get_json()['data']
+        assert mock_get.call_count == 1
+
+    @patch('app.services.openfda_service.requests.get')
+    def test_failures_not_cached(self, mock_get, client, lookup_cache):
+        mock_get.return_value.status_code = 500
+        assert client.get('/api/v1/drugs/search?q=aspirin').status_code == 502
+        assert client.get('/api/v1/drugs/search?q=aspirin').status_code == 502
+        assert mock_get.call_count == 2
+
+    def test_no_etag_without_cache_entry(self, client):
+        with patch('app.routes.drugs.search_drug', return_value=MOCK_SEARCH_RESULT) as mock_search:
+            mock_search.cached_at.return_value = None
+            resp = client.get('/api/v1/drugs/search?q=aspirin')
+        assert 'ETag' not in resp.headers
+        assert resp.cache_control.public
+
+
 class TestDrugDetail:
     @patch('app.services.openfda_service.get_drug_detail', return_value=MOCK_DETAIL)
     def test_get_drug_detail(self, mock_detail, client):
@@ -3,8 +3,9 @@ Tests for Food Diary Endpoints
 Covers: get logs, today, add, delete, update, summary, weekly, streaks, export
 """
 
+import json
 import pytest
-from datetime import date
+from datetime import date, timedelta
 
 
 class TestGetFoodLogs:
@@ -22,11 +23,95 @@ class TestGetFoodLogs:
         resp = client.get('/api/v1/food-diary?days=7', headers=auth_headers)
         assert resp.status_code == 200
 
+    def test_get_logs_range_cursor_walk(self, client, auth_headers, test_user):
+        from app import db
+        from app.models.medication import FoodLog
+        for days_ago in (0, 0, 1, 2, 2):
+            db.session.add(FoodLog(user_id=test_user.id, food_name=f'Item {days_ago}',
+                                   logged_date=date.today() - timedelta(days=days_ago)))
+        db.session.commit()
+
+        seen, cursor = [], None
+        while True:
+            url = '/api/v1/food-diary?days=7&limit=2' + (f'&cursor={cursor}' if cursor else '')
+            data = client.get(url, headers=auth_headers).get_json()['data']
+            for day, logs in data['logs_by_date'].items():
+                seen.extend((day, log['id']) for log in logs)
+            cursor = data['pagination']['next_cursor']
+            if not cursor:
+                break
+        assert len(seen) == 5
+        assert len({log_id for _, log_id in seen}) == 5
+        assert sorted(day for day, _ in seen) == sorted(
+            (date.today() - timedelta(days=d)).isoformat() for d in (0, 0, 1, 2, 2)
+        )
+
+    def test_get_logs_invalid_cursor(self, client, auth_headers):
+        resp = client.get('/api/v1/food-diary?days=7&cursor=not-a-cursor', headers=auth_headers)
+        assert resp.status_code == 400
+
     def test_get_logs_no_auth(self, client):
         resp = client.get('/api/v1/food-diary/today')
         assert resp.status_code == 401
 
 
+class TestRowSerializers:
+    """The Core read path must return exactly what to_dict returns"""
+
+    def test_match_to_dict(self, app, test_user, sample_food_log):
+        from datetime import datetime, timezone
+        from app import db
+        from app.models import rows
+        from app.models.medication import UserMedication, InteractionCheck, SearchHistory
+        from app.models.favorites import FavoriteFood
+
+        with app.app_context():
+            objects = [
+                UserMedication(user_id=test_user.id, drug_name='Warfarin', dosage='5mg', is_active=True,
+                               start_date=date.today()),
+                InteractionCheck(user_id=test_user.id, food_name='Kale', medications_checked='["Warfarin"]',
+                                 had_interaction=True, interaction_count=1, max_severity='high',
+                                 interactions_json='[{"severity": "high"}]'),
+                InteractionCheck(user_id=test_user.id, food_name='Rice', medications_checked='[]'),
+                SearchHistory(user_id=test_user.id, search_type='food', search_term='kale',
+                              searched_at=datetime.now(timezone.utc)),
+                FavoriteFood(user_id=test_user.id, food_name='Kale', nutrition_snapshot='{"calories": 49}'),
+                FavoriteFood(user_id=test_user.id, food_name='Oats', source='openfoodfacts',
+                             nutrition_snapshot='not json'),
+            ]
+            db.session.add_all(objects)
+            db.session.commit()
+            objects.append(db.session.get(type(sample_food_log), sample_food_log.id))
+
+            serializers = {s.model: s for s in (rows.medication_rows, rows.food_log_rows,
+                                                 rows.interaction_check_rows, rows.search_history_rows,
+                                                 rows.favorite_food_rows)}
+            for obj in objects:
+                serializer = serializers[type(obj)]
+                [row] = db.session.execute(serializer.select().where(type(obj).id == obj.id)).all()
+                assert serializer(row) == obj.to_dict()
+
+    def test_range_listing_pages(self, client, auth_headers, test_user):
+        from app import db
+        from app.models.medication import FoodLog
+
+        for i in range(5):
+            db.session.add(FoodLog(user_id=test_user.id, food_name=f'Food {i}', calories=10,
+                                   logged_date=date.today() - timedelta(days=i % 2)))
+        db.session.commit()
+
+        first = client.get('/api/v1/food-diary?days=7&limit=3', headers=auth_headers).get_json()['data']
+        cursor = first['pagination']['next_cursor']
+        second = client.get(f'/api/v1/food-diary?days=7&limit=3&cursor={cursor}',
+                            headers=auth_headers).get_json()['data']
+        names = [log['food_name'] for page in (first, second)
+                 for logs in page['logs_by_date'].values() for log in logs]
+        assert sorted(names) == [f'Food {i}' for i in range(5)]
+        assert second['pagination']['has_more'] is False
+        assert (first['total_entries'], first['page_entries']) == (5, 3)
+        assert (second['total_entries'], second['page_entries']) == (5, 2)
+
+
 class TestAddFoodLog:
     def test_add_food_log(self, client, auth_headers):
         resp = client.post('/api/v1/food-diary', headers=auth_headers, json={
@@ -41,6 +126,150 @@ class TestAddFoodLog:
         })
         assert resp.status_code == 400
 
+    def test_interaction_flags_computed_server_side(self, client, auth_headers, sample_medication):
+        resp = client.post('/api/v1/food-diary', headers=auth_headers, json={
+            'food_name': 'Grapefruit', 'had_interaction': False, 'interaction_count': 0
+        })
+        food_log = resp.get_json()['data']['food_log']
+        assert food_log['had_interaction'] is True
+        assert food_log['interaction_count'] >= 1
+        assert food_log['max_severity'] == 'high'
+
+    def test_single_entry_skips_label_fetch(self, app, client, auth_headers, sample_medication, monkeypatch):
+        from app import db
+        from app.models.medication import FoodLog
+        from app.services import openfda_service
+
+        calls = []
+        fake = lambda drug: calls.append(drug) or {"success": False}
+        fake.cached_at = lambda drug: None
+        monkeypatch.setattr(openfda_service, 'get_drug_detail', fake)
+
+        resp = client.post('/api/v1/food-diary', headers=auth_headers, json={'food_name': 'Grapefruit'})
+        assert resp.get_json()['data']['food_log']['had_interaction'] is True
+        resp = client.post('/api/v1/food-diary', headers=auth_headers, json={'food_name': 'Toast'})
+        log_id = resp.get_json()['data']['food_log']['id']
+        client.patch(f'/api/v1/food-diary/{log_id}', headers=auth_headers, json={'food_name': 'Rice'})
+        assert calls == []
+        with app.app_context():
+            # Screened without Lipitor's label: left for rescreen
+            assert db.session.get(FoodLog, log_id).screened_meds_key is None
+
+
+class TestRescreen:
+    def test_reads_do_not_write_and_command_persists(self, app, client, auth_headers,
+                                                     sample_food_log, sample_medication):
+        from sqlalchemy import event
+        from app import db
+        from app.models.medication import FoodLog
+
+        with app.app_context():
+            engine = db.engine
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            assert client.get('/api/v1/dashboard/alerts', headers=auth_headers).status_code == 200
+            assert client.post('/api/v1/interactions/batch-check', headers=auth_headers).status_code == 200
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+        assert not [s for s in statements if s.startswith('UPDATE food_logs')]
+
+        result = app.test_cli_runner().invoke(args=['food-logs', 'rescreen'])
+        assert 'Rescreened 1 food logs' in result.output
+        with app.app_context():
+            log = db.session.get(FoodLog, sample_food_log.id)
+            assert log.screened_meds_key == FoodLog.medication_key(['Lipitor'])
+        result = app.test_cli_runner().invoke(args=['food-logs', 'rescreen'])
+        assert 'Rescreened 0 food logs' in result.output
+
+
+class TestImportFoodLogs:
+    def test_import_json(self, client, auth_headers, sample_medication):
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        resp = client.post('/api/v1/food-diary/import', headers=auth_headers, json={'entries': [
+            {'food_name': 'Grapefruit', 'calories': 50, 'logged_date': yesterday},
+            {'food_name': 'Oatmeal', 'calories': 150},
+            {'food_name': 'Toast', 'calories': 80},
+            {'calories': 10},
+            {'food_name': 'Egg', 'logged_date': '2024/01/01'},
+        ]})
+        assert resp.status_code == 201
+        data = resp.get_json()['data']
+        assert data['imported_count'] == 3
+        assert [s['row'] for s in data['skipped']] == [4, 5]
+        assert data['skipped'][1]['reason'] == 'Invalid date format. Use YYYY-MM-DD'
+        assert data['days_affected'] == [yesterday, date.today().isoformat()]
+        assert [i['food'] for i in data['interactions']] == ['grapefruit']
+        assert data['interactions'][0]['max_severity'] == 'high'
+
+        summary = client.get('/api/v1/food-diary/summary?days=2', headers=auth_headers).get_json()['data']
+        assert [d['calories'] for d in summary['daily_summaries']] == [50, 230]
+
+    def test_import_csv(self, client, auth_headers):
+        import io
+        csv_text = (
+            '\ufefffood_name,calories,protein,meal_type,logged_date\n'
+            f'Banana,105,1.3,snack,{date.today().isoformat()}\n'
+            'Rice,,4,lunch,\n'
+            'Bread,lots,3,lunch,\n'
+        )
+        resp = client.post('/api/v1/food-diary/import', headers=auth_headers,
+                           content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(csv_text.encode('utf-8')), 'diary.csv')})
+        assert resp.status_code == 201
+        data = resp.get_json()['data']
+        assert data['imported_count'] == 2
+        assert data['skipped'] == [{'row': 3, 'food_name': 'Bread', 'reason': 'calories must be a number'}]
+
+        logs = client.get('/api/v1/food-diary/today', headers=auth_headers).get_json()['data']
+        assert logs['totals']['calories'] == 105
+        assert logs['totals']['protein'] == pytest.approx(5.3)
+        assert {log['meal_type'] for log in logs['logs']} == {'snack', 'lunch'}
+
+    def test_import_csv_blank_serving_unit(self, client, auth_headers):
+        import io
+        csv_text = 'food_name,serving_unit\nBanana,\nMilk,cup\n'
+        resp = client.post('/api/v1/food-diary/import', headers=auth_headers,
+                           content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(csv_text.encode('utf-8')), 'diary.csv')})
+        assert resp.get_json()['data']['imported_count'] == 2
+
+        logs = client.get('/api/v1/food-diary/today', headers=auth_headers).get_json()['data']['logs']
+        assert {log['food_name']: log['serving_unit'] for log in logs} == {'Banana': 'g', 'Milk': 'cup'}
+
+    def test_import_is_one_insert(self, app, client, auth_headers, sample_medication):
+        from sqlalchemy import event
+        from app import db
+
+        entries = [{'food_name': f'Food {i}', 'calories': i,
+                    'logged_date': (date.today() - timedelta(days=i % 5)).isoformat()}
+                   for i in range(300)]
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            resp = client.post('/api/v1/food-diary/import', headers=auth_headers,
+                               json={'entries': entries})
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        assert resp.get_json()['data']['imported_count'] == 300
+        inserts = [s for s in statements if s.startswith('INSERT INTO food_logs')]
+        assert len(inserts) == 1
+
+    def test_import_validation(self, client, app, auth_headers, monkeypatch):
+        resp = client.post('/api/v1/food-diary/import', headers=auth_headers, json={'entries': []})
+        assert resp.status_code == 400
+
+        monkeypatch.setitem(app.config, 'FOOD_LOG_IMPORT_MAX', 2)
+        resp = client.post('/api/v1/food-diary/import', headers=auth_headers,
+                           json=[{'food_name': 'A'}, {'food_name': 'B'}, {'food_name': 'C'}])
+        assert resp.status_code == 400
+        assert resp.get_json()['error']['details']['max'] == 2
+
 
 class TestUpdateDeleteFoodLog:
     def test_update_food_log(self, client, auth_headers, sample_food_log):
@@ -48,6 +277,12 @@ class TestUpdateDeleteFoodLog:
                             headers=auth_headers, json={'calories': 200})
         assert resp.status_code == 200
 
+    def test_rename_rescreens(self, client, auth_headers, sample_food_log, sample_medication):
+        resp = client.patch(f'/api/v1/food-diary/{sample_food_log.id}',
+                            headers=auth_headers, json={'food_name': 'Grapefruit juice',
+                                                        'had_interaction': False})
+        assert resp.get_json()['data']['food_log']['had_interaction'] is True
+
     def test_delete_food_log(self, client, auth_headers, sample_food_log):
         resp = client.delete(f'/api/v1/food-diary/{sample_food_log.id}',
                              headers=auth_headers)
@@ -62,6 +297,124 @@ class TestSummary:
         assert 'daily_summaries' in data
         assert 'averages' in data
 
+    def test_summary_zero_fills_long_range(self, client, auth_headers, sample_food_log):
+        resp = client.get('/api/v1/food-diary/summary?days=365', headers=auth_headers)
+        data = resp.get_json()['data']
+        assert len(data['daily_summaries']) == 365
+        assert data['daily_summaries'][0]['food_count'] == 0
+        assert data['daily_summaries'][-1]['date'] == date.today().isoformat()
+        assert data['daily_summaries'][-1]['calories'] == 105
+        assert data['days_logged'] == 1
+
+    def test_range_totals_single_query(self, app, test_user, sample_food_log, db_session):
+        from sqlalchemy import event
+        from app import db
+        from app.models.medication import FoodLog
+
+        db.session.add(FoodLog(user_id=test_user.id, food_name='Oats', calories=150,
+                               protein=5, logged_date=date.today()))
+        db.session.add(FoodLog(user_id=test_user.id, food_name='Egg', calories=70,
+                               logged_date=date.today() - timedelta(days=2)))
+        db.session.commit()
+        user_id = test_user.id
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            totals = FoodLog.get_daily_totals_range(
+                user_id, date.today() - timedelta(days=29), date.today()
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert len(statements) == 1
+        assert len(totals) == 30
+        today = totals[date.today()]
+        assert today['food_count'] == 2
+        assert today['calories'] == 255
+        assert today['protein'] == pytest.approx(6.3)
+        assert today['fiber'] == 0
+        assert totals[date.today() - timedelta(days=2)]['calories'] == 70
+        assert totals[date.today() - timedelta(days=1)]['food_count'] == 0
+
+
+class TestNutritionRollup:
+    def _rollup(self, user_id, day):
+        from app.models.nutrition_rollup import DailyNutritionRollup
+        return DailyNutritionRollup.get_range(user_id, day, day).get(day)
+
+    def test_rollup_follows_add_update_delete(self, client, auth_headers, test_user):
+        user_id = test_user.id
+        yesterday = date.today() - timedelta(days=1)
+        resp = client.post('/api/v1/food-diary', headers=auth_headers, json={
+            'food_name': 'Toast', 'calories': 80, 'logged_date': yesterday.isoformat()
+        })
+        log_id = resp.get_json()['data']['food_log']['id']
+        client.post('/api/v1/food-diary', headers=auth_headers, json={
+            'food_name': 'Jam', 'calories': 50, 'logged_date': yesterday.isoformat()
+        })
+        assert self._rollup(user_id, yesterday).calories == 130
+        assert self._rollup(user_id, yesterday).food_count == 2
+
+        client.patch(f'/api/v1/food-diary/{log_id}', headers=auth_headers, json={'calories': 100})
+        assert self._rollup(user_id, yesterday).calories == 150
+
+        client.delete(f'/api/v1/food-diary/{log_id}', headers=auth_headers)
+        assert self._rollup(user_id, yesterday).food_count == 1
+
+    def test_rollup_row_removed_with_last_log(self, client, auth_headers, sample_food_log):
+        user_id = sample_food_log.user_id
+        client.delete(f'/api/v1/food-diary/{sample_food_log.id}', headers=auth_headers)
+        assert self._rollup(user_id, date.today()) is None
+
+    def test_moving_log_updates_both_days(self, sample_food_log, db_session):
+        from app import db
+        user_id = sample_food_log.user_id
+        yesterday = date.today() - timedelta(days=1)
+        sample_food_log.logged_date = yesterday
+        db.session.commit()
+        assert self._rollup(user_id, date.today()) is None
+        assert self._rollup(user_id, yesterday).calories == 105
+
+    def test_refresh_upserts_existing_day(self, app, client, auth_headers, sample_food_log):
+        from sqlalchemy import event
+        from app import db
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.upper())
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            client.post('/api/v1/food-diary', headers=auth_headers, json={'food_name': 'Tea', 'calories': 2})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        rollup_writes = [s for s in statements if 'DAILY_NUTRITION_ROLLUP' in s and not s.startswith('SELECT')]
+        assert any('ON CONFLICT' in s for s in rollup_writes)
+        assert not any(s.startswith('DELETE') for s in rollup_writes)
+        assert self._rollup(sample_food_log.user_id, date.today()).calories == 107
+
+    def test_check_and_rebuild_commands(self, app, sample_food_log, db_session):
+        from app import db
+        from app.models.nutrition_rollup import DailyNutritionRollup
+        user_id = sample_food_log.user_id
+        db.session.query(DailyNutritionRollup).delete()
+        db.session.commit()
+
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=['rollups', 'check'])
+        assert result.exit_code != 0
+        assert 'mismatches found' in result.output
+
+        result = runner.invoke(args=['rollups', 'rebuild', '--user-id', str(user_id)])
+        assert result.exit_code == 0
+        assert DailyNutritionRollup.find_mismatches() == []
+        assert self._rollup(user_id, date.today()).calories == 105
+
+        result = runner.invoke(args=['rollups', 'check'])
+        assert result.exit_code == 0
+
 
 class TestWeekly:
     def test_weekly(self, client, auth_headers):
@@ -86,6 +439,39 @@ class TestStreaks:
         assert data['current_streak'] >= 1
         assert data['today_logged'] is True
 
+    def test_streak_maintained_across_gaps(self, client, auth_headers, sample_food_log):
+        log_ids = {}
+        for days_ago in (1, 2, 4):
+            resp = client.post('/api/v1/food-diary', headers=auth_headers, json={
+                'food_name': 'Apple', 'calories': 95,
+                'logged_date': (date.today() - timedelta(days=days_ago)).isoformat()
+            })
+            log_ids[days_ago] = resp.get_json()['data']['food_log']['id']
+
+        data = client.get('/api/v1/food-diary/streaks', headers=auth_headers).get_json()['data']
+        assert data['current_streak'] == 3
+        assert data['total_days_logged'] == 4
+        assert data['total_entries'] == 4
+
+        client.delete(f'/api/v1/food-diary/{log_ids[1]}', headers=auth_headers)
+        data = client.get('/api/v1/food-diary/streaks', headers=auth_headers).get_json()['data']
+        assert data['current_streak'] == 1
+
+        client.post('/api/v1/food-diary', headers=auth_headers, json={
+            'food_name': 'Pear', 'logged_date': (date.today() - timedelta(days=1)).isoformat()
+        })
+        client.post('/api/v1/food-diary', headers=auth_headers, json={
+            'food_name': 'Plum', 'logged_date': (date.today() - timedelta(days=3)).isoformat()
+        })
+        data = client.get('/api/v1/food-diary/streaks', headers=auth_headers).get_json()['data']
+        assert data['current_streak'] == 5
+
+        resp = client.get('/api/v1/dashboard/summary', headers=auth_headers)
+        assert resp.get_json()['data']['food_diary_streak'] == 5
+
+        from app.models.nutrition_rollup import DailyNutritionRollup
+        assert DailyNutritionRollup.find_mismatches() == []
+
 
 class TestExport:
     def test_export(self, client, auth_headers):
@@ -93,6 +479,19 @@ class TestExport:
         assert resp.status_code == 200
         assert 'export' in resp.get_json()['data']
 
+    def test_export_json_pages_keep_total(self, client, auth_headers, sample_food_log):
+        client.post('/api/v1/food-diary', headers=auth_headers, json={'food_name': 'Pear'})
+        data = client.get('/api/v1/food-diary/export?limit=1', headers=auth_headers).get_json()['data']
+        assert data['export']['total_entries'] == 2
+        assert data['export']['page_entries'] == 1
+        assert data['pagination']['has_more'] is True
+
     def test_export_custom_days(self, client, auth_headers):
         resp = client.get('/api/v1/food-diary/export?days=14', headers=auth_headers)
         assert resp.status_code == 200
+
+    def test_export_ndjson(self, client, auth_headers, sample_food_log):
+        resp = client.get('/api/v1/food-diary/export?format=ndjson', headers=auth_headers)
+        assert resp.status_code == 200
+        rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert [row['food_name'] for row in rows] == ['Banana']
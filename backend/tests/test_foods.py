@@ -87,3 +87,61 @@ class TestUnifiedSearch:
     def test_unified_search_missing_query(self, client):
         resp = client.get('/api/v1/foods/unified-search')
         assert resp.status_code == 400
+
+
+def _slow_usda_search(query, limit):
+    import time
+    time.sleep(0.5)
+    return MOCK_USDA_SEARCH
+
+
+class TestUnifiedSearchConcurrency:
+    @patch('app.routes.foods.search_food', side_effect=_slow_usda_search)
+    @patch('app.services.openfoodfacts_service.search_products',
+           return_value={"success": True, "count": 1, "products": [{"product_name": "Kiwi Juice"}]})
+    def test_deadline_returns_partial(self, mock_off, mock_usda, client, app, monkeypatch):
+        monkeypatch.setitem(app.config, 'UNIFIED_SEARCH_DEADLINE', 0.1)
+        resp = client.get('/api/v1/foods/unified-search?q=kiwi')
+        data = resp.get_json()['data']
+        assert resp.status_code == 200
+        assert data['partial'] is True
+        assert data['usda']['timed_out'] is True
+        assert data['openfoodfacts']['status'] == 'ok'
+        assert data['openfoodfacts']['count'] == 1
+
+    @patch('app.routes.foods.search_food', return_value={
+        "success": True, "count": 2,
+        "foods": [{"fdc_id": 1, "description": "COCA-COLA", "gtin_upc": "049000028911"},
+                  {"fdc_id": 2, "description": "Lemon, raw"}]})
+    @patch('app.services.openfoodfacts_service.search_products', return_value={
+        "success": True, "count": 2,
+        "products": [{"off_id": "0049000028911", "product_name": "Coke Classic"},
+                     {"off_id": "", "product_name": "Lemon raw"}]})
+    def test_merge_dedupes_and_caches(self, mock_off, mock_usda, client):
+        resp = client.get('/api/v1/foods/unified-search?q=cola+lemon')
+        data = resp.get_json()['data']
+        assert data['merged_count'] == 2
+        assert all(item['sources'] == ['usda', 'openfoodfacts'] for item in data['merged'])
+
+        again = client.get('/api/v1/foods/unified-search?q=cola+lemon')
+        assert again.get_json()['meta']['cached'] is True
+        assert mock_usda.call_count == 1
+
+    def test_merge_keeps_different_gtins_apart(self):
+        from app.routes.foods import _merge_results
+        merged = _merge_results(
+            [{"fdc_id": 1, "description": "Cola", "gtin_upc": "049000028911"},
+             {"fdc_id": 2, "description": "Cola"}],
+            [{"off_id": "5449000000996", "product_name": "Cola"}]
+        )
+        assert [item['gtin'] for item in merged] == ['0049000028911', '5449000000996']
+        assert merged[0]['fdc_id'] == 1 and merged[0]['sources'] == ['usda']
+
+    def test_pool_sized_from_config(self, app, monkeypatch):
+        from app.routes import foods
+        foods.shutdown_search_executor()
+        monkeypatch.setitem(app.config, 'UNIFIED_SEARCH_MAX_WORKERS', 3)
+        try:
+            assert foods._get_search_executor(app)._max_workers == 3
+        finally:
+            foods.shutdown_search_executor()
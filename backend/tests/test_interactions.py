@@ -113,6 +113,48 @@ class TestInteractionStats:
         assert 'total_interactions' in resp.get_json()['data']
 
 
+class TestConditionalGet:
+    def test_lookup_sends_validators(self, client, app):
+        resp = client.get('/api/v1/interactions/drug/lipitor')
+        assert resp.status_code == 200
+        assert resp.headers['ETag'].startswith('W/"')
+        assert resp.cache_control.public
+        assert resp.cache_control.max_age == app.config['INTERACTIONS_MAX_AGE']
+
+    def test_matching_etag_answered_before_the_engine(self, client, monkeypatch):
+        etag = client.get('/api/v1/interactions/food/grapefruit').headers['ETag']
+
+        def fail(*args, **kwargs):
+            raise AssertionError("engine should not run")
+        monkeypatch.setattr('app.routes.interactions.get_food_interactions', fail)
+        resp = client.get('/api/v1/interactions/food/grapefruit', headers={'If-None-Match': etag})
+        assert resp.status_code == 304
+        assert resp.data == b''
+        assert resp.headers['ETag'] == etag
+
+    def test_etag_follows_data_snapshot(self, client, monkeypatch):
+        from app.services.interaction_service import get_engine
+
+        etag = client.get('/api/v1/interactions/stats').headers['ETag']
+        assert client.get('/api/v1/interactions/stats', headers={'If-None-Match': etag}).status_code == 304
+        monkeypatch.setattr(get_engine(), '_snapshot', 'reloaded')
+        resp = client.get('/api/v1/interactions/stats', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+        assert resp.headers['ETag'] != etag
+
+    def test_etag_is_per_url(self, client):
+        etag = client.get('/api/v1/interactions/check?food=grapefruit&drug=lipitor').headers['ETag']
+        resp = client.get('/api/v1/interactions/check?food=milk&drug=lipitor', headers={'If-None-Match': etag})
+        assert resp.status_code == 200
+
+    @patch('app.services.openfda_service.get_drug_detail', return_value={"success": False, "error": "timeout"})
+    def test_failed_label_lookup_not_cached(self, mock_fda, client):
+        resp = client.get('/api/v1/interactions/check?food=peanut&drug=UnknownDrug')
+        assert resp.status_code == 200
+        assert resp.cache_control.no_store
+        assert 'ETag' not in resp.headers
+
+
 class TestBatchCheck:
     def test_batch_check(self, client, auth_headers, sample_food_log, sample_medication):
         resp = client.post('/api/v1/interactions/batch-check', headers=auth_headers)
@@ -121,6 +163,31 @@ class TestBatchCheck:
         assert 'foods_checked' in data
         assert 'medications_checked' in data
 
+    def test_batch_check_reads_stored_flags(self, client, auth_headers, sample_medication, monkeypatch):
+        client.post('/api/v1/food-diary/import', headers=auth_headers, json={'entries': [
+            {'food_name': 'Grapefruit'}, {'food_name': 'Oatmeal'}
+        ]})
+
+        def fail(*args, **kwargs):
+            raise AssertionError("interactions recomputed")
+        monkeypatch.setattr('app.services.food_log_service.check_foods_against_medications', fail)
+
+        data = client.post('/api/v1/interactions/batch-check', headers=auth_headers).get_json()['data']
+        assert data['foods_checked'] == 2
+        assert [r['food'] for r in data['results']] == ['grapefruit']
+        result = data['results'][0]
+        assert result['warning_count'] == sum(len(w) for w in result['warnings'].values())
+        assert data['total_warnings'] == result['warning_count']
+
+    def test_batch_check_rescreens_after_medication_change(self, client, auth_headers, sample_food_log):
+        client.post('/api/v1/food-diary', headers=auth_headers, json={'food_name': 'Grapefruit'})
+        data = client.post('/api/v1/interactions/batch-check', headers=auth_headers).get_json()['data']
+        assert data['results'] == []
+
+        client.post('/api/v1/medications', headers=auth_headers, json={'drug_name': 'Lipitor'})
+        data = client.post('/api/v1/interactions/batch-check', headers=auth_headers).get_json()['data']
+        assert [r['food'] for r in data['results']] == ['grapefruit']
+
 
 class TestReportInteraction:
     def test_report(self, client, auth_headers):
@@ -181,6 +248,107 @@ class TestInteractionHistory:
         assert 'total_checks' in data
         assert 'severity_distribution' in data
 
+    def test_history_cursor_walk(self, client, auth_headers, test_user):
+        from datetime import datetime
+        from app import db
+        from app.models.medication import InteractionCheck
+        same_time = datetime(2026, 1, 1, 12, 0)
+        for i in range(5):
+            db.session.add(InteractionCheck(user_id=test_user.id, food_name=f'Food {i}',
+                                            medications_checked='[]', checked_at=same_time))
+        db.session.commit()
+
+        ids, cursor = [], None
+        while True:
+            url = '/api/v1/interaction-history?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            data = client.get(url, headers=auth_headers).get_json()['data']
+            ids.extend(check['id'] for check in data['history'])
+            cursor = data['pagination']['next_cursor']
+            if not cursor:
+                assert data['pagination']['has_more'] is False
+                break
+        assert ids == sorted(ids, reverse=True)
+        assert len(ids) == 5
+
+    def _save(self, client, auth_headers, food, severities):
+        return client.post('/api/v1/interaction-history', headers=auth_headers, json={
+            'food_name': food, 'medications': ['Lipitor'],
+            'interactions': [{'drugName': 'Lipitor', 'severity': s} for s in severities]
+        }).get_json()['data']['check']['id']
+
+    def _stats(self, client, auth_headers):
+        return client.get('/api/v1/interaction-history/stats', headers=auth_headers).get_json()['data']
+
+    def test_history_stats_counters(self, client, auth_headers, test_user):
+        from app.models.medication import InteractionCheck
+        self._save(client, auth_headers, 'Grapefruit', ['high', 'low'])
+        self._save(client, auth_headers, 'grapefruit', ['medium'])
+
+        # The first saved check builds the counters from grouped SQL
+        data = self._stats(client, auth_headers)
+        assert data['total_checks'] == 2
+        assert data['severity_distribution'] == {'high': 1, 'medium': 1, 'low': 0, 'none': 0}
+
+        # Later writes update them incrementally
+        banana_id = self._save(client, auth_headers, 'Banana', [])
+        self._save(client, auth_headers, 'GRAPEFRUIT', ['moderate'])
+        data = self._stats(client, auth_headers)
+        assert data['total_checks'] == 4
+        assert data['severity_distribution'] == {'high': 1, 'medium': 2, 'low': 0, 'none': 1}
+        assert data['top_checked_foods'][0] == {'food': 'grapefruit', 'count': 3}
+
+        client.delete(f'/api/v1/interaction-history/{banana_id}', headers=auth_headers)
+        data = self._stats(client, auth_headers)
+        assert data['severity_distribution']['none'] == 0
+        assert [f['food'] for f in data['top_checked_foods']] == ['grapefruit']
+
+        computed = InteractionCheck.compute_stats(test_user.id)
+        assert computed['severity_distribution'] == data['severity_distribution']
+        assert computed['total_checks'] == data['total_checks']
+
+        client.delete('/api/v1/interaction-history', headers=auth_headers)
+        data = self._stats(client, auth_headers)
+        assert data['total_checks'] == 0
+        assert data['top_checked_foods'] == []
+
+    def test_stats_read_never_writes(self, client, auth_headers, test_user):
+        from app import db
+        from app.models.interaction_stats import InteractionStats
+        self._save(client, auth_headers, 'Grapefruit', ['high'])
+        user_id = test_user.id
+        InteractionStats.reset(user_id)
+        db.session.commit()
+
+        data = self._stats(client, auth_headers)
+        assert data['total_checks'] == 1
+        assert data['top_checked_foods'] == [{'food': 'grapefruit', 'count': 1}]
+        assert db.session.get(InteractionStats, user_id) is None
+
+        # The next write builds the row, including the earlier check
+        self._save(client, auth_headers, 'Kale', ['low'])
+        assert db.session.get(InteractionStats, user_id).total_checks == 2
+        assert self._stats(client, auth_headers)['severity_distribution']['low'] == 1
+
+    def test_rebuild_command_backfills_severity(self, app, test_user, db_session):
+        import json
+        from app import db
+        from app.models.medication import InteractionCheck
+        from app.models.interaction_stats import InteractionStats
+
+        db.session.add(InteractionCheck(
+            user_id=test_user.id, food_name='Kale', medications_checked='["Warfarin"]',
+            had_interaction=True, interaction_count=1,
+            interactions_json=json.dumps([{'severity': 'medium'}]), max_severity=None
+        ))
+        db.session.commit()
+        user_id = test_user.id
+
+        result = app.test_cli_runner().invoke(args=['interaction-stats', 'rebuild'])
+        assert result.exit_code == 0
+        assert 'Backfilled max_severity on 1 checks' in result.output
+        stats = InteractionStats.get_for_user(user_id)
+        assert stats['severity_distribution']['medium'] == 1
+
     def test_history_no_auth(self, client):
         resp = client.get('/api/v1/interaction-history')
         assert resp.status_code == 401
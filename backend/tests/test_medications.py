@@ -42,6 +42,23 @@ class TestAddMedication:
         assert resp.status_code == 422
 
 
+class TestInteractionsSummary:
+    def test_revalidated_until_medications_change(self, client, auth_headers, sample_medication):
+        first = client.get('/api/v1/medications/interactions-summary', headers=auth_headers)
+        assert first.status_code == 200
+        assert first.cache_control.private
+        assert 'Authorization' in first.headers['Vary']
+        etag = first.headers['ETag']
+
+        headers = {**auth_headers, 'If-None-Match': etag}
+        assert client.get('/api/v1/medications/interactions-summary', headers=headers).status_code == 304
+
+        client.post('/api/v1/medications', headers=auth_headers, json={'drug_name': 'Warfarin'})
+        resp = client.get('/api/v1/medications/interactions-summary', headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers['ETag'] != etag
+
+
 class TestUpdateMedication:
     def test_update_medication(self, client, auth_headers, sample_medication):
         resp = client.patch(f'/api/v1/medications/{sample_medication.id}',
@@ -97,6 +114,95 @@ class TestReminders:
         resp = client.delete(f'/api/v1/medications/reminders/{rid}', headers=auth_headers)
         assert resp.status_code == 200
 
+    def test_create_reminder_out_of_range_time(self, client, auth_headers, sample_medication):
+        resp = client.post('/api/v1/medications/reminders', headers=auth_headers, json={
+            'medication_id': sample_medication.id,
+            'reminder_time': '25:00'
+        })
+        assert resp.status_code == 422
+
+    def test_list_reminders_loads_medications_eagerly(self, app, client, auth_headers,
+                                                     test_user, sample_medication):
+        from sqlalchemy import event
+        from app import db
+        from app.models.medication import UserMedication
+        from app.models.favorites import MedicationReminder
+
+        for name in ('Warfarin', 'Metformin', 'Lisinopril'):
+            med = UserMedication(user_id=test_user.id, drug_name=name)
+            db.session.add(med)
+            db.session.flush()
+            db.session.add(MedicationReminder(user_id=test_user.id, medication_id=med.id,
+                                              reminder_time='08:00'))
+        db.session.commit()
+        user_id = test_user.id
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            reminders = MedicationReminder.get_user_reminders(user_id)
+            names = sorted(r.to_dict()['medication_name'] for r in reminders)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert names == ['Lisinopril', 'Metformin', 'Warfarin']
+        assert len(statements) == 1
+
+
+class TestReminderSchedule:
+    def test_compute_next_fire_at(self):
+        from datetime import datetime
+        from app.models.favorites import MedicationReminder
+        # 2026-10-19 is a Monday
+        monday_morning = datetime(2026, 10, 19, 7, 30)
+        compute = MedicationReminder.compute_next_fire_at
+        assert compute('08:00', ['mon'], monday_morning) == datetime(2026, 10, 19, 8, 0)
+        assert compute('07:00', ['mon'], monday_morning) == datetime(2026, 10, 26, 7, 0)
+        assert compute('07:00', ['wed', 'fri'], monday_morning) == datetime(2026, 10, 21, 7, 0)
+        assert compute('07:00', [], monday_morning) is None
+
+    def test_next_fire_at_maintained(self, client, auth_headers, sample_medication):
+        from app import db
+        from app.models.favorites import MedicationReminder
+        resp = client.post('/api/v1/medications/reminders', headers=auth_headers, json={
+            'medication_id': sample_medication.id, 'reminder_time': '08:00'
+        })
+        reminder = db.session.get(MedicationReminder, resp.get_json()['data']['reminder']['id'])
+        assert reminder.next_fire_at is not None
+
+        reminder.is_active = False
+        db.session.commit()
+        assert reminder.next_fire_at is None
+
+        reminder.is_active = True
+        reminder.reminder_time = '21:30'
+        db.session.commit()
+        assert (reminder.next_fire_at.hour, reminder.next_fire_at.minute) == (21, 30)
+
+    def test_dispatch_due_reminders(self, test_user, sample_medication, db_session):
+        from datetime import datetime
+        from app import db
+        from app.models.favorites import MedicationReminder
+        from app.services.reminder_service import dispatch_due_reminders
+
+        reminder = MedicationReminder(
+            user_id=test_user.id, medication_id=sample_medication.id, reminder_time='08:00',
+            next_fire_at=datetime(2026, 10, 19, 8, 0)
+        )
+        db.session.add(reminder)
+        db.session.commit()
+
+        assert dispatch_due_reminders(now=datetime(2026, 10, 19, 7, 59)) == []
+
+        delivered = []
+        dispatched = dispatch_due_reminders(now=datetime(2026, 10, 19, 8, 0, 30),
+                                            handler=delivered.append)
+        assert [d['medication_name'] for d in dispatched] == ['Lipitor']
+        assert delivered == [reminder]
+        assert reminder.next_fire_at == datetime(2026, 10, 20, 8, 0)
+        assert MedicationReminder.get_due(datetime(2026, 10, 19, 23, 0)) == []
+
 
 class TestBulkImport:
     def test_bulk_import(self, client, auth_headers):
@@ -127,9 +233,64 @@ class TestBulkImport:
         })
         assert resp.status_code == 422
 
+    def test_bulk_import_duplicates_in_request_and_interactions(self, client, auth_headers):
+        resp = client.post('/api/v1/medications/import', headers=auth_headers, json={
+            'medications': [
+                {'drug_name': 'Lipitor'},
+                {'drug_name': 'Aspirin'},
+                {'drug_name': 'Lipitor', 'dosage': '40mg'}
+            ]
+        })
+        data = resp.get_json()['data']
+        assert data['imported'] == ['Lipitor', 'Aspirin']
+        assert data['skipped'] == [{'drug_name': 'Lipitor', 'reason': 'Duplicate in request'}]
+
+        summary = data['interaction_summary']
+        assert 'Lipitor' in summary['by_drug']
+        assert summary['by_drug']['Lipitor']['known_food_interactions'] >= 1
+        assert summary['medications_with_warnings'] == len(summary['by_drug'])
+
+    def test_bulk_import_large_list_constant_queries(self, app, client, auth_headers, sample_medication):
+        from sqlalchemy import event
+        from app import db
+        from app.models.medication import UserMedication
+
+        medications = [{'drug_name': f'Drug {i}'} for i in range(300)] + [{'drug_name': 'Lipitor'}]
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            resp = client.post('/api/v1/medications/import', headers=auth_headers,
+                               json={'medications': medications})
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+        data = resp.get_json()['data']
+        assert data['imported_count'] == 300
+        assert data['skipped'] == [{'drug_name': 'Lipitor', 'reason': 'Already exists'}]
+        assert sum('FROM user_medications' in s for s in statements) == 1
+        assert sum(s.startswith('INSERT INTO user_medications') for s in statements) <= 3
+        assert UserMedication.query.count() == 301
+
+    def test_bulk_import_over_limit(self, client, auth_headers):
+        resp = client.post('/api/v1/medications/import', headers=auth_headers, json={
+            'medications': [{'drug_name': f'Drug {i}'} for i in range(501)]
+        })
+        assert resp.status_code == 422
+
 
 class TestExportMedications:
     def test_export(self, client, auth_headers, sample_medication):
         resp = client.get('/api/v1/medications/export', headers=auth_headers)
         assert resp.status_code == 200
         assert resp.get_json()['data']['export']['total'] >= 1
+
+    def test_export_csv(self, client, auth_headers, sample_medication):
+        resp = client.get('/api/v1/medications/export?format=csv', headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.mimetype == 'text/csv'
+        lines = resp.get_data(as_text=True).splitlines()
+        assert lines[0].startswith('id,')
+        assert 'Lipitor' in lines[1]
@@ -81,3 +81,223 @@ class TestCheckIngredients:
         resp = client.post('/api/v1/foods/packaged/check-ingredients',
                            json={'off_id': '123'})
         assert resp.status_code == 401
+
+
+class TestBarcodeNormalization:
+    def test_upc_a_padded_to_ean13(self):
+        from app.services.openfoodfacts_service import normalize_barcode
+        assert normalize_barcode('049000028911') == '0049000028911'
+
+    def test_gtin14_with_zero_indicator(self):
+        from app.services.openfoodfacts_service import normalize_barcode
+        assert normalize_barcode('05449000000996') == '5449000000996'
+
+    def test_bad_check_digit(self):
+        from app.services.openfoodfacts_service import normalize_barcode
+        assert normalize_barcode('5449000000997') is None
+        assert normalize_barcode('12345') is None
+
+    def test_barcode_bad_check_digit_rejected(self, client):
+        resp = client.get('/api/v1/foods/packaged/barcode/5449000000997')
+        assert resp.status_code == 422
+
+
+MOCK_OFF_RAW = {
+    "success": True,
+    "data": {"product": {"code": "0049000028911", "product_name": "Coca-Cola",
+                         "ingredients_text": "Carbonated water, sugar"}}
+}
+
+
+class TestBarcodeCache:
+    @patch('app.services.openfoodfacts_service._make_request', return_value=MOCK_OFF_RAW)
+    def test_equivalent_codes_share_cache(self, mock_request, db_session):
+        from app.services.openfoodfacts_service import get_product_by_barcode
+        first = get_product_by_barcode('049000028911')
+        second = get_product_by_barcode('0049000028911')
+        assert mock_request.call_count == 1
+        assert second['cached'] is True
+        assert second['product']['ingredients_list'] == first['product']['ingredients_list']
+
+    @patch('app.services.openfoodfacts_service._make_request',
+           return_value={"success": True, "data": {"status": 0}})
+    def test_unknown_barcode_negative_cached(self, mock_request, db_session):
+        from app.services.openfoodfacts_service import get_product_by_barcode
+        assert get_product_by_barcode('5449000000996')['product'] is None
+        assert get_product_by_barcode('5449000000996')['product'] is None
+        assert mock_request.call_count == 1
+
+    @patch('app.services.openfoodfacts_service._make_request')
+    def test_invalid_barcode_never_fetched(self, mock_request, db_session):
+        from app.services.openfoodfacts_service import get_product_by_barcode
+        assert get_product_by_barcode('5449000000997')['product'] is None
+        mock_request.assert_not_called()
+
+    @patch('app.services.openfoodfacts_service._make_request', return_value=MOCK_OFF_RAW)
+    def test_product_codes_passed_through(self, mock_request, db_session):
+        from app.services.openfoodfacts_service import get_product_detail
+        get_product_detail('5449000000997')  # not a GTIN: an OFF-internal code
+        assert mock_request.call_args[0][0].endswith('/api/v2/product/5449000000997')
+
+    @patch('app.services.openfoodfacts_service._make_request', return_value=MOCK_OFF_RAW)
+    def test_cache_write_commits_independently(self, mock_request, db_session):
+        from app.models.product_cache import ProductCache
+        from app.services.openfoodfacts_service import get_product_by_barcode
+
+        get_product_by_barcode('049000028911')
+        db_session.session.rollback()
+        assert ProductCache.get_fresh('0049000028911') is not None
+
+    @patch('app.services.openfoodfacts_service._make_request', return_value=MOCK_OFF_RAW)
+    def test_cache_write_never_commits_caller_work(self, mock_request, db_session, test_user):
+        from app.models.user import User
+        from app.services.openfoodfacts_service import get_product_by_barcode
+
+        test_user.first_name = 'Pending'
+        get_product_by_barcode('049000028911')
+        db_session.session.rollback()
+        assert db_session.session.get(User, test_user.id).first_name == 'Test'
+
+
+class TestBarcodeConditionalGet:
+    @patch('app.services.openfoodfacts_service._make_request', return_value=MOCK_OFF_RAW)
+    def test_cached_product_revalidated_without_lookup(self, mock_request, client, monkeypatch):
+        first = client.get('/api/v1/foods/packaged/barcode/049000028911')
+        assert first.status_code == 200
+        etag = first.headers['ETag']
+
+        def fail(*args, **kwargs):
+            raise AssertionError("lookup should not run")
+        monkeypatch.setattr('app.routes.packaged_foods.get_product_by_barcode', fail)
+        resp = client.get('/api/v1/foods/packaged/barcode/049000028911', headers={'If-None-Match': etag})
+        assert resp.status_code == 304
+        assert mock_request.call_count == 1
+
+
+class TestLocalIndex:
+    def _write_dumps(self, tmp_path):
+        import json
+        jsonl = tmp_path / 'products.jsonl'
+        jsonl.write_text('\n'.join([
+            json.dumps({"code": "5449000000996", "product_name": "Coca-Cola Original",
+                        "brands": "Coca-Cola", "ingredients_text": "Water, sugar (10%), caramel"}),
+            json.dumps({"code": "123", "product_name": "Bad barcode"}),
+            'not json',
+        ]))
+        tsv = tmp_path / 'products.csv'
+        tsv.write_text(
+            "code\tproduct_name\tbrands\tingredients_text\tallergens_tags\tenergy-kcal_100g\n"
+            "049000028911\tDiet Coke\tCoca-Cola\tWater, aspartame\ten:phenylalanine\t0.4\n"
+        )
+        return str(jsonl), str(tsv)
+
+    def test_ingest_and_search(self, app, db_session, tmp_path):
+        from app.services.off_index_service import ingest_dump, search_local, get_local_product
+        jsonl, tsv = self._write_dumps(tmp_path)
+
+        assert ingest_dump(jsonl)['indexed'] == 1
+        assert ingest_dump(tsv)['indexed'] == 1
+
+        result = search_local('coca cola', limit=10)
+        assert result['total_hits'] == 2
+        assert search_local('diet')['products'][0]['off_id'] == '0049000028911'
+
+        product = get_local_product('5449000000996')
+        assert product['ingredients_list'] == ['water', 'sugar', 'caramel']
+        assert get_local_product('0049000028911')['nutrition']['calories'] == 0.4
+
+    def test_tokens_deduped_after_truncation(self):
+        from app.services.off_index_service import tokenize
+        long_word = 'x' * 64
+        assert tokenize(f'Crème {long_word}a {long_word}b creme') == ['creme', long_word]
+
+    @patch('app.services.openfoodfacts_service._make_request')
+    def test_lookups_served_locally(self, mock_request, app, db_session, tmp_path, monkeypatch):
+        from app.services.off_index_service import ingest_dump
+        from app.services.openfoodfacts_service import get_product_by_barcode, search_products
+        ingest_dump(self._write_dumps(tmp_path)[0])
+        monkeypatch.setitem(app.config, 'OFF_LOCAL_INDEX', True)
+
+        assert get_product_by_barcode('5449000000996')['product']['brands'] == 'Coca-Cola'
+        assert search_products('original')['count'] == 1
+        mock_request.assert_not_called()
+
+
+def _mock_off_by_barcode(url, params=None, timeout=10):
+    code = url.rstrip('/').split('/')[-1].split('.')[0]
+    if code == '0049000028911':
+        return MOCK_OFF_RAW
+    if code == '5449000000996':
+        return {"success": True, "data": {"product": {
+            "code": code, "product_name": "Grapefruit Soda",
+            "ingredients_text": "Carbonated water, grapefruit juice, sugar"}}}
+    return {"success": True, "data": {"status": 0}}
+
+
+class TestBarcodeBatch:
+    @patch('app.services.openfoodfacts_service._make_request', side_effect=_mock_off_by_barcode)
+    def test_batch_dedupes_and_reports(self, mock_request, client):
+        resp = client.post('/api/v1/foods/packaged/barcode/batch', json={
+            "barcodes": ['049000028911', '0049000028911', '5449000000996',
+                         '4006381333931', '5449000000997']
+        })
+        assert resp.status_code == 200
+        data = resp.get_json()['data']
+        assert data['requested'] == 5
+        assert data['unique'] == 3
+        assert data['found'] == 2
+        assert data['not_found'] == 1
+        assert data['invalid'] == ['5449000000997']
+        assert data['results'][0]['barcode'] == '0049000028911'
+        assert data['results'][0]['inputs'] == ['049000028911', '0049000028911']
+        assert mock_request.call_count == 3
+
+    @patch('app.services.openfoodfacts_service._make_request', side_effect=_mock_off_by_barcode)
+    def test_batch_served_from_cache(self, mock_request, client):
+        body = {"barcodes": ['0049000028911', '4006381333931']}
+        client.post('/api/v1/foods/packaged/barcode/batch', json=body)
+        resp = client.post('/api/v1/foods/packaged/barcode/batch', json=body)
+        sources = [item['source'] for item in resp.get_json()['data']['results']]
+        assert sources == ['cache', 'cache']
+        assert mock_request.call_count == 2
+
+    def test_batch_validation(self, client, app, monkeypatch):
+        resp = client.post('/api/v1/foods/packaged/barcode/batch', json={"barcodes": []})
+        assert resp.status_code == 422
+        monkeypatch.setitem(app.config, 'OFF_BATCH_MAX_BARCODES', 2)
+        resp = client.post('/api/v1/foods/packaged/barcode/batch',
+                           json={"barcodes": ['1', '2', '3']})
+        assert resp.status_code == 422
+
+    def test_batch_interactions_require_auth(self, client):
+        resp = client.post('/api/v1/foods/packaged/barcode/batch',
+                           json={"barcodes": ['5449000000996'], "check_interactions": True})
+        assert resp.status_code == 401
+
+    @patch('app.services.openfoodfacts_service._make_request', side_effect=_mock_off_by_barcode)
+    def test_batch_interactions(self, mock_request, client, auth_headers, sample_medication):
+        resp = client.post('/api/v1/foods/packaged/barcode/batch', headers=auth_headers,
+                           json={"barcodes": ['5449000000996'], "check_interactions": True})
+        assert resp.status_code == 200
+        data = resp.get_json()['data']
+        assert data['medications_checked'] == 1
+        warnings = data['results'][0]['warnings']
+        assert any(w['triggering_ingredient'] == 'grapefruit juice' for w in warnings)
+
+    @patch('app.routes.packaged_foods.check_foods_against_medications', return_value={})
+    @patch('app.services.openfoodfacts_service._make_request', side_effect=_mock_off_by_barcode)
+    def test_batch_interactions_screened_once(self, mock_request, mock_check, client, auth_headers,
+                                              sample_medication):
+        resp = client.post('/api/v1/foods/packaged/barcode/batch', headers=auth_headers,
+                           json={"barcodes": ['5449000000996', '0049000028911'], "check_interactions": True})
+        assert resp.status_code == 200
+        assert mock_check.call_count == 1
+        assert all(item['warnings'] == [] for item in resp.get_json()['data']['results'])
+
+    @patch('app.services.openfoodfacts_service._make_request', side_effect=_mock_off_by_barcode)
+    def test_batch_interactions_without_medications(self, mock_request, client, auth_headers):
+        resp = client.post('/api/v1/foods/packaged/barcode/batch', headers=auth_headers,
+                           json={"barcodes": ['5449000000996', '123'], "check_interactions": True})
+        data = resp.get_json()['data']
+        assert data['medications_checked'] == 0
+        assert all(item['warnings'] == [] for item in data['results'])
@@ -47,11 +47,16 @@ export const useInteractionHistoryStore = defineStore('interactionHistory', () =
 
   async function saveCheck(food: string, medications: string[], interactions: any[]): Promise<void> {
     try {
-      await interactionHistoryApi.save({
+      const response = await interactionHistoryApi.save({
         food_name: food,
         medications,
         interactions,
       })
+      if (response.status === 202) {
+        // Queued server-side; pick it up on the next history load
+        hasFetched.value = false
+        return
+      }
       // Refresh history to get the new entry
       await fetchHistory(true)
     } catch (err) {